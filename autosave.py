@@ -0,0 +1,94 @@
+#saves the managers in the background once changes stop coming in, instead of after every click
+#a manager calls on_change() whenever it changes, poll() (from the thread that owns the managers)
+#takes a snapshot of each store that has been quiet for `delay` seconds, and a writer thread
+#writes the snapshots, so a burst of changes to one file becomes one write
+
+import threading
+import time
+from journal import write_json_atomic
+
+
+class AutosaveWriter:
+    def __init__(self, delay=1.0):
+        self.delay = delay   #seconds without changes before a store is written
+        self._stores = {}   #name -> (manager, filename)
+        self._changed_at = {}   #name -> time of its last change, only for stores with unsaved changes
+        self._pending = {}   #filename -> data waiting for the writer, a newer snapshot replaces an older one
+        self._writing = False
+        self._lock = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_loop, name="autosave", daemon=True)
+        self._thread.start()
+
+    def track(self, name, manager, filename):
+        #save manager to filename from now on, tracking a name again replaces the old manager
+        self._stores[name] = (manager, filename)
+        manager.on_change = lambda: self.mark_dirty(name)
+        if manager.dirty:
+            self.mark_dirty(name)
+
+    def mark_dirty(self, name):
+        # Time Complexity: O(1)
+        self._changed_at[name] = time.monotonic()
+
+    def dirty(self):
+        #names of the stores with changes not yet handed to the writer
+        return sorted(self._changed_at)
+
+    def poll(self, now=None):
+        # Time Complexity: O(stores) plus the snapshot of each store written
+
+        #snapshot the stores that have been quiet long enough, return True while anything is unsaved
+        now = time.monotonic() if now is None else now
+        for name, changed_at in list(self._changed_at.items()):
+            if now - changed_at >= self.delay:
+                self._snapshot(name)
+        with self._lock:
+            return bool(self._changed_at or self._pending or self._writing)
+
+    def flush(self):
+        #snapshot every changed store now and wait until the writer has written them all
+        for name in list(self._changed_at):
+            self._snapshot(name)
+        with self._lock:
+            while self._pending or self._writing:
+                self._lock.wait()
+
+    def close(self):
+        #flush, then stop the writer thread
+        if self._closed:
+            return
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._thread.join()
+
+    def _snapshot(self, name):
+        #the snapshot is taken on the caller's thread, so it never sees a half-made change
+        del self._changed_at[name]
+        manager, filename = self._stores[name]
+        job = manager.snapshot(filename)
+        if job is None:
+            return   #a storage backend or the journal has the changes already
+        with self._lock:
+            self._pending[job[0]] = job[1]
+            self._lock.notify_all()
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._lock.wait()
+                if not self._pending:
+                    return
+                jobs, self._pending = self._pending, {}
+                self._writing = True
+            for filename, data in jobs.items():
+                try:
+                    write_json_atomic(filename, data)
+                except OSError as e:
+                    print(f"Error saving to {filename}: {e}")
+            with self._lock:
+                self._writing = False
+                self._lock.notify_all()
@@ -0,0 +1,38 @@
+#Import time of the model modules, measured with python -X importtime
+#run with: python bench_import.py [module ...]   (default: the headless core)
+
+import os
+import subprocess
+import sys
+
+
+CORE_MODULES = ["recipe", "manager", "storage", "optimiser", "list_view", "tasks", "autosave", "typeahead", "pantry"]
+GUI_MODULES = {"tkinter", "_tkinter", "tkinter.ttk"}
+
+
+def import_times(modules):
+    #return [(module, self microseconds, cumulative microseconds)] in import order
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)))   #so the modules are found from any folder
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times.append((name.strip(), int(own), int(cumulative)))
+    return times
+
+
+if __name__ == "__main__":
+    modules = sys.argv[1:] or CORE_MODULES
+    times = import_times(modules)
+    gui = sorted(GUI_MODULES.intersection(name for name, _, _ in times))
+    total = sum(cumulative for name, _, cumulative in times if name in modules)
+    print(f"import {', '.join(modules)}: {total / 1000:.1f} ms")
+    for name, own, cumulative in sorted(times, key=lambda t: t[2], reverse=True)[:10]:
+        print(f"  {cumulative / 1000:7.1f} ms  {name}")
+    if gui:
+        print(f"GUI modules imported: {', '.join(gui)}")
+        sys.exit(1)
@@ -0,0 +1,96 @@
+#Memory benchmark: 1M ingredients in the old plain classes vs the slotted, interned ones
+#run with: python bench_memory.py [number of ingredients]
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from recipe import Recipe, Ingredient
+
+
+#the classes as they were before __slots__ and interning, kept here only for comparison
+class PlainIngredient:
+    def __init__(self, name, quantity, unit, cost_per_unit=0.0):
+        self.name = name
+        self.quantity = quantity
+        self.unit = unit
+        self.cost_per_unit = cost_per_unit
+
+
+class PlainRecipe:
+    def __init__(self, title, description, servings, cuisine, category,
+                 ingredients=None, steps=None, rating=None, notes=None, image_path=None, total_cost=0.0):
+        self.title = title
+        self.description = description
+        self.servings = servings
+        self.cuisine = cuisine
+        self.category = category
+        self.ingredients = ingredients if ingredients else []
+        self.steps = steps if steps else []
+        self.rating = rating
+        self.notes = notes
+        self.image_path = image_path
+        self.total_recipe_cost = total_cost
+
+
+UNITS = ["g", "kg", "ml", "cup", "tablespoon", "teaspoon", "pcs", ""]
+CUISINES = ["Italian", "French", "Indian", "Mexican", "Chinese", "British"]
+CATEGORIES = ["Breakfast", "Lunch", "Dinner", "Dessert"]
+PER_RECIPE = 10
+
+
+def make_feed(total_ingredients):
+    #build the data as JSON text and parse it, so every string is a separate object like after loading a file
+    recipes = []
+    for i in range(total_ingredients // PER_RECIPE):
+        recipes.append({
+            "title": f"Recipe {i}",
+            "description": "",
+            "servings": 4,
+            "cuisine": CUISINES[i % len(CUISINES)],
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "ingredients": [
+                {"name": f"Ingredient {(i * 7 + j) % 2000}", "quantity": float(j + 1),
+                 "unit": UNITS[(i + j) % len(UNITS)], "cost_per_unit": 0.1}
+                for j in range(PER_RECIPE)
+            ],
+            "steps": [],
+            "total_cost": 5.0,
+        })
+    return json.loads(json.dumps(recipes))
+
+
+def build(recipe_class, ingredient_class, feed):
+    return [
+        recipe_class(d["title"], d["description"], d["servings"], d["cuisine"], d["category"],
+                     [ingredient_class(i["name"], i["quantity"], i["unit"], i["cost_per_unit"]) for i in d["ingredients"]],
+                     d["steps"], total_cost=d["total_cost"])
+        for d in feed
+    ]
+
+
+def measure(recipe_class, ingredient_class, total_ingredients):
+    #trace from before parsing so the strings the objects keep alive are counted too
+    gc.collect()
+    tracemalloc.start()
+    feed = make_feed(total_ingredients)
+    start = time.perf_counter()
+    recipes = build(recipe_class, ingredient_class, feed)
+    elapsed = time.perf_counter() - start
+    del feed   #duplicate strings are freed once interned, the plain classes keep every copy
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del recipes
+    return used, elapsed
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    plain, plain_time = measure(PlainRecipe, PlainIngredient, total)
+    compact, compact_time = measure(Recipe, Ingredient, total)
+    print(f"{total:,} ingredients")
+    print(f"plain classes:   {plain / 2**20:8.1f} MB  built in {plain_time:.2f}s")
+    print(f"slotted+interned:{compact / 2**20:8.1f} MB  built in {compact_time:.2f}s")
+    print(f"reduction:       {100 * (1 - compact / plain):8.1f} %")
@@ -0,0 +1,233 @@
+#Command-line interface for bulk work without the GUI
+#every command prints one JSON object per line so scripts can read the output
+#
+#  python cli.py import recipes_feed.json      (or a .jsonl feed, one recipe per line)
+#  python cli.py search "ground beef"
+#  python cli.py filter --cuisine italian --rating 7
+#  python cli.py plan 2025-05-01 2025-05-31 "Spaghetti Bolognese" "Omelette"
+#  python cli.py plan 2025-06-01 2025-06-01 "Omelette" --servings 6
+#  python cli.py shopping 2025-05-01 2025-05-07
+#  python cli.py consolidate 2025-05-01 2025-05-07   (one list from the saved ones)
+#  python cli.py cook eggs flour milk --missing 1     (what the pantry covers, or nearly covers)
+#  python cli.py batch commands.txt      (many commands, data loaded and saved once)
+
+import argparse
+import json
+import os
+import shlex
+import sys
+from contextlib import nullcontext
+from datetime import date, timedelta
+from manager import RecipeManager, MealPlanner, ShoppingListGenerator, ShoppingListManager, MEAL_TYPES
+from feed import read_json_lines
+from journal import write_json_atomic
+from storage import SqliteStorage
+
+
+def recipe_summary(recipe):
+    #the fields scripts usually want, without loading ingredients and steps
+    return {
+        "id": recipe.recipe_id,
+        "title": recipe.title,
+        "servings": recipe.servings,
+        "cuisine": recipe.cuisine,
+        "category": recipe.category,
+        "rating": recipe.rating,
+        "total_cost": recipe.total_recipe_cost,
+    }
+
+
+def date_range(start, end):
+    #every ISO date from start to end, both included
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    if last < first:
+        raise ValueError(f"end date {end} is before start date {start}")
+    for offset in range((last - first).days + 1):
+        yield (first + timedelta(days=offset)).isoformat()
+
+
+#the loaded managers shared by every command of one run
+class Session:
+    def __init__(self, storage=None, data_dir="."):
+        self.storage = storage
+        self.recipe_manager = RecipeManager(storage=storage, lazy=True, filename=os.path.join(data_dir, "recipes.json"))
+        self.shopping_list_manager = ShoppingListManager(storage=storage, filename=os.path.join(data_dir, "shoppinglist.json"))
+        self.meal_planner = MealPlanner(self.recipe_manager, storage=storage, shopping_lists=self.shopping_list_manager,
+                                        filename=os.path.join(data_dir, "mealplan.json"))
+        self.shopper = ShoppingListGenerator(self.recipe_manager)
+        self.changed = False   #only write files back if a command changed something
+
+    def save(self):
+        #one save at the end of the run instead of one per change
+        if self.changed:
+            self.recipe_manager.save_to_file()
+            self.meal_planner.save_to_file()
+            self.shopping_list_manager.save_to_file()
+
+    def cmd_import(self, args):
+        # Time Complexity: O(n)
+
+        #a .jsonl feed is streamed one line at a time, anything else is read as a JSON list or a saved recipes file
+        with open(args.file, "r") as f:
+            if args.file.endswith(".jsonl"):
+                report = self.recipe_manager.add_recipes(read_json_lines(f), save=False)
+            else:
+                data = json.load(f)
+                report = self.recipe_manager.add_recipes(data["recipes"] if isinstance(data, dict) else data, save=False)
+        self.changed = self.changed or report.added > 0
+        yield report.to_dict()
+
+    def cmd_export(self, args):
+        write_json_atomic(args.file, self.recipe_manager.to_dict())
+        yield {"exported": len(self.recipe_manager.recipes), "file": args.file}
+
+    def cmd_search(self, args):
+        for recipe in self.recipe_manager.search_recipes(args.query, args.limit or None):
+            yield recipe.to_dict() if args.full else recipe_summary(recipe)
+
+    def cmd_filter(self, args):
+        for recipe in self.recipe_manager.filter_recipes(args.cuisine, args.category, args.rating):
+            yield recipe.to_dict() if args.full else recipe_summary(recipe)
+
+    def cmd_plan(self, args):
+        # Time Complexity: O(d)
+        # d = number of days in the range
+
+        #plan the given recipes one per day in turn across the range, scaled to --servings if given
+        recipes = []
+        for title in args.titles:
+            recipe = self.recipe_manager.get_recipe_by_title(title)
+            if recipe is None:
+                raise ValueError(f"no recipe called {title!r}")
+            recipes.append(recipe)
+        for i, day in enumerate(date_range(args.start, args.end)):
+            recipe = recipes[i % len(recipes)]
+            self.meal_planner.add_meal(day, recipe, args.servings)
+            self.changed = True
+            yield {"date": day, "title": recipe.title, "servings": args.servings or recipe.servings}
+
+    def cmd_shopping(self, args):
+        # Time Complexity: O(log d + k * m)
+        # k = planned days in the range, m = ingredients of the meals planned on them
+        for day, planned in self.meal_planner.meals_between(args.start, args.end):
+            meals = [meal for meal in planned if isinstance(meal, MEAL_TYPES)]
+            if not meals:
+                continue
+            day = day.isoformat()
+            items = self.shopper.generate_items(meals)
+            self.shopping_list_manager.save_list(day, items)
+            self.changed = True
+            yield {"date": day, "items": [item.to_dict() for item in items]}
+
+    def cmd_consolidate(self, args):
+        # Time Complexity: O(log d + total items of the saved lists in the range)
+
+        #one list made from the shopping lists already saved from START to END
+        start, end = date.fromisoformat(args.start), date.fromisoformat(args.end)
+        if end < start:
+            raise ValueError(f"end date {args.end} is before start date {args.start}")
+        combined = self.shopping_list_manager.consolidate(start, end)
+        yield {"start": start.isoformat(), "end": end.isoformat(), "items": combined.to_dict(), "total_cost": combined.total_cost}
+
+    def cmd_cook(self, args):
+        # Time Complexity: O(n) bitwise operations once the ingredient bitsets are built
+
+        #recipes the given ingredients cover, or cover but for at most --missing of them
+        for recipe, missing, cost in self.recipe_manager.what_can_i_cook(args.ingredients, args.missing):
+            yield {"id": recipe.recipe_id, "title": recipe.title, "missing": missing, "cost_to_buy": cost}
+
+    def run(self, args):
+        return getattr(self, f"cmd_{args.command}")(args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Bulk recipe, meal plan and shopping list commands.")
+    parser.add_argument("--data-dir", default=".", help="folder with recipes.json, mealplan.json and shoppinglist.json, "
+                                                        "other file arguments are relative to the current folder")
+    parser.add_argument("--db", help="use this SQLite database instead of the JSON files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("import", help="add recipes from a JSON list or a .jsonl feed, skipping bad rows and titles that already exist")
+    p.add_argument("file")
+    p = commands.add_parser("export", help="write every recipe to a JSON file")
+    p.add_argument("file")
+    p = commands.add_parser("search", help="search titles and ingredients")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=0)
+    p.add_argument("--full", action="store_true", help="print whole recipes, not just the summary")
+    p = commands.add_parser("filter", help="filter by cuisine, category and minimum rating")
+    p.add_argument("--cuisine")
+    p.add_argument("--category")
+    p.add_argument("--rating", type=float)
+    p.add_argument("--full", action="store_true", help="print whole recipes, not just the summary")
+    p = commands.add_parser("plan", help="plan recipes one per day in turn from START to END")
+    p.add_argument("start")
+    p.add_argument("end")
+    p.add_argument("titles", nargs="+")
+    p.add_argument("--servings", type=float, help="cook every planned recipe for this many servings")
+    p = commands.add_parser("shopping", help="make and save the shopping list of every planned day from START to END")
+    p.add_argument("start")
+    p.add_argument("end")
+    p = commands.add_parser("consolidate", help="combine the saved shopping lists from START to END into one")
+    p.add_argument("start")
+    p.add_argument("end")
+    p = commands.add_parser("cook", help="recipes that can be made from the ingredients on hand")
+    p.add_argument("ingredients", nargs="+")
+    p.add_argument("--missing", type=int, default=0, help="also list recipes missing up to this many ingredients")
+    p = commands.add_parser("batch", help="run many commands, one per line, from a file or - for stdin")
+    p.add_argument("file", nargs="?", default="-")
+    return parser
+
+
+def emit(results, out):
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+
+
+def run_batch(session, parser, lines, out, err):
+    # Time Complexity: O(total work of the commands)
+    #the data is loaded once and saved once however many lines there are
+    failures = 0
+    with session.storage.batch() if session.storage is not None else nullcontext():
+        for line_number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                args = parser.parse_args(shlex.split(line))
+                if args.command == "batch":
+                    raise ValueError("batch files cannot run batch")
+                emit(session.run(args), out)
+            except (ValueError, OSError, KeyError, json.JSONDecodeError, SystemExit) as e:
+                #report the bad line and keep going with the rest
+                failures += 1
+                err.write(json.dumps({"line": line_number, "command": line, "error": str(e)}) + "\n")
+    return failures
+
+
+def main(argv=None, out=sys.stdout, err=sys.stderr):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    storage = SqliteStorage(args.db) if args.db else None
+    session = Session(storage, args.data_dir)
+    try:
+        if args.command == "batch":
+            lines = sys.stdin if args.file == "-" else open(args.file, "r")
+            with lines:
+                failures = run_batch(session, parser, lines, out, err)
+        else:
+            failures = 0
+            try:
+                emit(session.run(args), out)
+            except (ValueError, OSError, json.JSONDecodeError) as e:
+                failures = 1
+                err.write(json.dumps({"error": str(e)}) + "\n")
+        session.save()
+    finally:
+        if storage is not None:
+            storage.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+
+def parse_date(value):
+    #turn "YYYY-MM-DD" (or a date) into a date, raises ValueError for anything else
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f"not a date: {value!r}")
+    return date.fromisoformat(value.strip())
+
+
+def week_bounds(day):
+    #monday and sunday of the week a day is in
+    day = parse_date(day)
+    monday = day - timedelta(days=day.weekday())
+    return monday, monday + timedelta(days=6)
+
+
+def month_bounds(day):
+    #first and last day of the month a day is in
+    day = parse_date(day)
+    first = day.replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    return first, following - timedelta(days=1)
+
+
+#sorted list of dates, so the dates in a range are found by binary search
+class DateIndex:
+    def __init__(self, dates=()):
+        self._dates = sorted(set(dates))
+
+    def add(self, day):
+        # Time Complexity: O(log n) to find it, O(n) list shift for a new date
+        i = bisect_left(self._dates, day)
+        if i == len(self._dates) or self._dates[i] != day:
+            self._dates.insert(i, day)
+
+    def remove(self, day):
+        i = bisect_left(self._dates, day)
+        if i < len(self._dates) and self._dates[i] == day:
+            del self._dates[i]
+
+    def between(self, start, end):
+        # Time Complexity: O(log n + k)
+        # k = dates in the range, start and end are both included
+        return self._dates[bisect_left(self._dates, start):bisect_right(self._dates, end)]
+
+    def __iter__(self):
+        return iter(self._dates)
+
+    def __len__(self):
+        return len(self._dates)
@@ -0,0 +1,216 @@
+from collections import defaultdict
+from recipe import Ingredient
+
+
+BATCH_UNITS = {"batch", "batches", "recipe", "recipes"}   #sub-recipe quantity given in whole batches
+
+
+def name_key(name):
+    #ingredient names and recipe titles are matched ignoring capital letters
+    return name.lower() if name else None
+
+
+#graph of which recipes use other recipes as ingredients, with memoized flattened ingredient lists and costs
+class RecipeGraph:
+    def __init__(self, lookup):
+        self.lookup = lookup   #function that finds a recipe by title, or returns None
+        self.mentions = defaultdict(set)   #ingredient name -> titles of recipes that list it
+        self._uses = {}   #recipe title -> ingredient names it lists
+        self._flat = {}   #recipe title -> flattened ingredients for one batch
+        self._cost = {}   #recipe title -> (cost of one batch rolled up through sub-recipes, True if any of it is priced)
+
+    def clear(self):
+        self.mentions = defaultdict(set)
+        self._uses = {}
+        self._flat = {}
+        self._cost = {}
+
+    def build(self, recipes, ingredient_names=None):
+        # Time Complexity: O(n * m)
+
+        #ingredient_names(recipe) gives the names it lists, by default recipe.ingredient_names()
+        #only the links are made here, ingredients are flattened and costed when first asked for
+        self.clear()
+        for recipe in recipes:
+            self.add(recipe, ingredient_names(recipe) if ingredient_names else None)
+
+    def add(self, recipe, names=None):
+        # Time Complexity: O(m + d)
+        # m = ingredients of the recipe, d = recipes whose memo depends on it
+        key = name_key(recipe.title)
+        if key is None:
+            return
+        if key in self._uses:
+            self.remove(key)
+        names = {name_key(name) for name in (recipe.ingredient_names() if names is None else names)}
+        self._uses[key] = names
+        for name in names:
+            self.mentions[name].add(key)
+        self.invalidate(key)   #recipes listing this title now expand into it
+
+    def remove(self, title):
+        # Time Complexity: O(m + d)
+        key = name_key(title)
+        for name in self._uses.pop(key, ()):
+            users = self.mentions.get(name)
+            if users is not None:
+                users.discard(key)
+                if not users:
+                    del self.mentions[name]
+        self.invalidate(key)
+
+    def invalidate(self, title):
+        # Time Complexity: O(d)
+        # d = memoized recipes that use this one, directly or through other sub-recipes
+
+        #drop the memos of a recipe and of everything that depends on it
+        #a recipe is only memoized if its sub-recipes are, so the walk stops at the first un-memoized one
+        pending = [name_key(title)]
+        seen = set()
+        while pending:
+            key = pending.pop()
+            if key in seen:
+                continue
+            seen.add(key)
+            had_flat = self._flat.pop(key, None) is not None
+            had_cost = self._cost.pop(key, None) is not None
+            if had_flat or had_cost or key == name_key(title):
+                pending.extend(self.mentions.get(key, ()))
+
+    def dependents(self, title):
+        #every recipe that uses this one, directly or through other sub-recipes
+        found = set()
+        pending = [name_key(title)]
+        while pending:
+            key = pending.pop()
+            for parent in self.mentions.get(key, ()):
+                if parent != key and parent not in found and parent in self._uses:
+                    found.add(parent)
+                    pending.append(parent)
+        return found
+
+    def find_cycle(self, title):
+        #return the titles forming a cycle reachable from this recipe, or None
+        try:
+            self._expand(name_key(title), {})
+        except ValueError as e:
+            return e.args[1]
+        return None
+
+    @staticmethod
+    def _batch_factor(ing, sub_recipe):
+        #how many batches of the sub-recipe one ingredient line stands for
+        if not ing.quantity:
+            return 1.0   #no quantity given, use the whole sub-recipe
+        if ing.unit and ing.unit.strip().lower() in BATCH_UNITS:
+            return ing.quantity
+        if not sub_recipe.servings:
+            return 1.0
+        return ing.quantity / sub_recipe.servings   #otherwise the quantity is servings of the sub-recipe
+
+    def _sub_recipe(self, key, ing):
+        #the recipe an ingredient line of recipe key refers to, or None for a raw ingredient
+        #a line named like its own recipe ("Pasta" in "Pasta") is the bought ingredient, not a cycle
+        sub_recipe = self.lookup(ing.name)
+        if sub_recipe is not None and name_key(sub_recipe.title) == key:
+            return None
+        return sub_recipe
+
+    def _expand(self, key, stack):
+        # Time Complexity: O(m) per recipe the first time, O(1) once memoized
+
+        #flatten one batch of a recipe, merging the same ingredient in the same unit
+        if key in self._flat:
+            return self._flat[key]
+        recipe = self.lookup(key)
+        if recipe is None:
+            return []
+        stack[key] = recipe.title
+        combined = {}
+        for ing in recipe.ingredients:
+            if not ing or not ing.name:
+                continue  # skip invalid ingredients
+            sub_recipe = self._sub_recipe(key, ing)
+            if sub_recipe is None:
+                parts, factor = [ing], 1.0
+            else:
+                sub_key = name_key(sub_recipe.title)
+                if sub_key in stack:
+                    path = list(stack.values())
+                    path = path[list(stack).index(sub_key):] + [sub_recipe.title]
+                    raise ValueError(f"Recipe cycle: {' -> '.join(path)}", path)
+                parts, factor = self._expand(sub_key, stack), self._batch_factor(ing, sub_recipe)
+            for part in parts:
+                merge_key = (part.name.lower(), part.unit)
+                quantity = (part.quantity or 0) * factor
+                if merge_key in combined:
+                    combined[merge_key].quantity += quantity
+                else:
+                    combined[merge_key] = Ingredient(part.name, quantity, part.unit, part.cost_per_unit)
+        del stack[key]
+        flat = list(combined.values())
+        self._flat[key] = flat
+        return flat
+
+    def batch(self, recipe):
+        # Time Complexity: O(1) once memoized
+
+        #the memoized raw ingredients of one batch, shared with the memo so they must not be changed
+        #the same list object is returned until the recipe or one of its sub-recipes changes
+        #raises ValueError if the recipe is part of a cycle
+        return self._expand(name_key(recipe.title), {})
+
+    def flattened(self, recipe, servings=None):
+        # Time Complexity: O(r) once memoized
+        # r = number of ingredients in the result
+
+        #all raw ingredients of a recipe, scaled to the servings asked for (default: one batch)
+        #raises ValueError if the recipe is part of a cycle
+        flat = self.batch(recipe)
+        factor = servings / recipe.servings if servings and recipe.servings else 1.0
+        return [Ingredient(i.name, i.quantity * factor, i.unit, i.cost_per_unit) for i in flat]
+
+    def _roll_up(self, key, stack):
+        # Time Complexity: O(m) per recipe the first time, O(1) once memoized
+
+        #(cost of one batch, priced): priced ingredients plus the batches of sub-recipes used
+        #a recipe where nothing is priced, not even in its sub-recipes, keeps the total typed in for it
+        if key in self._cost:
+            return self._cost[key]
+        recipe = self.lookup(key)
+        if recipe is None:
+            return 0.0, False
+        stack[key] = recipe.title
+        total, priced = 0.0, False
+        for ing in recipe.ingredients:
+            if not ing or not ing.name:
+                continue
+            sub_recipe = self._sub_recipe(key, ing)
+            if sub_recipe is None:
+                if ing.cost_per_unit:
+                    total += ing.total_cost()
+                    priced = True
+                continue
+            sub_key = name_key(sub_recipe.title)
+            if sub_key in stack:
+                path = list(stack.values())
+                path = path[list(stack).index(sub_key):] + [sub_recipe.title]
+                raise ValueError(f"Recipe cycle: {' -> '.join(path)}", path)
+            sub_cost, sub_priced = self._roll_up(sub_key, stack)
+            total += sub_cost * self._batch_factor(ing, sub_recipe)
+            priced = priced or sub_priced   #a sub-recipe costed only by its typed total does not replace this one's
+        del stack[key]
+        cost = (total, True) if priced else (recipe.total_recipe_cost or 0.0, False)
+        self._cost[key] = cost
+        return cost
+
+    def cost(self, recipe, servings=None):
+        # Time Complexity: O(1) once memoized
+
+        #cost of a recipe from its ingredient prices and sub-recipes, scaled to the servings asked for
+        #a recipe that is part of a cycle falls back to the total typed in for it
+        try:
+            cost = self._roll_up(name_key(recipe.title), {})[0]
+        except ValueError:
+            cost = recipe.total_recipe_cost or 0.0
+        return cost * servings / recipe.servings if servings and recipe.servings else cost
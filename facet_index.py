@@ -0,0 +1,131 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import count
+
+
+def facet_key(value):
+    #facet values are matched ignoring capital letters
+    return value.strip().lower() if value else ""
+
+
+#secondary indexes for filtering recipes by cuisine, category and rating
+class FacetIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.by_cuisine = defaultdict(set)   #cuisine -> recipes
+        self.by_category = defaultdict(set)   #category -> recipes
+        self.by_pair = defaultdict(set)   #(cuisine, category) -> recipes, for combined counts
+        self.labels = {}   #facet key -> how it was first written, for showing in the UI
+        self._ratings = []   #sorted ratings of rated recipes
+        self._rated = []   #recipes in the same order as _ratings
+        self._indexed = {}   #recipe -> (cuisine, category, rating) it was indexed under
+        self._order = {}   #recipe -> insertion number, so results keep the list order
+        self._counter = count()
+
+    def build(self, recipes):
+        # Time Complexity: O(n log n)
+        self.clear()
+        for recipe in recipes:
+            self.add(recipe)
+
+    def add(self, recipe):
+        # Time Complexity: O(log n) plus the shift when inserting a rating
+        order = self._order.get(recipe)
+        if recipe in self._indexed:
+            self.remove(recipe)   #re-adding an edited recipe moves it to its new facets
+        cuisine = facet_key(recipe.cuisine)
+        category = facet_key(recipe.category)
+        rating = recipe.rating if recipe.rating else None   #unrated recipes never pass a rating filter
+        self.by_cuisine[cuisine].add(recipe)
+        self.by_category[category].add(recipe)
+        self.by_pair[(cuisine, category)].add(recipe)
+        self.labels.setdefault(cuisine, recipe.cuisine or "")
+        self.labels.setdefault(category, recipe.category or "")
+        if rating is not None:
+            i = bisect_right(self._ratings, rating)
+            self._ratings.insert(i, rating)
+            self._rated.insert(i, recipe)
+        self._indexed[recipe] = (cuisine, category, rating)
+        self._order[recipe] = order if order is not None else next(self._counter)
+
+    def remove(self, recipe):
+        # Time Complexity: O(log n + d)
+        # d = recipes sharing the same rating
+        entry = self._indexed.pop(recipe, None)
+        if entry is None:
+            return
+        cuisine, category, rating = entry
+        for index, key in ((self.by_cuisine, cuisine), (self.by_category, category), (self.by_pair, (cuisine, category))):
+            index[key].discard(recipe)
+            if not index[key]:
+                del index[key]
+        if rating is not None:
+            lo = bisect_left(self._ratings, rating)
+            hi = bisect_right(self._ratings, rating)
+            for i in range(lo, hi):
+                if self._rated[i] is recipe:
+                    del self._ratings[i]
+                    del self._rated[i]
+                    break
+        self._order.pop(recipe, None)
+
+    def rated_at_least(self, rating):
+        # Time Complexity: O(log n + k)
+        # k = number of recipes returned
+        return self._rated[bisect_left(self._ratings, rating):]
+
+    def _candidate_sets(self, cuisine=None, category=None, rating=None):
+        #one set per active filter
+        sets = []
+        if cuisine and category:
+            sets.append(self.by_pair.get((facet_key(cuisine), facet_key(category)), set()))
+        elif cuisine:
+            sets.append(self.by_cuisine.get(facet_key(cuisine), set()))
+        elif category:
+            sets.append(self.by_category.get(facet_key(category), set()))
+        if rating:
+            sets.append(set(self.rated_at_least(rating)))
+        return sets
+
+    def filter(self, cuisine=None, category=None, rating=None):
+        # Time Complexity: O(k log k)
+        # k = size of the smallest matching set
+        sets = self._candidate_sets(cuisine, category, rating)
+        if not sets:
+            return None   #no filters given
+        sets.sort(key=len)
+        results = set(sets[0])
+        for other in sets[1:]:
+            results &= other
+        return sorted(results, key=self._order.__getitem__)
+
+    def count(self, cuisine=None, category=None, rating=None):
+        #how many recipes match, without building a list unless two filters are combined
+        if rating and not cuisine and not category:
+            return len(self._ratings) - bisect_left(self._ratings, rating)
+        sets = self._candidate_sets(cuisine, category, rating)
+        if not sets:
+            return len(self._indexed)
+        if len(sets) == 1:
+            return len(sets[0])
+        return len(self.filter(cuisine, category, rating))
+
+    def facet_counts(self, facet, cuisine=None, category=None):
+        # Time Complexity: O(c)
+        # c = number of distinct (cuisine, category) pairs
+
+        #count recipes for each value of a facet, optionally inside the other facet
+        #e.g. facet_counts("category", cuisine="Italian") -> {"Dinner": 3, ...}
+        if facet == "cuisine":
+            if not category:
+                return {self.labels[k]: len(v) for k, v in self.by_cuisine.items()}
+            wanted = facet_key(category)
+            return {self.labels[c]: len(v) for (c, cat), v in self.by_pair.items() if cat == wanted}
+        if facet == "category":
+            if not cuisine:
+                return {self.labels[k]: len(v) for k, v in self.by_category.items()}
+            wanted = facet_key(cuisine)
+            return {self.labels[cat]: len(v) for (c, cat), v in self.by_pair.items() if c == wanted}
+        raise ValueError(f"Unknown facet: {facet}")
@@ -0,0 +1,76 @@
+import json   #for reading the feed lines
+
+
+MAX_REPORTED = 1000   #rejected rows kept with their reason, the rest are only counted
+
+
+NUMBER_TYPES = (int, float)
+
+
+def _is_number(value):
+    return type(value) in NUMBER_TYPES   #exact types, so True and False are not numbers
+
+
+def recipe_problem(data):
+    # Time Complexity: O(m)
+    # m = ingredients and steps of the recipe
+
+    #return why a recipe dictionary cannot be imported, or None if it is fine
+    if not isinstance(data, dict):
+        return "not a JSON object"
+    title = data.get("title")
+    if not isinstance(title, str) or not title.strip():
+        return "missing title"
+    servings = data.get("servings", 1)
+    if not _is_number(servings) or servings <= 0:
+        return "servings must be a positive number"
+    rating = data.get("rating")
+    if rating is not None and not _is_number(rating):
+        return "rating must be a number"
+    ingredients = data.get("ingredients", [])
+    if not isinstance(ingredients, list):
+        return "ingredients must be a list"
+    for position, ing in enumerate(ingredients, 1):
+        if not isinstance(ing, dict) or not isinstance(ing.get("name"), str) or not ing["name"]:
+            return f"ingredient {position} has no name"
+        if "quantity" not in ing or "unit" not in ing:
+            return f"ingredient {position} needs a quantity and a unit"
+        if ing["quantity"] is not None and not _is_number(ing["quantity"]):
+            return f"ingredient {position} quantity must be a number"
+        if not _is_number(ing.get("cost_per_unit", 0.0)):
+            return f"ingredient {position} cost_per_unit must be a number"
+    if not isinstance(data.get("steps", []), list):
+        return "steps must be a list"
+    return None
+
+
+def read_json_lines(lines):
+    # Time Complexity: O(size of the feed), memory O(one line)
+
+    #yield (line number, recipe dictionary) for every line of a JSON Lines feed
+    #lines can be an open file, nothing is read ahead of the line being yielded
+    #a line that is not valid JSON yields a ValueError instead of the dictionary
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"invalid JSON: {e.msg}")
+
+
+#what add_recipes did with a batch
+class ImportReport:
+    def __init__(self):
+        self.added = 0
+        self.rejected_count = 0
+        self.rejected = []   #(row, reason) for the first MAX_REPORTED rejected rows
+
+    def reject(self, row, reason):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED:
+            self.rejected.append((row, reason))
+
+    def to_dict(self):
+        return {"imported": self.added, "skipped": self.rejected_count,
+                "rejected": [{"row": row, "reason": reason} for row, reason in self.rejected]}
@@ -0,0 +1,116 @@
+#typo-tolerant word lookup: which known words are within a few edits of a misspelt one
+#words are indexed by their three-letter pieces (trigrams), a word k edits away from the query
+#still shares most of its trigrams, so only words sharing enough of them are compared letter by letter
+
+from collections import defaultdict
+
+
+GRAM = 3   #letters per piece
+PAD = "$" * (GRAM - 1)   #marks the start and end of a word, so short words have pieces too
+
+
+def trigrams(word):
+    padded = f"{PAD}{word}{PAD}"
+    return {padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)}
+
+
+def edit_distance(a, b, limit=None):
+    # Time Complexity: O(len(a) * len(b)), O(len(a) * limit) with a limit
+
+    #Levenshtein distance, insertions, deletions and substitutions each cost 1
+    #with limit, only cells within limit of the diagonal are worked out and anything over it is limit + 1
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is None:
+        limit = len(a)
+    if len(a) - len(b) > limit:
+        return limit + 1
+    over = limit + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        if low == 1:
+            current[0] = i
+        ca = a[i - 1]
+        best = current[0] if low == 1 else over
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > limit:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+
+#trigram index of a set of words
+class TrigramIndex:
+    def __init__(self, words=()):
+        self._postings = defaultdict(set)   #trigram -> words containing it
+        self._by_length = defaultdict(set)   #length -> words, for queries too short to filter by trigrams
+        self._words = set()
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        return word in self._words
+
+    def add(self, word):
+        # Time Complexity: O(len(word))
+        if word in self._words:
+            return
+        self._words.add(word)
+        self._by_length[len(word)].add(word)
+        for gram in trigrams(word):
+            self._postings[gram].add(word)
+
+    def remove(self, word):
+        # Time Complexity: O(len(word))
+        if word not in self._words:
+            return
+        self._words.discard(word)
+        self._by_length[len(word)].discard(word)
+        for gram in trigrams(word):
+            words = self._postings.get(gram)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self._postings[gram]
+
+    def search(self, word, max_distance):
+        # Time Complexity: O(p + c * len(word) * max_distance)
+        # p = words sharing a trigram with word, c = candidates left after the trigram count
+
+        #[(distance, word)] for every indexed word within max_distance edits of word, closest first
+        #each edit changes at most GRAM of the query's trigrams, so a match shares at least
+        #len(trigrams(word)) - GRAM * max_distance of them
+        grams = trigrams(word)
+        needed = len(grams) - GRAM * max_distance
+        if needed > 0:
+            shared = defaultdict(int)
+            for gram in grams:
+                for other in self._postings.get(gram, ()):
+                    shared[other] += 1
+            candidates = [other for other, count in shared.items() if count >= needed]
+        else:
+            #too short for the trigram filter, compare with the words of a possible length instead
+            candidates = [other for length in range(max(0, len(word) - max_distance), len(word) + max_distance + 1)
+                          for other in self._by_length.get(length, ())]
+        found = []
+        for other in candidates:
+            if abs(len(other) - len(word)) > max_distance:
+                continue
+            distance = edit_distance(word, other, max_distance)
+            if distance <= max_distance:
+                found.append((distance, other))
+        found.sort()
+        return found
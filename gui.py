@@ -1,49 +1,199 @@
 from manager import RecipeManager, MealPlanner, ShoppingListGenerator, ShoppingListManager
 from recipe import Recipe, Ingredient
+from list_view import RecipeListModel
+from tasks import TaskRunner, TaskCancelled
+from autosave import AutosaveWriter
+from typeahead import TypeaheadSearch
+from date_index import parse_date
+from shopping_list import ShoppingList
 
-import json   #for saving and loading data
-import os   #for checking if files exist
 import tkinter as tk   
 from tkinter import simpledialog, messagebox, ttk
-from collections import defaultdict   #dictionary that makes defult values
-from itertools import combinations   # use for generating combinations of item
+
+
+SEARCH_DELAY_MS = 150   #wait this long after the last keystroke before searching
+COMBO_LIMIT = 100   #titles offered at once by a recipe dropdown, typing narrows them down
+SEARCH_LIMIT = 1000   #best matches the search box shows, a short prefix can match most of a large collection
+
+
+#a Listbox that only holds the rows on screen, the scrollbar moves a window over the RecipeListModel
+#so a list of 100k recipes costs the same to show and scroll as a list of ten
+class RecipeListView:
+    def __init__(self, parent, recipe_manager, height=10):
+        self.recipe_manager = recipe_manager
+        self.model = RecipeListModel(page_size=height)
+        self.frame = ttk.Frame(parent)
+        self.listbox = tk.Listbox(self.frame, height=height, exportselection=False)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.bind("<<ListboxSelect>>", self.on_select, add="+")
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-1))   #mouse wheel on X11
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(1))
+
+    def bind_select(self, callback):
+        self.listbox.bind("<<ListboxSelect>>", callback, add="+")
+
+    def selected_recipe(self):
+        # Time Complexity: O(1)
+        #the recipe of the selected row, found by its id and not by its position in the list
+        if self.model.selected_id is None:
+            return None
+        return self.recipe_manager.get_recipe_by_id(self.model.selected_id)
+
+    def show(self, recipes):
+        #replace every row, used when the whole collection is loaded again
+        self.model.reset(recipes)
+        self.render()
+
+    def render(self):
+        # Time Complexity: O(page size)
+        self.listbox.delete(0, tk.END)
+        for title in self.model.window():
+            self.listbox.insert(tk.END, title)
+        self._sync()
+
+    def apply(self, edits):
+        # Time Complexity: O(edits)
+        for edit in edits:
+            if edit[0] == "delete":
+                self.listbox.delete(edit[1])
+            else:
+                self.listbox.insert(edit[1], edit[2])
+        self.listbox.delete(self.model.page_size, tk.END)   #a row pushed below the window
+        self._sync()
+
+    def inserted(self, recipe):
+        self.apply(self.model.insert(recipe))
+
+    def removed(self, recipe_id):
+        self.apply(self.model.remove(recipe_id))
+
+    def renamed(self, recipe):
+        self.apply(self.model.rename(recipe))
+
+    def scroll(self, rows):
+        if self.model.scroll_to(self.model.first + rows):
+            self.render()
+        return "break"
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            moved = self.model.scroll_to(int(float(amount) * len(self.model)))
+        else:
+            step = self.model.page_size if unit == "pages" else 1
+            moved = self.model.scroll_to(self.model.first + int(amount) * step)
+        if moved:
+            self.render()
+
+    def on_select(self, event=None):
+        selected = self.listbox.curselection()
+        if selected:
+            self.model.selected_id = self.model.visible_id(selected[0])
+
+    def _sync(self):
+        #scrollbar and selection follow the window
+        self.scrollbar.set(*self.model.fractions())
+        self.listbox.selection_clear(0, tk.END)
+        position = self.model.selected_position()
+        if position is not None:
+            self.listbox.selection_set(position)
 
 class RecipeApp:
     def __init__(self, master):
         self.root=master   #main window
-        self.recipe_manager = RecipeManager()   #handles recies
-        self.meal_planner = MealPlanner(self.recipe_manager)   #planning
-        self.shopping_list_manager = ShoppingListManager()   #save list
+        #journal mode: each change is appended to a small log instead of rewriting the whole file
+        #lazy mode: only what the list needs is loaded, a recipe's details are read when it is opened
+        self.recipe_manager = RecipeManager(journal=True, lazy=True)   #handles recies
+        self.shopping_list_manager = ShoppingListManager(journal=True)   #save list
+        #planning, the planner keeps each day's shopping list up to date as meals are added
+        self.meal_planner = MealPlanner(self.recipe_manager, journal=True, shopping_lists=self.shopping_list_manager)
         self.shopper = ShoppingListGenerator(self.recipe_manager)   #generate new lists
         self.meal_planner.load_from_file(self.recipe_manager)   #load meal plan on start
+        self.tasks = TaskRunner()   #slow work runs on worker threads, results come back through poll_tasks
+        self._polling = False
+        #changed files are written by a background writer once the changes stop, not after every click
+        self.autosave = AutosaveWriter(delay=1.0)
+        self.track_stores()
+        self.typeahead = TypeaheadSearch(self.recipe_manager, limit=SEARCH_LIMIT)   #search box and recipe dropdowns
+        self._search_after = None
         
         self.setup_gui()   #build GUI layout
         self.refresh_recipe_list()   #update the list shown on screen
         self.root.protocol("WM_DELETE_WINDOW", self.close_application)   #window close
-        self.refresh_recipe_list()   #update recipe list UI
+        self.root.after(250, self.poll_autosave)
+
+    def track_stores(self):
+        self.autosave.track("recipes", self.recipe_manager, "recipes.json")
+        self.autosave.track("mealplan", self.meal_planner, "mealplan.json")
+        self.autosave.track("shoppinglist", self.shopping_list_manager, "shoppinglist.json")
+
+    def poll_autosave(self):
+        #snapshots are taken here on the Tk thread, the writer thread only does the file writing
+        self.autosave.poll()
+        self.root.after(250, self.poll_autosave)
         
 
 
     def load_data(self):
-        #load all saved data from files
-         self.recipe_manager.load_from_file()
-         self.meal_planner.load_from_file(self.recipe_manager)
-         self.shopping_list_manager.load_from_file()
-         self.update_recipe_list()
-         self.update_meal_plan_display()
-         self.update_shopping_list_display()
+        #load all saved data from files into new managers on a worker, then swap them in
+        #every change so far is written and the journals closed first, so the worker replays all of them
+         old_managers = (self.recipe_manager, self.shopping_list_manager, self.meal_planner)
+         self.autosave.flush()
+         for manager in old_managers:
+             if manager.journal is not None:
+                 manager.journal.close()
+         edited = []   #managers changed while the worker reads
+
+         def watch(manager):
+             #note an edit, and still tell the autosave writer about it
+             on_change = manager.on_change
+
+             def changed():
+                 edited.append(manager)
+                 if on_change is not None:
+                     on_change()
+             manager.on_change = changed
+
+         for manager in old_managers:
+             watch(manager)
+
+         def load(task):
+             recipe_manager = RecipeManager(journal=True, lazy=True)
+             shopping_list_manager = ShoppingListManager(journal=True)
+             meal_planner = MealPlanner(recipe_manager, journal=True, shopping_lists=shopping_list_manager)
+             meal_planner.load_from_file(recipe_manager)
+             return recipe_manager, shopping_list_manager, meal_planner
+
+         def loaded(managers):
+             if edited:
+                 #the edit may be missing from what the worker read, so drop that and read again
+                 for manager in managers:
+                     if manager.journal is not None:
+                         manager.journal.close()
+                 self.track_stores()
+                 self.load_data()
+                 return
+             self.recipe_manager, self.shopping_list_manager, self.meal_planner = managers
+             self.shopper = ShoppingListGenerator(self.recipe_manager)
+             self.recipe_list.recipe_manager = self.recipe_manager
+             self.typeahead = TypeaheadSearch(self.recipe_manager, limit=SEARCH_LIMIT)
+             self.track_stores()
+             self.refresh_recipe_list()
+
+         self.run_in_background("load", "Loading recipes...", load, loaded)
  
 
     def save_data(self):
-        #save all data to their files
-         self.recipe_manager.save_to_file()
-         self.meal_planner.save_to_file()
-         self.shopping_list_manager.save_to_file()
+        #write every changed file now and wait for the writes, files with no changes are skipped
+         self.autosave.flush()
  
 
     def close_application(self):
         #save everything before closing the window
-         self.save_data() 
+         self.tasks.shutdown(wait=False)
+         self.autosave.close()
          self.root.destroy()
      
 
@@ -54,10 +204,18 @@ class RecipeApp:
         self.main_frame = ttk.Frame(self.root)
         self.main_frame.pack()
 
-        #listbox for displaying recipe titles
-        self.recipe_listbox = tk.Listbox(self.main_frame, height=10)
-        self.recipe_listbox.bind("<<ListboxSelect>>", self.display_recipe)
-        self.recipe_listbox.grid(row=0, column=0, rowspan=8, padx=10)
+        #search box over the list, the list is filtered as the user types
+        self.list_frame = ttk.Frame(self.main_frame)
+        self.list_frame.grid(row=0, column=0, rowspan=8, padx=10)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(self.list_frame, textvariable=self.search_var)
+        search_entry.pack(fill=tk.X, pady=(0, 5))
+        search_entry.bind("<KeyRelease>", self.schedule_search)
+
+        #list of recipe titles, only the rows on screen are in the widget
+        self.recipe_list = RecipeListView(self.list_frame, self.recipe_manager, height=10)
+        self.recipe_list.bind_select(self.display_recipe)
+        self.recipe_list.frame.pack(fill=tk.BOTH, expand=True)
 
         
         #buttons for various actions
@@ -74,6 +232,48 @@ class RecipeApp:
         self.recipe_text = tk.Text(self.main_frame, width=70, height=25)
         self.recipe_text.grid(row=8, column=0, columnspan=2, pady=(10, 0))
 
+        #status bar for work running in the background
+        self.status_frame = ttk.Frame(self.main_frame)
+        self.status_frame.grid(row=9, column=0, columnspan=2, sticky="ew", pady=(5, 0))
+        self.status_label = ttk.Label(self.status_frame, text="")
+        self.status_label.pack(side=tk.LEFT)
+        self.cancel_button = ttk.Button(self.status_frame, text="Cancel", command=self.cancel_tasks, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.RIGHT)
+        self.progress_bar = ttk.Progressbar(self.status_frame, length=200, maximum=100)
+        self.progress_bar.pack(side=tk.RIGHT, padx=5)
+
+    def run_in_background(self, name, label, work, on_done):
+        #run work(task) on a worker thread and on_done(result) back on the Tk thread
+        #a newer request with the same name replaces this one, and its result is never shown
+        self.tasks.submit(name, work, on_done, on_error=self.task_failed, on_progress=self.show_progress)
+        self.status_label.config(text=label)
+        self.progress_bar.config(value=0)
+        self.cancel_button.config(state=tk.NORMAL)
+        if not self._polling:
+            self._polling = True
+            self.root.after(50, self.poll_tasks)
+
+    def poll_tasks(self):
+        #runs on the Tk thread, so results can update the widgets directly
+        if self.tasks.poll():
+            self.root.after(50, self.poll_tasks)
+            return
+        self._polling = False
+        self.status_label.config(text="")
+        self.progress_bar.config(value=0)
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def show_progress(self, done, total):
+        self.progress_bar.config(value=100 * done / total)
+
+    def task_failed(self, error):
+        if not isinstance(error, TaskCancelled):
+            messagebox.showerror("Error", str(error))
+
+    def cancel_tasks(self):
+        self.tasks.cancel_all()
+        self.status_label.config(text="Cancelled")
+
     def show_full_ingredients(self):
         #make sure there are recipes
         if not self.recipe_manager.recipes:
@@ -87,8 +287,8 @@ class RecipeApp:
         label = ttk.Label(selection_window, text="Enter a recipe name:")
         label.pack(pady=5)
 
-        #dropdown to choose a recipe
-        recipe_combo = ttk.Combobox(selection_window, values=[r.title for r in self.recipe_manager.recipes], state="readonly")
+        #dropdown to choose a recipe, typing narrows it down
+        recipe_combo = self.recipe_combobox(selection_window)
         recipe_combo.pack(pady=5)
 
         def show_ingredients():
@@ -98,7 +298,11 @@ class RecipeApp:
                 messagebox.showinfo("Selection", "Please select a recipe.")
                 return
             #get all ingredients including from sub-recipes
-            ingredients = self.recipe_manager.get_all_ingredients_recursive(title)
+            try:
+                ingredients = self.recipe_manager.get_all_ingredients_recursive(title)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e.args[0]))
+                return
             if not ingredients:
                 messagebox.showinfo("Result", "No ingredients found.")
             else:
@@ -117,12 +321,33 @@ class RecipeApp:
             if not target:
                 return
             target = int(target)
-            
-            #use RecipeManager to select cheapest combination of meals
-            recipes = self.recipe_manager.select_cheapest_meals(target)
-            if not recipes:
-                messagebox.showinfo("No Recipes", "No suitable recipes found.")
+            allow_repeats = messagebox.askyesno("Repeats", "Allow the same recipe more than once?")
+        except Exception as e:
+            #if something goes wrong, show the error
+            messagebox.showerror("Error", str(e))
+            return
+
+        #use RecipeManager to select cheapest combination of meals, on a worker so the window keeps responding
+        #the recipes and costs are read here on the Tk thread, the worker only searches that copy
+        #task.report stops the search when Cancel is pressed or a new optimisation is started
+        search = self.recipe_manager.prepare_cheapest_meals(target, allow_repeats, top_k=3)
+        self.run_in_background(
+            "optimise", f"Optimising meals for {target} servings...",
+            lambda task: search(task.report),
+            lambda options: self.show_optimised_meals(target, options))
+
+    def show_optimised_meals(self, target, options):
+        try:
+            if not options.found():
+                #tell the user the closest totals that can be made instead
+                message = f"No combination gives exactly {target} servings."
+                for label, nearest in (("Closest below", options.nearest_below), ("Closest above", options.nearest_above)):
+                    if nearest:
+                        servings, plan, cost = nearest
+                        message += f"\n\n{label}: {servings} servings for £{cost:.2f}\n" + ", ".join(r.title for r in plan)
+                messagebox.showinfo("No Recipes", message)
                 return
+            recipes = options.best()
 
             # count how many times each recipe was chosen
             from collections import Counter
@@ -144,8 +369,8 @@ class RecipeApp:
             for r in unique_recipes:
                 count = recipe_counts[r.title]
                 total_servings = r.servings * count
-                total_cost = r.total_recipe_cost * count
-                cost_per_serving = r.cost_per_serving()
+                total_cost = self.recipe_manager.recipe_cost(r) * count
+                cost_per_serving = self.recipe_manager.cost_per_serving(r)
 
                 total_combined_cost += total_cost
                 total_combined_servings += total_servings
@@ -157,6 +382,12 @@ class RecipeApp:
                 )
 
             message += f"📊 Combined Cost: £{total_combined_cost:.2f} for {total_combined_servings} servings"
+
+            #list the runner-up plans briefly
+            if len(options.plans) > 1:
+                message += "\n\nOther options:"
+                for plan, cost in options.plans[1:]:
+                    message += f"\n  • £{cost:.2f}: " + ", ".join(r.title for r in plan)
             messagebox.showinfo("Optimised Meals", message)
 
         except Exception as e:
@@ -166,13 +397,37 @@ class RecipeApp:
   
 
     def refresh_recipe_list(self):
-        #clear the listbox first
-        self.recipe_listbox.delete(0, tk.END)
-        seen=set()
-        for r in self.recipe_manager.recipes:
-            if r and r.title and r.title.lower() not in seen:
-                self.recipe_listbox.insert(tk.END, r.title)
-                seen.add(r.title.lower())
+        #show the whole collection (or what the search box matches) again, e.g. after loading
+        #single changes only update their own row while nothing is being searched for
+        self.recipe_list.show(self.typeahead.search(self.search_var.get()))
+
+    def schedule_search(self, event=None):
+        #debounce: only search once the user stops typing for SEARCH_DELAY_MS
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+        self._search_after = self.root.after(SEARCH_DELAY_MS, self.run_search)
+
+    def run_search(self):
+        self._search_after = None
+        self.refresh_recipe_list()
+
+    def recipe_combobox(self, parent):
+        #a dropdown of recipe titles that narrows down to the matching recipes as the user types
+        combo = ttk.Combobox(parent, values=[r.title for r in self.recipe_manager.recipes[:COMBO_LIMIT]])
+        pending = [None]
+
+        def narrow():
+            pending[0] = None
+            combo["values"] = [r.title for r in self.typeahead.search(combo.get())[:COMBO_LIMIT]]
+
+        def on_key(event):
+            if pending[0] is not None:
+                combo.after_cancel(pending[0])
+            pending[0] = combo.after(SEARCH_DELAY_MS, narrow)
+
+        combo.bind("<KeyRelease>", on_key)
+        return combo
+
     def add_recipe(self):
         #ask user for basic recipe details
         title = simpledialog.askstring("Title", "Recipe title:")
@@ -212,26 +467,28 @@ class RecipeApp:
         recipe.image_path = image_path
         recipe.total_recipe_cost = total_cost if total_cost else 0.0
 
-        #add recipe to manager and save
-        self.recipe_manager.add_recipe(recipe)
-        self.refresh_recipe_list()
-        self.recipe_manager.save_to_file()
+        #add recipe to manager, the autosave writes it
+        if self.recipe_manager.add_recipe(recipe):
+            if self.typeahead.normalize(self.search_var.get()):
+                self.refresh_recipe_list()   #only shown if it matches the search
+            else:
+                self.recipe_list.inserted(recipe)
 
 
         
         
     def display_recipe(self, event):
-        selected = self.recipe_listbox.curselection()
-        if not selected:
+        recipe = self.recipe_list.selected_recipe()
+        if recipe is None:
             return
-        index = selected[0]
-        recipe = self.recipe_manager.recipes[index]
         
         self.recipe_text.delete(1.0, tk.END)   #clear old text
         self.recipe_text.insert(tk.END, f"🍽️ {recipe.title}\n")
         self.recipe_text.insert(tk.END, f"(👩🏻‍💻{recipe.description})\n\n")
         self.recipe_text.insert(tk.END, f"Servings: {recipe.servings} | Cuisine: {recipe.cuisine} | Category: {recipe.category}\n")
-        self.recipe_text.insert(tk.END, f"💰 Total Cost: £{recipe.total_recipe_cost:.2f} | Cost per Serving: £{recipe.cost_per_serving():.2f}\n")
+        #the cost is worked out from ingredient prices and sub-recipes when they have them
+        cost = self.recipe_manager.recipe_cost(recipe)
+        self.recipe_text.insert(tk.END, f"💰 Total Cost: £{cost:.2f} | Cost per Serving: £{self.recipe_manager.cost_per_serving(recipe):.2f}\n")
 
         if recipe.rating is not None:
             self.recipe_text.insert(tk.END, f"⭐ Rating: {recipe.rating}/10\n")
@@ -266,9 +523,14 @@ class RecipeApp:
 
         #recipe dropdown
         ttk.Label(plan_window, text="Select a recipe:").pack(pady=5)
-        recipe_combo = ttk.Combobox(plan_window, values=[r.title for r in self.recipe_manager.recipes], state="readonly")
+        recipe_combo = self.recipe_combobox(plan_window)
         recipe_combo.pack(pady=5)
 
+        #servings to cook, left empty to use the recipe as written
+        ttk.Label(plan_window, text="Servings (optional):").pack(pady=5)
+        servings_entry = ttk.Entry(plan_window)
+        servings_entry.pack(pady=5)
+
         #when user confirms, add meal to planner
         def confirm_plan():
             date = date_entry.get()
@@ -276,18 +538,28 @@ class RecipeApp:
             if not date or not title:
                 messagebox.showinfo("Missing Info", "Please enter a date and select a recipe.")
                 return
-            recipe = next((r for r in self.recipe_manager.recipes if r.title == title), None)
+            servings = servings_entry.get().strip()
+            try:
+                servings = float(servings) if servings else None
+            except ValueError:
+                servings = 0
+            if servings is not None and servings <= 0:
+                messagebox.showerror("Plan Meal", "Servings must be a positive number.")
+                return
+            recipe = self.recipe_manager.get_recipe_by_title(title)
             if recipe:
-                self.meal_planner.add_meal(date, recipe)
-                self.meal_planner.save_to_file()
-                # Generate shopping list for this date using all planned meals
-                meals = self.meal_planner.get_meals_for_date(date)
-                items = self.shopper.generate_list(meals)
-                self.shopping_list_manager.save_list(date, items)
-                self.shopping_list_manager.save_to_file()
+                #adding the meal also adds its ingredients (scaled to the servings) to the shopping list for this date
+                try:
+                    self.meal_planner.add_meal(date, recipe, servings)
+                except ValueError:
+                    messagebox.showerror("Plan Meal", f"'{date}' is not a date, please use YYYY-MM-DD.")
+                    return
                 
                 messagebox.showinfo("Planned", f"Added {title} to {date}")
                 plan_window.destroy()
+            else:
+                #the dropdown can be typed in, so the title may not be a recipe
+                messagebox.showinfo("Plan Meal", f"No recipe called '{title}'.")
 
         ttk.Button(plan_window, text="Plan", command=confirm_plan).pack(pady=10)
 
@@ -295,7 +567,7 @@ class RecipeApp:
     def view_plan(self):
         #ask user to enter a date
         date = simpledialog.askstring("View Meal Plan", "Enter date (YYYY-MM-DD):")
-        meals = self.meal_planner.get_meals_for_date(date)
+        meals = self.meal_planner.get_recipes_for_date(date)
         if not meals:
             messagebox.showinfo("Meal Plan", "No meals planned.")
             return
@@ -304,11 +576,7 @@ class RecipeApp:
         self.recipe_text.delete(1.0, tk.END)
         self.recipe_text.insert(tk.END, f"📅 {date} Meal Plan\n\n")
 
-        for title in meals:
-            recipe = next((r for r in self.recipe_manager.recipes if r.title and r.title.lower() == title.lower()), None)
-            if not recipe:
-                continue
-            
+        for recipe in meals:
             self.recipe_text.insert(tk.END, f"📋 {recipe.title}\n")
             self.recipe_text.insert(tk.END, f"{recipe.description}\n")
             self.recipe_text.insert(tk.END, f"Servings: {recipe.servings} | Cuisine: {recipe.cuisine} | Category: {recipe.category}\n")
@@ -327,38 +595,77 @@ class RecipeApp:
                 self.recipe_text.insert(tk.END, f"\n🖼️ Image Path: {recipe.image_path}\n")
 
     def generate_shopping_list(self):
-        # ask user for the date
-        date = simpledialog.askstring("Shopping List", "Enter date (YYYY-MM-DD):")
-        titles = self.meal_planner.get_meals_for_date(date)
-        meals = [self.recipe_manager.get_recipe_by_title(title) for title in titles if self.recipe_manager.get_recipe_by_title(title)]
+        # ask user for the date, or a range of dates to combine their saved lists
+        date = simpledialog.askstring("Shopping List", "Enter date (YYYY-MM-DD) or range (YYYY-MM-DD to YYYY-MM-DD):")
+        if date and " to " in date:
+            #checked here on the Tk thread, the saved lists are keyed by ISO date so a bad or reversed range finds nothing
+            try:
+                start, end = (parse_date(part).isoformat() for part in date.split(" to ", 1))
+            except ValueError:
+                messagebox.showerror("Shopping List", f"'{date}' is not a range of dates, please use YYYY-MM-DD to YYYY-MM-DD.")
+                return
+            if end < start:
+                messagebox.showerror("Shopping List", f"The range ends on {end}, before it starts on {start}.")
+                return
+
+            def show_combined(combined):
+                if not combined:
+                    messagebox.showinfo("List", "No shopping lists saved in that range.")
+                    return
+                self.show_shopping_list(f"{start} to {end}", combined.items(), combined.total_cost)
+
+            #a long range merges many saved lists, so it is done on a worker
+            #on copies of the lines taken here, the Tk thread can change the saved lists (and their items) meanwhile
+            lists = self.shopping_list_manager.list_by_date
+            lines = [lists[day].to_dict() for day in self.shopping_list_manager.dates_between(start, end)]
+            self.run_in_background("shopping", f"Combining shopping lists {start} to {end}...",
+                                   lambda task: ShoppingList(item for items in lines for item in items), show_combined)
+            return
+        if not date:
+            return
+
+        #lists are saved under the ISO date, like the meal planner keeps them, so " 2025-05-10" is the same day
+        try:
+            date = parse_date(date).isoformat()
+        except ValueError:
+            messagebox.showerror("Shopping List", f"'{date}' is not a date, please use YYYY-MM-DD.")
+            return
+        meals = self.meal_planner.get_recipes_for_date(date)
 
         if not meals:
             messagebox.showinfo("List", "No meals planned.")
             return
 
-        # generate list from planned meals
-        items = self.shopper.generate_list(meals)
-        
-        # save list to manager
-        self.shopping_list_manager.save_list(date, items)
-        self.shopping_list_manager.save_to_file()
+        # generate list from planned meals on a worker, same ingredients are already added together
+        def show_items(items):
+            # save list to manager
+            self.shopping_list_manager.save_list(date, items)
+            self.show_shopping_list(date, items, sum(item.cost for item in items))
+
+        #the ingredients are copied here, so the worker never reads recipes (or ingredients) the Tk thread can edit
+        ingredient_lists = [[Ingredient(i.name, i.quantity, i.unit, i.cost_per_unit) for i in meal.ingredients if i]
+                            for meal in meals]
+        self.run_in_background("shopping", f"Making the shopping list for {date}...",
+                               lambda task: self.shopper.combine_ingredients(ingredient_lists), show_items)
 
-        # remove duplicates while keeping order
-        unique_items = list(dict.fromkeys(items))  
+    def show_shopping_list(self, label, items, total_cost):
+        lines = [item.display() for item in items]
 
         # show the list in the text area
         self.recipe_text.delete(1.0, tk.END)
-        self.recipe_text.insert(tk.END, f"🛒 Shopping List for {date}\n\n")
-        for item in unique_items:
-            self.recipe_text.insert(tk.END, f" - {item}\n")
+        self.recipe_text.insert(tk.END, f"🛒 Shopping List for {label}\n\n")
+        for line in lines:
+            self.recipe_text.insert(tk.END, f" - {line}\n")
+        if total_cost:
+            self.recipe_text.insert(tk.END, f"\nEstimated cost: {total_cost:.2f}\n")
 
         # Show the generated shopping list in a popup
-        if items:
+        if lines:
             list_window = tk.Toplevel(self.root)
-            list_window.title(f"Shopping List for {date}")
+            list_window.title(f"Shopping List for {label}")
             text_widget = tk.Text(list_window, width=60, height=20)
             text_widget.pack(padx=10, pady=10)
-            text_widget.insert("1.0", "\n".join(items))
+            text_widget.insert("1.0", "\n".join(lines))
         else:
             messagebox.showinfo("Info", "No items generated.")
 
@@ -367,14 +674,11 @@ class RecipeApp:
 
 
     def edit_recipe(self):
-        selected = self.recipe_listbox.curselection()
-        if not selected:
+        recipe = self.recipe_list.selected_recipe()
+        if recipe is None:
             messagebox.showinfo("Edit", "Select a recipe to edit.")
             return
 
-        index = selected[0]
-        recipe = self.recipe_manager.recipes[index]
-
         #ask for updated values with current values as default
         title = simpledialog.askstring("Title", "Recipe title:", initialvalue=recipe.title)
         desc = simpledialog.askstring("Description", "Description:", initialvalue=recipe.description)
@@ -387,51 +691,58 @@ class RecipeApp:
 
         
         #if editing ingredients, clear and re-enter
+        ingredients = recipe.ingredients
         if messagebox.askyesno("Ingredients", "Do you want to edit ingredients? This will reset them."):
-            recipe.ingredients = []
+            ingredients = []
             while messagebox.askyesno("Ingredient", "Add ingredient?"):
                 name = simpledialog.askstring("Ingredient", "Name:")
                 qty_str = simpledialog.askstring("Ingredient", "Quantity:")
                 qty = float(qty_str) if qty_str else 0.0
                 unit = simpledialog.askstring("Ingredient", "Unit:")
-                recipe.add_ingredient(Ingredient(name, qty, unit)) 
+                ingredients.append(Ingredient(name, qty, unit))
 
 
 
+        steps = recipe.steps
         if messagebox.askyesno("Steps", "Do you want to edit steps? This will reset them."):
-            recipe.steps = []
+            steps = []
             while messagebox.askyesno("Step", "Add step?"):
                 step = simpledialog.askstring("Step", "Description:")
-                recipe.add_step(step)
-
-        #update the recipe attributes with new values
-        recipe.title = title
-        recipe.description = desc
-        recipe.servings = servings
-        recipe.cuisine = cuisine
-        recipe.category = category
-        recipe.rating = rating
-        recipe.notes = notes
-        recipe.image_path = image_path
+                steps.append(step)
+
         cost = simpledialog.askfloat("Total Cost", "Enter total cost of the recipe:", initialvalue=recipe.total_recipe_cost)
-        recipe.total_recipe_cost = cost if cost else 0.0
 
-        # replace recipe in all planned meals with the updated one
-        for date, recipes in self.meal_planner.planned_meals.items():
-            for i, r in enumerate(recipes):
-                if r.title.lower() == recipe.title.lower():
-                    self.meal_planner.planned_meals[date][i] = recipe
+        #update the recipe through the manager so its title index follows a rename
+        updated = self.recipe_manager.update_recipe(
+            recipe,
+            title=title,
+            description=desc,
+            servings=servings,
+            cuisine=cuisine,
+            category=category,
+            rating=rating,
+            notes=notes,
+            image_path=image_path,
+            ingredients=ingredients,
+            steps=steps,
+            total_recipe_cost=cost if cost else 0.0,
+        )
+        if not updated:
+            messagebox.showerror("Edit", f"A recipe called '{title}' already exists.")
+            return
 
-        self.refresh_recipe_list()
+        if self.typeahead.normalize(self.search_var.get()):
+            self.refresh_recipe_list()   #the edit can change whether it matches the search
+        else:
+            self.recipe_list.renamed(recipe)   #nothing to redraw unless the title changed
         messagebox.showinfo("Updated", "Recipe updated successfully.")
         
         
     def on_close(self):
         print("Attempting to save and close...")
+        self.tasks.shutdown(wait=False)   #running work is cancelled, its results are not needed any more
         try:
-            self.recipe_manager.save_to_file()
-            self.meal_planner.save_to_file()
-            self.shopping_list_manager.save_to_file()
+            self.autosave.close()   #writes the stores with unsaved changes and waits for every write
             print("Files saved successfully.")
         except Exception as e:
             print(f"Error saving data: {e}")
@@ -0,0 +1,120 @@
+import json   #for saving and loading data
+import os   #for checking if files exist
+import threading
+
+
+def write_json_atomic(filename, data):
+    #write to a temp file first and rename it over the old one, so a crash never leaves half a file
+    tmp_name = f"{filename}.tmp"
+    with open(tmp_name, "w") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_name, filename)
+
+
+#append-only log of changes made since the last full save of a JSON file
+#records are whole-entry upserts, so replaying one twice gives the same result
+class Journal:
+    def __init__(self, snapshot_path, compact_every=500):
+        self.snapshot_path = snapshot_path   #the normal JSON file, e.g. recipes.json
+        self.path = f"{snapshot_path}.journal"   #changes since the snapshot
+        self.compacting_path = f"{snapshot_path}.journal.compacting"   #changes being folded into a new snapshot
+        self.compact_every = compact_every   #records before save_to_file rewrites the snapshot
+        self.pending = 0   #records written since the last compaction
+        self._file = None
+        self._worker = None
+
+    def replay(self):
+        # Time Complexity: O(j)
+        # j = number of journal records
+
+        #yield every record left from an unfinished compaction and then the live journal
+        self.pending = 0
+        for path in (self.compacting_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "r") as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        #a crash mid-write can only damage the last line, skip it
+                        print(f"Skipping damaged journal record {line_number} in {path}.")
+                        continue
+                    self.pending += 1
+                    yield record
+
+    def open(self):
+        #the journal file is only created once there is something to write
+        if self._file is None:
+            self._file = open(self.path, "a")
+
+    def close(self):
+        self.wait()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, record):
+        # Time Complexity: O(size of the record)
+
+        #write one change as a JSON line and make sure it reaches the disk
+        self.open()
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.pending += 1
+
+    def needs_compaction(self):
+        return self.pending >= self.compact_every
+
+    def compacting(self):
+        return self._worker is not None and self._worker.is_alive()
+
+    def wait(self):
+        #block until a background compaction has finished
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def compact(self, snapshot_data, background=True):
+        # Time Complexity: O(n) in the background thread
+        # n = size of the snapshot
+
+        #fold the journal into a new snapshot: move the live journal aside, start a fresh one,
+        #then write the snapshot and delete the old journal (in a background thread by default)
+        if self.compacting():
+            if background:
+                return False   #one compaction at a time, try again on a later save
+            self.wait()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.path):
+            if os.path.exists(self.compacting_path):
+                #an interrupted compaction is still waiting, add the live journal to it
+                with open(self.path, "r") as src, open(self.compacting_path, "a") as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.compacting_path)
+        self.pending = 0
+
+        def write_snapshot():
+            try:
+                write_json_atomic(self.snapshot_path, snapshot_data)
+                if os.path.exists(self.compacting_path):
+                    os.remove(self.compacting_path)
+            except OSError as e:
+                #the journal is kept, so nothing is lost and the next start replays it
+                print(f"Error compacting {self.snapshot_path}: {e}")
+
+        if background:
+            self._worker = threading.Thread(target=write_snapshot, name=f"compact {self.snapshot_path}")
+            self._worker.start()
+        else:
+            write_snapshot()
+        return True
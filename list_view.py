@@ -0,0 +1,124 @@
+#what the recipe list in the GUI shows, kept apart from tkinter so it can be tested headless
+#the list widget only ever holds the visible window of rows, scrolling swaps which rows those are
+#and adding, removing or renaming a recipe changes at most a couple of them
+
+
+#rows of the recipe list: row number -> recipe id, and the window of rows on screen
+class RecipeListModel:
+    def __init__(self, page_size=10):
+        self.page_size = page_size   #rows the widget can show at once
+        self.first = 0   #row shown at the top of the widget
+        self.selected_id = None   #recipe id of the selected row, kept while it is scrolled out of view
+        self.reset([])
+
+    def reset(self, recipes):
+        # Time Complexity: O(n)
+        #show these recipes, in this order, from the top again
+        self.ids = []   #row -> recipe id
+        self.titles = {}   #recipe id -> title shown
+        self._row_of = {}   #recipe id -> row
+        for recipe in recipes:
+            if recipe and recipe.title and recipe.recipe_id not in self._row_of:
+                self._row_of[recipe.recipe_id] = len(self.ids)
+                self.ids.append(recipe.recipe_id)
+                self.titles[recipe.recipe_id] = recipe.title
+        self.first = 0
+        if self.selected_id not in self._row_of:
+            self.selected_id = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, recipe_id):
+        return recipe_id in self._row_of
+
+    def row_of(self, recipe_id):
+        # Time Complexity: O(1)
+        return self._row_of.get(recipe_id)
+
+    def recipe_id_at(self, row):
+        #the recipe id shown in a row, None outside the list
+        return self.ids[row] if 0 <= row < len(self.ids) else None
+
+    def visible_id(self, position):
+        #the recipe id at a position of the widget, 0 is its top row
+        return self.recipe_id_at(self.first + position) if 0 <= position < self.page_size else None
+
+    def window(self):
+        # Time Complexity: O(page size)
+        #titles of the rows on screen, top to bottom
+        return [self.titles[recipe_id] for recipe_id in self.ids[self.first:self.first + self.page_size]]
+
+    def selected_position(self):
+        #where the selected recipe is in the widget, None when it is scrolled out of view
+        row = self._row_of.get(self.selected_id)
+        if row is None or not self.first <= row < self.first + self.page_size:
+            return None
+        return row - self.first
+
+    def fractions(self):
+        #(top, bottom) of the window as parts of the whole list, what a scrollbar's set() takes
+        if not self.ids:
+            return 0.0, 1.0
+        return self.first / len(self.ids), min(1.0, (self.first + self.page_size) / len(self.ids))
+
+    def scroll_to(self, first):
+        # Time Complexity: O(1)
+        #move the window so row first is at the top, return True if it moved
+        first = max(0, min(first, len(self.ids) - self.page_size))
+        if first == self.first:
+            return False
+        self.first = first
+        return True
+
+    #the changes below return the edits that bring the widget in step with them:
+    #("delete", position) or ("insert", position, title), applied in order
+    #rows that are not on screen need no edit
+
+    def insert(self, recipe):
+        # Time Complexity: O(1)
+        #a new recipe goes at the end, like in RecipeManager.recipes
+        if not recipe or not recipe.title or recipe.recipe_id in self._row_of:
+            return []
+        row = len(self.ids)
+        self._row_of[recipe.recipe_id] = row
+        self.ids.append(recipe.recipe_id)
+        self.titles[recipe.recipe_id] = recipe.title
+        if row < self.first + self.page_size:
+            return [("insert", row - self.first, recipe.title)]
+        return []
+
+    def remove(self, recipe_id):
+        # Time Complexity: O(n - row) to renumber the rows below it
+        row = self._row_of.pop(recipe_id, None)
+        if row is None:
+            return []
+        del self.ids[row]
+        del self.titles[recipe_id]
+        for below in range(row, len(self.ids)):
+            self._row_of[self.ids[below]] = below
+        if recipe_id == self.selected_id:
+            self.selected_id = None
+        if row < self.first:
+            self.first -= 1   #the rows on screen are the same ones, only their numbers moved
+            return []
+        if row >= self.first + self.page_size:
+            return []
+        edits = [("delete", row - self.first)]
+        bottom = self.first + self.page_size - 1
+        if bottom < len(self.ids):
+            edits.append(("insert", self.page_size - 1, self.titles[self.ids[bottom]]))   #the next row moves up into view
+        elif self.first > 0:
+            self.first -= 1   #at the end of the list, show one more row from above instead
+            edits.append(("insert", 0, self.titles[self.ids[self.first]]))
+        return edits
+
+    def rename(self, recipe):
+        # Time Complexity: O(1)
+        row = self._row_of.get(recipe.recipe_id)
+        if row is None or self.titles[recipe.recipe_id] == recipe.title:
+            return []
+        self.titles[recipe.recipe_id] = recipe.title
+        if not self.first <= row < self.first + self.page_size:
+            return []
+        return [("delete", row - self.first), ("insert", row - self.first, recipe.title)]
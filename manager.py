@@ -1,199 +1,593 @@
 
 import json   #for saving and loading data
 import os   #for checking if files exist
-import tkinter as tk   
-from tkinter import simpledialog, messagebox, ttk
-from collections import defaultdict   #dictionary that makes defult values
-from itertools import combinations   # use for generating combinations of item
-from recipe import Recipe, Ingredient
+import datetime
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, Counter   #dictionary that makes defult values
+from contextlib import nullcontext
+from recipe import Recipe, Ingredient, LazyRecipe, ScaledRecipe, lazy_recipes_from_json, SUMMARY_FIELDS
+from search_index import SearchIndex
+from facet_index import FacetIndex
+from optimiser import cheapest_meals
+from dependency_graph import RecipeGraph, name_key
+from journal import Journal
+from shopping_list import ShoppingList
+from date_index import DateIndex, parse_date, week_bounds, month_bounds
+from feed import ImportReport, recipe_problem
+from pantry import PantryMatcher
+
+
+MEAL_TYPES = (Recipe, ScaledRecipe)   #what a resolved planned meal can be
+
+
+#recipe attributes copied across when a journal record replaces a recipe
+RECIPE_FIELDS = ("title", "description", "servings", "cuisine", "category", "ingredients",
+                 "steps", "rating", "notes", "image_path", "total_recipe_cost")
+
+
+def _stored_recipe(storage, summary):
+    #loader for a LazyRecipe kept in a storage backend, by id so a recipe renamed before it is opened is still found
+    #recipes stored before they had ids are looked up by title
+    if summary.get("id") is not None:
+        return lambda: storage.get_recipe_by_id(summary["id"])
+    return lambda: storage.get_recipe(summary["title"])
+
+
+#saving shared by the managers, each one has self.filename, self.storage, self.journal and self.dirty
+#and gives its data as to_dict()
+class JsonSaveMixin:
+    def _compact_journal(self):
+        #write a whole snapshot instead of a journal line per change, e.g. after a bulk change
+        #a compaction still running is waited for first, compact() would otherwise skip this one and lose the change
+        self.journal.wait()
+        self.journal.compact(self.to_dict())
+
+    def _nothing_to_write(self, filename):
+        #True when filename needs no writing, a storage backend or the journal already has every change
+        #in journal mode the journal is compacted once it is long
+        if self.storage is not None:
+            return True
+        if self.journal is not None and filename == self.journal.snapshot_path:
+            if self.journal.needs_compaction():
+                self.journal.compact(self.to_dict())
+            return True
+        return False
+
+    def snapshot(self, filename=None):
+        #(filename, data) for a background writer such as AutosaveWriter to save, or None when nothing needs writing
+        filename = filename or self.filename
+        self.dirty = False
+        if self._nothing_to_write(filename):
+            return None
+        return filename, self.to_dict()
+
+    def save_to_file(self, filename=None):
+        # Time Complexity: O(n), or O(1) in journal mode between compactions
+        # n = number of items saved/loaded
+        filename = filename or self.filename
+        self.dirty = False
+        if self._nothing_to_write(filename):
+            return
+
+        #the data is made before the file is opened, lazy recipes not opened yet are still read from it
+        data = self.to_dict()
+        try:
+             with open(filename, "w") as f:
+                 json.dump(data, f, indent=4) # Use indent for readability
+        except IOError as e:
+            print(f"Error saving to {filename}: {e}")
 
 
 #class to manage all recipes
-class RecipeManager:
-    def __init__(self):
+class RecipeManager(JsonSaveMixin):
+    def __init__(self, journal=False, storage=None, lazy=False, filename="recipes.json"):
         self.recipes = []   #list to store all Recipe objects
+        self.filename = filename   #the JSON file loaded and saved when no other file is given
+        self.use_journal = journal   #append changes to a journal instead of rewriting the file each save
+        self.journal = None
+        self.storage = storage   #optional backend from storage.py, used instead of the JSON file
+        self.lazy = lazy   #load only recipe summaries, ingredients and steps are read on first use
+        self._title_index = {}   #lowercase title -> Recipe for O(1) lookups
+        self._id_index = {}   #recipe_id -> Recipe, ids never change once given
+        self._next_id = 1   #the id the next new recipe gets, saved with the recipes so ids are never given out twice
+        self._search_index = SearchIndex()   #title and ingredient tokens -> recipes
+        self._facet_index = FacetIndex()   #cuisine, category and rating -> recipes
+        self._graph = RecipeGraph(self._loaded_recipe)   #sub-recipe links and flattened ingredients
+        self._pantry = PantryMatcher()   #ingredient bitsets for what_can_i_cook, refreshed when recipes change
+        self._ingredient_indexes_ready = False   #search index and graph need ingredients, lazy mode builds them on demand
+        self._listeners = []   #functions called as listener(recipe, old_title, old_ingredients) after an edit
+        self.dirty = False   #changed since the file was last written
+        self.on_change = None   #called with no arguments after every change, e.g. by AutosaveWriter
+        self.generation = 0   #goes up on every change, so cached search results know they are stale
         self.load_from_file()   #load recipes from file when startin
+
+    @staticmethod
+    def _title_key(title):
+        #titles are matched ignoring capital letters
+        return title.lower() if title else None
+
+    def _rebuild_index(self):
+        # Time Complexity: O(n)
+        #rebuild the title index from the recipe list, the first title wins
+        #untitled and duplicate recipes are kept (and saved) but only found by title once they are renamed
+        self._title_index = {}
+        self._id_index = {}
+        for r in self.recipes:
+            key = self._title_key(r.title)
+            if key is None:
+                print("Warning: a recipe has no title, give it one to use it")
+            elif key in self._title_index:
+                print(f"Warning: more than one recipe is titled '{r.title}', rename the others to use them")
+            else:
+                self._title_index[key] = r
+        #keep the saved ids, recipes from older files (or with a clashing id) get new ones
+        #the next id never goes below the saved one, so the id of a deleted recipe is not given to a new one
+        self._next_id = max([self._next_id] + [r.recipe_id + 1 for r in self.recipes if isinstance(r.recipe_id, int)])
+        for r in self.recipes:
+            if not isinstance(r.recipe_id, int) or r.recipe_id in self._id_index:
+                r.recipe_id = self._new_id()
+            self._id_index[r.recipe_id] = r
+        self._facet_index.build(self.recipes)
+        self._ingredient_indexes_ready = False
+        self.generation += 1
+        if not self.lazy:
+            self._ensure_ingredient_indexes()
+
+    def _titled_recipes(self):
+        #the recipes found by title, untitled and duplicate ones are left out until they are renamed
+        if len(self._title_index) == len(self.recipes):
+            return self.recipes
+        return [r for r in self.recipes if self._title_index.get(self._title_key(r.title)) is r]
+
+    def _new_id(self):
+        recipe_id = self._next_id
+        self._next_id += 1
+        return recipe_id
+
+    def _claim_id(self, recipe):
+        #keep a recipe's own id if it is free, otherwise give it a new one
+        if not isinstance(recipe.recipe_id, int) or recipe.recipe_id in self._id_index:
+            recipe.recipe_id = self._new_id()
+        else:
+            self._next_id = max(self._next_id, recipe.recipe_id + 1)
+
+    def _ensure_ingredient_indexes(self):
+        # Time Complexity: O(n * m) the first time, O(1) after
+        #the search index and sub-recipe graph need every recipe's ingredient names, so in lazy mode
+        #they are only built when a search or recursive expansion first needs them
+        #only the names are read for that, lazy recipes stay unopened (a storage backend reads them in one query)
+        #the graph flattens and costs a recipe and its sub-recipes when one of them is asked for
+        if not self._ingredient_indexes_ready:
+            names = None
+            if self.lazy and self.storage is not None:
+                stored = self.storage.ingredient_names()
+                names = lambda r: stored[r.recipe_id] if r.recipe_id in stored else r.ingredient_names()
+            self._search_index.build(self.recipes, names)
+            self._graph.build(self._titled_recipes(), names)
+            self._ingredient_indexes_ready = True
+
+    def _changed(self):
+        self.dirty = True
+        self.generation += 1
+        if self.on_change is not None:
+            self.on_change()
+
+    def _log(self, record):
+        #write a change to the storage backend, or to the journal when journal mode is on
+        self._changed()
+        if self.storage is not None:
+            if record["op"] == "put":
+                self.storage.put_recipe(record["recipe"], record.get("old_title"))
+            else:
+                self.storage.delete_recipe(record["title"])
+        elif self.journal is not None:
+            self.journal.append(record)
+
+    def _apply_record(self, record):
+        #replay one journal record, each one replaces or deletes a whole recipe
+        if record.get("op") == "put":
+            data = record["recipe"]
+            old_title = record.get("old_title") or data["title"]
+            existing = self._id_index.get(data.get("id"))   #by id first, a renamed duplicate shares its old title
+            if existing is None or self._title_key(existing.title) != self._title_key(old_title):
+                existing = self.get_recipe_by_title(old_title) or self.get_recipe_by_title(data["title"])
+            fresh = Recipe.from_dict(data)
+            if existing is None:
+                self.add_recipe(fresh)
+            else:
+                self.update_recipe(existing, **{field: getattr(fresh, field) for field in RECIPE_FIELDS})
+        elif record.get("op") == "delete":
+            self.remove_recipe(record["title"])
         
     def to_dict(self):
-        #convert all recipes into a list of dictionaries for saving
-        recipe_dicts = []
-        for r in self.recipes:
-            recipe_data = {
-                "title": r.title,
-                "description": r.description,
-                "servings": r.servings,
-                "cuisine": r.cuisine,
-                "category": r.category,
-                "ingredients": [
-                        {"name": i.name, "quantity": i.quantity, "unit": i.unit, "cost_per_unit": i.cost_per_unit} for i in r.ingredients
-                    ],
-                "steps": r.steps,
-                "total_cost": r.total_recipe_cost
-
-            }
-            if r.rating is not None:
-                recipe_data["rating"] = r.rating
-            if r.notes:
-                recipe_data["notes"] = r.notes
-            if r.image_path:
-                recipe_data["image_path"] = r.image_path
-            recipe_dicts.append(recipe_data)
-        return recipe_dicts   #return list of recipe dictionaries
+        #convert all recipes into a list of dictionaries for saving, with the id the next new recipe gets
+        return {"next_id": self._next_id, "recipes": [r.to_dict() for r in self.recipes]}
 
 
    
     def from_dict(self, data):
         #create recipe objects from loaded dictionary data
-        self.recipes = [Recipe.from_dict(item) for item in data]     
+        #files written before the next id was saved hold only the list of recipes
+        if isinstance(data, dict):
+            self._next_id = data.get("next_id", 1)
+            data = data.get("recipes", [])
+        else:
+            self._next_id = 1
+        self.recipes = [Recipe.from_dict(item) for item in data]
+        self._rebuild_index()
 
-    def save_to_file(self, filename="recipes.json"):
+    def load_from_file(self, filename=None):
         # Time Complexity: O(n)
         # n = number of items saved/loaded
 
-        # save all recipes to a JSON file
-        try:
-             with open(filename, "w") as f:
-                 json.dump(self.to_dict(), f, indent=4) # Use indent for readability
-        except IOError as e:
-            print(f"Error saving to {filename}: {e}")
-
-    def load_from_file(self, filename="recipes.json"):
-        # Time Complexity: O(n)
-        # n = number of items saved/loaded
+        filename = filename or self.filename
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+        if self.storage is not None:
+            if self.lazy:
+                storage = self.storage
+                self.recipes = [LazyRecipe(summary, _stored_recipe(storage, summary))
+                                for summary in storage.load_recipe_summaries()]
+                self._next_id = storage.next_recipe_id()
+                self._rebuild_index()
+            else:
+                self.from_dict({"next_id": self.storage.next_recipe_id(), "recipes": self.storage.load_recipes()})
+            return
 
-        
         #load recipes from a JSON file if it exists and is not empty
         try:
             with open(filename, "r") as f:
                 if os.path.getsize(filename) > 0:   #the files cannot be empty
-                     data = json.load(f)
-                     self.from_dict(data)
+                     if self.lazy:
+                         self.recipes, self._next_id = lazy_recipes_from_json(filename)
+                         self._rebuild_index()
+                     else:
+                         data = json.load(f)
+                         recipes = data.get("recipes") if isinstance(data, dict) else data
+                         if not isinstance(recipes, list) or not all(isinstance(r, dict) for r in recipes):
+                             raise json.JSONDecodeError("Expecting a list of recipes", "", 0)   #reported like a damaged file
+                         self.from_dict(data)
                 else:
-                     self.recipes = []   #empty files no recipes
+                     self.from_dict([])   #empty files no recipes
         except FileNotFoundError:
-             self.recipes = []   #ifnno file exist , start with empty list
+             self.from_dict([])   #ifnno file exist , start with empty list
         except json.JSONDecodeError:
              print(f"Error decoding JSON from {filename}. The file may be corrupted or empty.")
-             self.recipes = []
+             self.from_dict([])
+
+        #then apply the changes made since that file was written
+        #listeners already saw these edits when they were first made, so they are not told again
+        if self.use_journal:
+            journal = Journal(filename)
+            listeners, self._listeners = self._listeners, []
+            for record in journal.replay():
+                self._apply_record(record)
+            self._listeners = listeners
+            self.journal = journal
+
+    def add_listener(self, listener):
+        #call listener(recipe, old_title, old_ingredients) after every update_recipe
+        #old_ingredients is None when the ingredient list was not replaced
+        self._listeners.append(listener)
         
 
+    def _insert(self, recipe):
+        #put a recipe into the list and the indexes, the caller has checked the title is free
+        self._claim_id(recipe)
+        self._id_index[recipe.recipe_id] = recipe
+        self._title_index[self._title_key(recipe.title)] = recipe
+        self.recipes.append(recipe)
+        self._facet_index.add(recipe)
+        if self._ingredient_indexes_ready:
+            self._search_index.add(recipe)
+            self._graph.add(recipe)
+
     def add_recipe(self, recipe):
+        # Time Complexity: O(1)
         #add new recipe by title only if it is not already exist in the list
-        if not any(isinstance(r, Recipe) and r.title and r.title.lower() == recipe.title.lower() for r in self.recipes):
-            self.recipes.append(recipe)
+        key = self._title_key(recipe.title)
+        if key is None or key in self._title_index:
+            return False
+        self._insert(recipe)
+        self._log({"op": "put", "recipe": recipe.to_dict()})
+        return True
+
+    def add_recipes(self, items, save=True):
+        # Time Complexity: O(N * m)
+        # N = rows in the batch, m = ingredients per row
+
+        #add many recipes in one pass and return an ImportReport
+        #items can be Recipe objects, recipe dictionaries or the (row, dictionary) pairs of feed.read_json_lines
+        #bad rows and titles already stored or seen earlier in the batch are rejected, not added
+        #save=False leaves writing the JSON file to the caller, e.g. once after several batches
+        report = ImportReport()
+        if self._ingredient_indexes_ready:
+            #rebuilt once on the next search instead of re-sorting the vocabulary for every row
+            self._ingredient_indexes_ready = False
+            self._search_index.clear()
+            self._graph.clear()
+        lazy_store = self.storage if self.lazy and self.storage is not None else None
+        batch = self.storage.batch() if self.storage is not None else nullcontext()
+        with batch:
+            for row, item in enumerate(items, 1):
+                if isinstance(item, tuple):
+                    row, item = item
+                if isinstance(item, Exception):
+                    report.reject(row, str(item))
+                    continue
+                if isinstance(item, Recipe):
+                    problem = None if self._title_key(item.title) else "missing title"
+                else:
+                    problem = recipe_problem(item)
+                if problem is not None:
+                    report.reject(row, problem)
+                    continue
+                recipe = item if isinstance(item, Recipe) else Recipe.from_dict(item)
+                if self._title_key(recipe.title) in self._title_index:
+                    report.reject(row, "duplicate title")
+                    continue
+                if self.storage is not None:
+                    self._claim_id(recipe)
+                    data = recipe.to_dict()
+                    self.storage.put_recipe(data)
+                    if lazy_store is not None:
+                        #keep only the summary in memory, the store has the rest
+                        summary = {field: data[field] for field in SUMMARY_FIELDS if field in data}
+                        recipe = LazyRecipe(summary, _stored_recipe(lazy_store, summary))
+                self._insert(recipe)
+                report.added += 1
+        #a storage backend has every row already, journal mode writes one snapshot instead of a line per row
+        if report.added:
+            self._changed()
+        if report.added and self.journal is not None:
+            self._compact_journal()
+        elif report.added and save and self.storage is None:
+            self.save_to_file()
+        return report
 
     def remove_recipe(self, recipe_title):
+        # Time Complexity: O(1) lookup, list removal shifts the remaining items
         #remove recipe by title (ignore capital letter or not)
-        self.recipes = [r for r in self.recipes if r.title.lower() != recipe_title.lower()]
-
-    def search_recipes(self, query):
-        #search recipes by title or igredient name
-        query = query.lower()
-        results = []
-        for recipe in self.recipes:
-            if query in recipe.title.lower():
-                results.append(recipe)
-            elif any(query in ing.name.lower() for ing in recipe.ingredients):
-                results.append(recipe)
-        return results
-
-    def filter_recipes(self, cuisine=None, category=None, rating=None):
+        recipe = self._title_index.pop(self._title_key(recipe_title), None)
+        if recipe is None:
+            return None
+        self._id_index.pop(recipe.recipe_id, None)
+        self.recipes.remove(recipe)
+        self._facet_index.remove(recipe)
+        if self._ingredient_indexes_ready:
+            self._search_index.remove(recipe)
+            self._graph.remove(recipe.title)
+        if len(self._title_index) < len(self.recipes):
+            self._promote(recipe.title)   #a recipe kept under the same title takes its place
+        self._log({"op": "delete", "title": recipe.title})
+        return recipe
+
+    def _promote(self, title):
         # Time Complexity: O(n)
-        # n = number of recipes
+        #index the first kept duplicate of a title once the recipe found by it is gone
+        key = self._title_key(title)
+        for r in self.recipes:
+            if self._title_key(r.title) == key:
+                self._title_index[key] = r
+                if self._ingredient_indexes_ready:
+                    self._graph.add(r)
+                return
+
+    def update_recipe(self, recipe, **changes):
+        # Time Complexity: O(k)
+        # k = number of title and ingredient tokens in the recipe
+        #apply edits to a stored recipe and keep the indexes in step with them
+        old_title = recipe.title
+        old_key = self._title_key(old_title)
+        indexed = self._title_index.get(old_key) is recipe   #untitled and duplicate recipes are not
+        new_key = self._title_key(changes.get("title", recipe.title))
+        if new_key is None:
+            return False   #a recipe always needs a title
+        if new_key != old_key and new_key in self._title_index:
+            return False   #renaming onto another recipe's title is not allowed
+        old_ingredients = None
+        if self._listeners and "ingredients" in changes and changes["ingredients"] is not recipe.ingredients:
+            old_ingredients = recipe.ingredients
+        for attr, value in changes.items():
+            setattr(recipe, attr, value)
+        if new_key != old_key:
+            if indexed:
+                self._title_index.pop(old_key)
+            self._title_index[new_key] = recipe
+        self._facet_index.add(recipe)
+        if self._ingredient_indexes_ready:
+            self._search_index.add(recipe)
+            if indexed:
+                self._graph.remove(old_key)   #only recipes that use this one lose their memo
+            if self._title_index.get(new_key) is recipe:
+                self._graph.add(recipe)
+        self._log({"op": "put", "old_title": old_title, "recipe": recipe.to_dict()})
+        if new_key != old_key or old_ingredients is not None:
+            for listener in self._listeners:
+                listener(recipe, old_title, old_ingredients)
+        return True
+
+    def search_recipes(self, query, limit=None):
+        # Time Complexity: O(q * p + r log r), O(q * p + r log limit) with a limit
+        # q = words in the query, p = posting list size, r = number of results
+
+        #search recipes by title or igredient name through the token index
+        #every word has to match, the last one as a word prefix, title matches are ranked first
+        #when nothing matches, words a few typos away are tried instead, see fuzzy_search_recipes
+        #limit keeps only the best matches, e.g. for a search box that shows the first screenful
+        if not query or not query.strip():
+            return self.recipes[:limit]
+        self._ensure_ingredient_indexes()
+        return self._search_index.search(query, limit) or self._search_index.fuzzy_search(query, limit=limit)
+
+    def fuzzy_search_recipes(self, query, max_distance=None, limit=None):
+        # Time Complexity: O(q * (trigram lookup + p) + r log r)
+
+        #recipes whose title or ingredient words are each within max_distance edits of the query's words
+        #without a max_distance it depends on the word's length, see SearchIndex.similar_tokens
+        self._ensure_ingredient_indexes()
+        return self._search_index.fuzzy_search(query, max_distance, limit)
+
+    def refine_search(self, query, recipes):
+        # Time Complexity: O(r * k + r log r)
+        # r = recipes given, k = their title and ingredient tokens
+
+        #search_recipes(query) limited to recipes, e.g. the results of a shorter query this one extends
+        self._ensure_ingredient_indexes()
+        return self._search_index.refine(query, recipes)
 
-        
-        #filter recipes by cuisine, category, and/or rating
-        results = self.recipes
-        if cuisine:
-            results = [r for r in results if r.cuisine.lower() == cuisine.lower()]
-        if category:
-            results = [r for r in results if r.category.lower() == category.lower()]
-        if rating:
-            results = [r for r in results if r.rating and r.rating >= rating]
-        return results
-    
-    def get_all_ingredients_recursive(self, recipe_title, visited=None, cache=None):
-        # Time Complexity: O(n + m)
-        # n: number of recipes checked
-        # m: total number of ingredients in those recipes
-        
-        #recursively get all ingredients, including sub-recipes
-        if visited is None:
-            visited = set()
-        if cache is None:
-            cache = {}
-
-        if recipe_title in cache:
-            return cache[recipe_title]
+    def filter_recipes(self, cuisine=None, category=None, rating=None):
+        # Time Complexity: O(k log k), O(log n + k) in the database with a storage backend
+        # k = size of the smallest matching facet
+
+        #filter recipes by cuisine, category, and/or rating through the facet indexes
+        #with a storage backend the database's indexes answer it, only the matching ids are read
+        if self.storage is not None and (cuisine or category or rating):
+            ids = self.storage.filter_recipe_ids(cuisine, category, rating)
+            return [r for r in map(self.get_recipe_by_id, ids) if r is not None]
+        results = self._facet_index.filter(cuisine, category, rating)
+        return list(self.recipes) if results is None else results
+
+    def count_recipes(self, cuisine=None, category=None, rating=None):
+        #how many recipes a filter would return, without building the list when possible
+        return self._facet_index.count(cuisine, category, rating)
+
+    def facet_counts(self, facet, cuisine=None, category=None):
+        #recipe counts per cuisine or category, e.g. facet_counts("category", cuisine="Italian")
+        return self._facet_index.facet_counts(facet, cuisine, category)
     
-        recipe = next((r for r in self.recipes if r.title == recipe_title), None)
-        if not recipe or recipe.title in visited:
+    def get_all_ingredients_recursive(self, recipe_title, servings=None):
+        # Time Complexity: O(r) once memoized
+        # r = number of ingredients in the result
+
+        #get all ingredients, including sub-recipes, scaled to the servings asked for
+        #the flattened list is memoized per recipe and dropped only when it or a sub-recipe changes
+        #raises ValueError if the recipe uses itself through its sub-recipes
+        recipe = self.get_recipe_by_title(recipe_title)
+        if not recipe:
             return []
-        
-        #go deeper if ingredient is another recipe
-        visited.add(recipe.title)
-        collected = []
+        self._ensure_ingredient_indexes()
+        return self._graph.flattened(recipe, servings)
 
-        for ing in recipe.ingredients:
-            if not ing or not ing.name:
-                continue  # skip invalid ingredients
-            sub_recipe = next((r for r in self.recipes if r.title and r.title.lower() == ing.name.lower()), None)
+    def what_can_i_cook(self, pantry, max_missing=0):
+        # Time Complexity: O(n) bitwise operations once the bitsets are up to date
+        # n = number of recipes
 
-            if sub_recipe:
-                collected += self.get_all_ingredients_recursive(sub_recipe.title, visited, cache)
-            else:
-                collected.append(ing)
-
-        cache[recipe_title] = collected
-        return collected
-
-       
-        recipe = next((r for r in self.recipes if r.title == recipe_title), None)
-        if visited is None:
-            visited = set()
-            if not recipe or recipe.title in visited:
-                return []
-            
-            #go deeper if ingredient is another recipe
-            visited.add(recipe.title)
-            collected = []
-            for ing in recipe.ingredients:
-                sub_recipe = next((r for r in self.recipes if r.title.lower() == ing.name.lower()), None)
-                if sub_recipe:
-                    collected += self.get_all_ingredients_recursive(sub_recipe.title, visited)
-                else:
-                    collected.append(ing)
-            return collected
+        #recipes that can be made from the ingredient names in pantry, sub-recipes included,
+        #or with at most max_missing ingredients still to buy
+        #returns [(recipe, missing ingredient names, cost to buy them)], fewest missing first, then cheapest
+        self._ensure_ingredient_indexes()
+        self._pantry.refresh(self._titled_recipes(), self._graph.batch, self.generation)
+        return self._pantry.match(pantry, max_missing)
         
         
-    #mealplanning cheastest combination    
-    from itertools import combinations
+    #mealplanning cheastest combination
+    def select_cheapest_meals(self, target_servings, allow_repeats=False):
+        # Time Complexity: O(m * S)
+        # dynamic programming over servings, see optimiser.cheapest_meals
+
+        #return the cheapest recipes whose servings add up to the target, or [] if none do
+        return self.plan_cheapest_meals(target_servings, allow_repeats).best()
+
+    def plan_cheapest_meals(self, target_servings, allow_repeats=False, top_k=1, scales=(1,), progress=None):
+        #the k cheapest exact plans, plus the nearest totals when nothing matches exactly
+        #recipes are compared by their rolled-up cost, see recipe_cost
+        #scales=(0.5, 1, 2) also lets the plan use half and double batches, as ScaledRecipe views
+        #progress(done, total) is passed on to cheapest_meals, e.g. a background Task's report
+        return self.prepare_cheapest_meals(target_servings, allow_repeats, top_k, scales)(progress)
+
+    def prepare_cheapest_meals(self, target_servings, allow_repeats=False, top_k=1, scales=(1,)):
+        # Time Complexity: O(n) once the costs are memoized, the search itself is left to the returned function
+
+        #plan_cheapest_meals in two halves for running the search on a worker thread:
+        #the recipes and their costs are read here, on the thread that owns the manager,
+        #and the returned function search(progress=None) only uses that copy, never the manager
+        self._ensure_ingredient_indexes()
+        recipes = [r if scale == 1 else ScaledRecipe(r, scale) for scale in scales for r in self.recipes]
+        costs = {r: self.recipe_cost(r) for r in recipes}
+        servings = {r: r.servings for r in recipes}
+        return lambda progress=None: cheapest_meals(recipes, target_servings, allow_repeats, top_k, cost=costs.__getitem__,
+                                                    progress=progress, servings=servings.__getitem__)
+
+    def recipe_cost(self, recipe, servings=None):
+        # Time Complexity: O(1) once memoized, O(m) per changed recipe otherwise
+
+        #cost of a recipe (or title) worked out from its ingredient prices and the sub-recipes it uses
+        #the result is memoized and only worked out again after the recipe or one of its sub-recipes changes
+        #a recipe with no priced ingredients costs the total typed in for it
+        if isinstance(recipe, str):
+            recipe = self.get_recipe_by_title(recipe)
+            if recipe is None:
+                return 0.0
+        if isinstance(recipe, ScaledRecipe):
+            return self.recipe_cost(recipe.recipe, servings or recipe.servings)
+        self._ensure_ingredient_indexes()
+        return self._graph.cost(recipe, servings)
+
+    def cost_per_serving(self, recipe):
+        return self.recipe_cost(recipe) / recipe.servings if recipe.servings else 0
+
+    def reprice_ingredients(self, prices):
+        # Time Complexity: O(p + a * m)
+        # p = prices given, a = recipes listing one of them, m = their ingredients
+
+        #set the cost_per_unit of every ingredient named in prices ({name: price}, names ignore capital letters)
+        #only the recipes listing those ingredients, and the ones using them as sub-recipes, are costed again
+        #returns the recipes whose ingredients changed
+        self._ensure_ingredient_indexes()
+        prices = {name_key(name): price for name, price in prices.items() if name}
+        changed = {}
+        for name, price in prices.items():
+            for title_key in self._graph.mentions.get(name, ()):
+                recipe = self._title_index.get(title_key)
+                if recipe is None:
+                    continue
+                for ing in recipe.ingredients:
+                    if ing and ing.name and name_key(ing.name) == name and ing.cost_per_unit != price:
+                        ing.cost_per_unit = price
+                        changed[title_key] = recipe
+        for recipe in changed.values():
+            self._graph.invalidate(recipe.title)
+        if changed:
+            self._changed()
+            if self.storage is not None:
+                with self.storage.batch():
+                    for recipe in changed.values():
+                        self.storage.put_recipe(recipe.to_dict())
+            elif self.journal is not None:
+                self._compact_journal()   #one snapshot instead of a journal line per recipe
+        return list(changed.values())
 
-    def select_cheapest_meals(self, target_servings):
-        # Time Complexity: O(2^n)
-        # Tries all combinations of recipes to meet serving target (exponential)
-
-        # try all combinations of 1 to len(recipes) recipes
-        valid_combinations = []
+    def get_recipe_by_title(self, title):
+        # Time Complexity: O(1), O(log n + m) in the database for a title not loaded here
+        #look up a recipe through the title index
+        #with a storage backend a title not loaded here is looked up in the database, e.g. added by another program
+        recipe = self._loaded_recipe(title)
+        if recipe is None and self.storage is not None and self._title_key(title):
+            recipe = self._adopt(self.storage.get_recipe(title))
+        return recipe
 
-        for r in range(1, len(self.recipes) + 1):
-            for combo in combinations(self.recipes, r):
-                total_servings = sum(recipe.servings for recipe in combo)
-                if total_servings == target_servings:
-                    total_cost = sum(recipe.total_recipe_cost for recipe in combo)
-                    valid_combinations.append((combo, total_cost))
+    def get_recipe_by_id(self, recipe_id):
+        # Time Complexity: O(1), O(log n + m) in the database for an id not loaded here
+        recipe = self._id_index.get(recipe_id)
+        if recipe is None and self.storage is not None and isinstance(recipe_id, int):
+            recipe = self._adopt(self.storage.get_recipe_by_id(recipe_id))
+        return recipe
 
-        # return the cheapest valid combo, if any
-        if valid_combinations:
-            best_combo = min(valid_combinations, key=lambda x: x[1])
-            return best_combo[0]  # just return the recipes no cost
-        return []
+    def _loaded_recipe(self, title):
+        #the title index alone, for lookups that miss often such as ingredient names in the graph
+        return self._title_index.get(self._title_key(title))
 
-    def get_recipe_by_title(self, title):
-        for recipe in self.recipes:
-            if recipe.title.lower() == title.lower():
-                return recipe
-        return None
+    def _adopt(self, data):
+        #add a recipe found in the storage backend but not loaded here, it is stored already so nothing is written
+        if data is None or self._title_key(data["title"]) in self._title_index:
+            return None
+        recipe = Recipe.from_dict(data)
+        self._insert(recipe)
+        self.generation += 1
+        return recipe
 
 
 
@@ -214,72 +608,286 @@ class RecipeManager:
 
 
 
-class MealPlanner:
-    def __init__(self, recipe_manager):
-        self.planned_meals = defaultdict(list)   #store recipes by date
+class MealPlanner(JsonSaveMixin):
+    def __init__(self, recipe_manager, journal=False, storage=None, shopping_lists=None, filename="mealplan.json"):
+        self.planned_meals = defaultdict(list)   #store recipes by date, keys are datetime.date
+        self.filename = filename   #the JSON file loaded and saved when no other file is given
+        self._dates = DateIndex()   #the dates of planned_meals in order, for range queries
+        self.use_journal = journal   #append changes to a journal instead of rewriting the file each save
+        self.journal = None
+        self.storage = storage   #optional backend from storage.py, used instead of the JSON file
+        self.recipe_manager = recipe_manager
+        self.shopping_lists = shopping_lists   #optional ShoppingListManager kept in step with the plan
+        self._dates_by_meal = defaultdict(Counter)   #recipe id (or lowercase title) -> {date: batches planned that day}
+        self.dirty = False   #changed since the file was last written
+        self.on_change = None   #called with no arguments after every change, e.g. by AutosaveWriter
+        if recipe_manager is not None and shopping_lists is not None:
+            recipe_manager.add_listener(self._recipe_changed)
         self.load_from_file(recipe_manager)   #load previous meal plan
 
+    @staticmethod
+    def _meal_title(meal):
+        #planned meals are Recipe objects (or ScaledRecipe views of them), or what was saved for a meal no loaded recipe has
+        if isinstance(meal, dict):
+            return str(meal.get("title") or meal.get("id"))
+        return meal.title if isinstance(meal, MEAL_TYPES) else str(meal)
+
+    @staticmethod
+    def _meal_key(meal):
+        #what the date index files a meal under, recipes by id so a rename does not move them
+        if isinstance(meal, MEAL_TYPES):
+            return meal.recipe_id if meal.recipe_id is not None else meal.title.lower()
+        return MealPlanner._meal_title(meal).lower() if not isinstance(meal, int) else meal
+
+    @staticmethod
+    def _saved(meal):
+        #what the file, journal and storage keep for a meal: {"id": ..., "title": ...}, or a title
+        #the title is kept next to the id so a meal whose recipe was deleted still has a name
+        #a scaled meal also keeps its "servings"
+        if isinstance(meal, MEAL_TYPES):
+            saved = {"id": meal.recipe_id, "title": meal.title} if meal.recipe_id is not None else {"title": meal.title}
+            if isinstance(meal, ScaledRecipe):
+                saved["servings"] = meal.servings
+            elif len(saved) == 1:
+                return meal.title
+            return saved
+        return meal
+
+    @staticmethod
+    def _batches(meal):
+        #how many batches of its recipe a planned meal is
+        return meal.factor if isinstance(meal, ScaledRecipe) else 1
+
+    def _resolve(self, meal):
+        # Time Complexity: O(1)
+        #the Recipe a saved id or title refers to, or the value itself if no loaded recipe has it
+        #a saved id no recipe has any more falls back to the title saved next to it
+        if isinstance(meal, MEAL_TYPES) or self.recipe_manager is None:
+            return meal
+        if isinstance(meal, dict):
+            recipe = self._resolve(meal["id"]) if "id" in meal else None
+            if not isinstance(recipe, Recipe) and meal.get("title"):
+                recipe = self._resolve(meal["title"])
+            if not isinstance(recipe, Recipe):
+                return meal
+            return recipe.scaled(meal["servings"]) if meal.get("servings") else recipe
+        if isinstance(meal, int):
+            recipe = self.recipe_manager.get_recipe_by_id(meal)
+        else:
+            recipe = self.recipe_manager.get_recipe_by_title(meal)
+        return recipe if recipe is not None else meal
+
+    def _index_meals(self, date, meals, change):
+        # Time Complexity: O(k)
+        # k = meals given
+
+        #count meals in (change=1) or out (change=-1) of the meal -> dates index, by batches
+        for meal in meals:
+            key = self._meal_key(meal)
+            dates = self._dates_by_meal[key]
+            dates[date] += change * self._batches(meal)
+            if dates[date] <= 1e-9:
+                del dates[date]
+                if not dates:
+                    del self._dates_by_meal[key]
+
+    def _shop(self, date, meal, factor):
+        #add a meal's ingredients to the date's shopping list, or take them away with factor -1
+        if self.shopping_lists is None or not isinstance(meal, MEAL_TYPES):
+            return
+        if date.isoformat() not in self.shopping_lists.list_by_date:
+            self._rebuild_list(date)
+            return
+        self.shopping_lists.apply_items(date.isoformat(), ShoppingList.from_ingredients(meal.ingredients), factor)
+
+    def _rebuild_list(self, date):
+        # Time Complexity: O(k * m)
+        # k = meals planned that day, m = their ingredients
+
+        #a date with no saved list (planned before lists were kept, or never shopped for) gets one made
+        #from everything planned that day, changes to it would only hold the lines of one meal,
+        #or lines taken away from nothing
+        combined = ShoppingList()
+        for meal in self.planned_meals.get(date, []):
+            if isinstance(meal, MEAL_TYPES):
+                combined.merge(ShoppingList.from_ingredients(meal.ingredients))
+        if len(combined):
+            self.shopping_lists.save_list(date.isoformat(), combined.items())
+
+    def _recipe_changed(self, recipe, old_title, old_ingredients):
+        # Time Complexity: O(p * m)
+        # p = dates the recipe is planned on, m = its ingredients
+
+        #move the shopping lists of the dates a recipe is planned on from its old ingredients to the new ones
+        #plans hold the recipe itself and save its id, so a rename needs nothing here
+        if old_ingredients is None or self.shopping_lists is None:
+            return
+        key = recipe.recipe_id if recipe.recipe_id is not None else old_title.lower()
+        dates = self._dates_by_meal.get(key)
+        if not dates:
+            return
+        old_lines = ShoppingList.from_ingredients(old_ingredients)
+        new_lines = ShoppingList.from_ingredients(recipe.ingredients)
+        for date, batches in dates.items():
+            if date.isoformat() not in self.shopping_lists.list_by_date:
+                self._rebuild_list(date)
+                continue
+            self.shopping_lists.apply_items(date.isoformat(), old_lines, -batches)
+            self.shopping_lists.apply_items(date.isoformat(), new_lines, batches)
+
+    def _changed(self):
+        self.dirty = True
+        if self.on_change is not None:
+            self.on_change()
+
+    def _log_day(self, date):
+        #store the whole meal list of one day, replaying it twice gives the same plan
+        self._changed()
+        if self.storage is None and self.journal is None:
+            return
+        meals = [self._saved(m) for m in self.planned_meals.get(date, [])]
+        if self.storage is not None:
+            self.storage.set_day(date.isoformat(), meals)
+        else:
+            self.journal.append({"op": "set_day", "date": date.isoformat(), "meals": meals})
 
+    def _apply_record(self, record):
+        #replay one journal record, journals written before recipe ids hold titles
+        if record.get("op") == "set_day":
+            meals = record["meals"] if "meals" in record else record["titles"]
+            self._set_day(parse_date(record["date"]), [self._resolve(m) for m in meals])
         
-    def add_meal(self, date, recipe):
-        #add a recipe to a specific date
+    def _set_day(self, day, meals):
+        #replace the meals of one day, keeping the date index and title index in step
+        self._index_meals(day, self.planned_meals.get(day, []), -1)
+        if meals:
+            self.planned_meals[day] = meals
+            self._dates.add(day)
+            self._index_meals(day, meals, 1)
+        else:
+            self.planned_meals.pop(day, None)
+            self._dates.remove(day)
+
+    def add_meal(self, date, recipe, servings=None):
+        # Time Complexity: O(m + log d)
+        # m = ingredients of the recipe, the rest of the day is not looked at
+
+        #add a recipe (or a title) to a specific date, given as "YYYY-MM-DD" or a date
+        #with servings the meal is a scaled view of the recipe, the recipe itself is not changed
+        #raises ValueError if the date is not a real date
+        date = parse_date(date)
+        recipe = self._resolve(recipe)
+        if servings and isinstance(recipe, MEAL_TYPES) and servings != recipe.servings:
+            recipe = recipe.scaled(servings)
+        if date not in self.planned_meals:
+            self._dates.add(date)
         self.planned_meals[date].append(recipe)
+        self._index_meals(date, [recipe], 1)
+        self._log_day(date)
+        self._shop(date, recipe, 1)
 
     def remove_meal(self, date, recipe_title):
         #remove a recipe from a date's plan by title
-        self.planned_meals[date] = [
-            r for r in self.planned_meals[date] if r.title.lower() != recipe_title.lower()
-        ]
-        if not self.planned_meals[date]:   #remove date entry if no meals left
-            del self.planned_meals[date]
+        date = parse_date(date)
+        meals = self.planned_meals.get(date, [])
+        removed = [r for r in meals if self._meal_title(r).lower() == recipe_title.lower()]
+        if not removed:
+            return
+        self._set_day(date, [r for r in meals if self._meal_title(r).lower() != recipe_title.lower()])
+        self._log_day(date)
+        for meal in removed:
+            self._shop(date, meal, -1)
 
     def get_meals_for_date(self, date):
-        #get a list of planned meals for a given date
-        return self.planned_meals.get(date, [])
+        #get a list of planned meals for a given date, [] if nothing is planned or it is not a date
+        try:
+            return self.planned_meals.get(parse_date(date), [])
+        except ValueError:
+            return []
+
+    def get_recipes_for_date(self, date):
+        #the Recipe objects planned on a date, leaving out meals no loaded recipe has
+        return [meal for meal in self.get_meals_for_date(date) if isinstance(meal, MEAL_TYPES)]
+
+    def meals_between(self, start, end):
+        # Time Complexity: O(log d + k)
+        # d = planned dates, k = planned dates in the range
+
+        #(date, meals) for every planned date from start to end, both included, in date order
+        #with a storage backend the database's date index answers it
+        start, end = parse_date(start), parse_date(end)
+        if self.storage is not None:
+            for day, meals in self.storage.meals_between(start.isoformat(), end.isoformat()).items():
+                yield parse_date(day), [self._resolve(meal) for meal in meals]
+            return
+        for day in self._dates.between(start, end):
+            yield day, self.planned_meals[day]
+
+    def meals_in_week(self, day):
+        #the planned dates of the monday to sunday week a day is in
+        return self.meals_between(*week_bounds(day))
+
+    def meals_in_month(self, day):
+        #the planned dates of the month a day is in
+        return self.meals_between(*month_bounds(day))
+
+    def upcoming_meals(self, days, start=None):
+        #the planned dates of the next number of days, from today unless start is given
+        first = parse_date(start) if start is not None else datetime.date.today()
+        return self.meals_between(first, first + datetime.timedelta(days=days - 1))
 
     def display_schedule(self):
         ## Time Complexity: O(n)
         # n = number of items printed
 
         
-        #print all planned meals in date order
-        for date, recipes in sorted(self.planned_meals.items()):
-            print(f"\n📅 {date}:")
-            for recipe in recipes:
-                print(f" - {recipe.title}")
+        #print all planned meals in date order, the date index is already sorted
+        for date in self._dates:
+            print(f"\n📅 {date.isoformat()}:")
+            for recipe in self.planned_meals[date]:
+                print(f" - {self._meal_title(recipe)}")
 
     def to_dict(self):
-        #convert meal plan to dictionary format for saving
+        #convert meal plan to dictionary format for saving, recipes are saved by id
         return {
             'planned_meals': {
-                day: [recipe.title for recipe in recipes if recipe and recipe.title]
-                for day, recipes in self.planned_meals.items()
+                day.isoformat(): [self._saved(recipe) for recipe in self.planned_meals[day] if recipe and self._meal_title(recipe)]
+                for day in self._dates
                 }
             }
  
     def from_dict(self, data, recipe_manager):
         #load planned meals from a dictionary by using recipe IDs
+        #each id (or title, in older files) is turned into the Recipe once here, later reads use it directly
+        #dates are checked here once, a date that cannot be read is left out
+        self.recipe_manager = recipe_manager
         self.planned_meals = defaultdict(list)
-        for day, recipe_titles in data.get('planned_meals', {}).items():
+        self._dates_by_meal = defaultdict(Counter)
+        for day, saved_meals in data.get('planned_meals', {}).items():
+            try:
+                day = parse_date(day)
+            except ValueError:
+                print(f"Skipping meal plan date {day!r}, dates are written as YYYY-MM-DD.")
+                continue
             self.planned_meals[day] = [
-                title for title in recipe_titles if title
+                self._resolve(meal) for meal in saved_meals if meal
             ]
+            self._index_meals(day, self.planned_meals[day], 1)
+        self._dates = DateIndex(self.planned_meals)
 
 
-    def save_to_file(self, filename="mealplan.json"):
+    def load_from_file(self, recipe_manager, filename=None):
         # Time Complexity: O(n)
         # n = number of items saved/loaded
 
-        #save meal plan data to a JSON file
-        try:
-             with open(filename, "w") as f:
-                 json.dump(self.to_dict(), f, indent=4)
-        except IOError as e:
-             print(f"Error saving to {filename}: {e}")
+        filename = filename or self.filename
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
 
-    def load_from_file(self, recipe_manager, filename="mealplan.json"):
-        # Time Complexity: O(n)
-        # n = number of items saved/loaded
+        if self.storage is not None:
+            self.from_dict(self.storage.load_meal_plan(), recipe_manager)
+            return
 
         # load meal plan data from file
         try:
@@ -288,44 +896,50 @@ class MealPlanner:
                      data = json.load(f)
                      self.from_dict(data, recipe_manager)
                  else:
-                     self.planned_meals = defaultdict(list)
+                     self.from_dict({}, recipe_manager)
         except FileNotFoundError:
-             self.planned_meals = defaultdict(list)
+             self.from_dict({}, recipe_manager)
         except json.JSONDecodeError:
              print(f"Error decoding JSON from {filename}. The file may be corrupted or empty.")
-             self.planned_meals = defaultdict(list)
+             self.from_dict({}, recipe_manager)
 
+        #then apply the changes made since that file was written
+        if self.use_journal:
+            journal = Journal(filename)
+            for record in journal.replay():
+                self._apply_record(record)
+            self.journal = journal
 
 
 
 
 
 
-from collections import defaultdict
 
 #makes sure duplicate ingredients are added together and help to clearify what to buy
 class ShoppingListGenerator:
     def __init__(self, recipe_manager):
         self.recipe_manager = recipe_manager
     
-    def generate_list(self, recipes):
+    def generate_items(self, recipes):
         # Time Complexity: O(n * m)
         # n: number of recipes
         # m: average number of ingredients per recipe
         
         #creates a shopping list by combining all ingredients from selected recipes
-        combined = {}
-        for recipe in recipes:
-            for ing in recipe.ingredients:
-                if not ing or not ing.name or not ing.unit:
-                    continue  # skip invalid ingredient
-                key = (ing.name.lower(), ing.unit)
-
-                if key in combined:
-                    combined[key] += ing.quantity
-                else:
-                    combined[key] = ing.quantity
-        return [f"{quantity:.2f} {unit} {name.title()}" for (name, unit), quantity in combined.items()]   #turn the nested dictionary into a readable list
+        #amounts are added up in base units, an ingredient with no unit is counted in pieces
+        return self.combine_ingredients([recipe.ingredients for recipe in recipes])
+
+    def combine_ingredients(self, ingredient_lists):
+        #generate_items for lists of ingredients, so a worker thread can be given copies instead of the recipes
+        combined = ShoppingList()
+        for ingredients in ingredient_lists:
+            combined.merge(ShoppingList.from_ingredients(ingredients))
+        return combined.items()
+
+    def generate_list(self, recipes):
+        #the same list as readable text, e.g. "1.00 kg Rice"
+        return [item.display() for item in self.generate_items(recipes)]
         
     
 
@@ -337,42 +951,114 @@ class ShoppingListGenerator:
         for item in shopping_list:
             print(f" - {item}")
 
-class ShoppingListManager:
-    def __init__(self):
-        self.list_by_date = {}   #dic to store shopping list per date
+class ShoppingListManager(JsonSaveMixin):
+    def __init__(self, journal=False, storage=None, filename="shoppinglist.json"):
+        self.list_by_date = {}   #dic to store shopping list per date, date -> ShoppingList
+        self.filename = filename   #the JSON file loaded and saved when no other file is given
+        self._dates = []   #sorted dates of list_by_date, ISO dates sort the same as the days they name
+        self.use_journal = journal   #append changes to a journal instead of rewriting the file each save
+        self.journal = None
+        self.storage = storage   #optional backend from storage.py, used instead of the JSON file
+        self.dirty = False   #changed since the file was last written
+        self.on_change = None   #called with no arguments after every change, e.g. by AutosaveWriter
         self.load_from_file()
 
+    def _set(self, date, items):
+        # Time Complexity: O(k + log d) for a date already listed
+        # k = items, d = dates with a list
+        if date not in self.list_by_date:
+            insort(self._dates, date)
+        self.list_by_date[date] = ShoppingList(items)
+        return self.list_by_date[date]
+
+    def _apply_record(self, record):
+        #replay one journal record
+        if record.get("op") == "set":
+            self._set(record["date"], record["items"])
+
+    def _changed(self):
+        self.dirty = True
+        if self.on_change is not None:
+            self.on_change()
+
+    def _log_list(self, date):
+        #store the whole list of one date, replaying it twice gives the same list
+        self._changed()
+        if self.storage is None and self.journal is None:
+            return
+        data = self.list_by_date[date].to_dict()
+        if self.storage is not None:
+            self.storage.set_shopping_list(date, data)
+        else:
+            self.journal.append({"op": "set", "date": date, "items": data})
+
     def save_list(self, date, items):
-        #save list for a specific date
-        self.list_by_date[date] = items
+        #save list for a specific date, items are ShoppingItem objects (or their dictionaries)
+        self._set(date, items)
+        self._log_list(date)
+
+    def apply_items(self, date, shopping_list, factor=1):
+        # Time Complexity: O(k + log d)
+        # k = lines in the given list
+
+        #add a meal's lines to the saved list of a date (factor -1 takes them away again)
+        #only the lines of that meal are touched, not the rest of the day
+        day = self.list_by_date.get(date)
+        if day is None:
+            day = self._set(date, ())
+        day.merge(shopping_list, factor)
+        self._log_list(date)
 
     def get_list(self, date):
-        #get saved shopping list for a date
-        return {'shopping_list': self.list_by_date}
+        #get saved shopping list for a date, [] if there is none
+        shopping_list = self.list_by_date.get(date)
+        return shopping_list.items() if shopping_list else []
+
+    def dates_between(self, start, end):
+        # Time Complexity: O(log d + k)
+        # k = dates in the range
+
+        #the listed dates from start to end, both included, given as "YYYY-MM-DD" or a date
+        #lists are kept under ISO dates, so the bounds are turned into ISO dates before comparing them as text
+        #raises ValueError if either is not a real date
+        start, end = parse_date(start).isoformat(), parse_date(end).isoformat()
+        return self._dates[bisect_left(self._dates, start):bisect_right(self._dates, end)]
+
+    def consolidate(self, start, end):
+        # Time Complexity: O(log d + total items of the k dates)
+
+        #one list for every date from start to end, merged from the saved per-date lists
+        #nothing is rebuilt from the meals, so a week or a month costs only the lines it adds up
+        combined = ShoppingList()
+        for date in self.dates_between(start, end):
+            combined.merge(self.list_by_date[date])
+        return combined
 
     def to_dict(self):
         #convert list-by-date dictionary to savable format
-        return self.list_by_date
+        return {date: shopping_list.to_dict() for date, shopping_list in self.list_by_date.items()}
 
     def from_dict(self, data):
-        #load shopping list data from dictionary
-        self.list_by_date = data.get('shopping_list', {})
-
-    def save_to_file(self, filename="shoppinglist.json"):
-        # Time Complexity: O(n)
-        # n = number of items saved/loaded
-
-        #save shopping lists to file
-        try:
-             with open(filename, "w") as f:
-                 json.dump(self.to_dict(), f, indent=4)
-        except IOError as e:
-             print(f"Error saving to {filename}: {e}")
-
-    def load_from_file(self, filename="shoppinglist.json"):
+        #load shopping list data from dictionary, save_to_file writes the dates at the top level
+        #older files hold text items such as "1.00 kg Rice", they are read into ShoppingItems once here
+        self.list_by_date = {}
+        self._dates = []
+        for date, items in (data['shopping_list'] if 'shopping_list' in data else data).items():
+            self._set(date, items)
+
+    def load_from_file(self, filename=None):
        # Time Complexity: O(n)
        # n = number of items saved/loaded
 
+         filename = filename or self.filename
+         if self.journal is not None:
+             self.journal.close()
+             self.journal = None
+
+         if self.storage is not None:
+             self.from_dict(self.storage.load_shopping_lists())
+             return
+
         #load shopping lists from file
          try:
              with open(filename, "r") as f:
@@ -380,10 +1066,17 @@ class ShoppingListManager:
                      data = json.load(f)
                      self.from_dict(data)
                  else:
-                     self.list_by_date = {}
+                     self.from_dict({})
          except FileNotFoundError:
-             self.list_by_date = {}
+             self.from_dict({})
          except json.JSONDecodeError:
              print(f"Error decoding JSON from {filename}. The file may be corrupted or empty.")
-             self.list_by_date = {}
+             self.from_dict({})
+
+        #then apply the changes made since that file was written
+         if self.use_journal:
+             journal = Journal(filename)
+             for record in journal.replay():
+                 self._apply_record(record)
+             self.journal = journal
 
@@ -0,0 +1,128 @@
+import heapq
+from collections import defaultdict
+
+
+#result of a cheapest-meals search
+class MealPlanOptions:
+    def __init__(self, target, plans, nearest_below=None, nearest_above=None):
+        self.target = target   #servings asked for
+        self.plans = plans   #list of (recipes, total cost), cheapest first
+        self.nearest_below = nearest_below   #(servings, recipes, cost) closest under the target
+        self.nearest_above = nearest_above   #(servings, recipes, cost) closest over the target
+
+    def found(self):
+        return bool(self.plans)
+
+    def best(self):
+        #recipes of the cheapest exact plan, or an empty list
+        return self.plans[0][0] if self.plans else []
+
+
+def _servings_of(recipe, servings_of=None):
+    #servings as a positive whole number, or None if the recipe can't be used
+    servings = servings_of(recipe) if servings_of is not None else recipe.servings
+    if isinstance(servings, float) and servings.is_integer():
+        servings = int(servings)
+    if not isinstance(servings, int) or isinstance(servings, bool) or servings <= 0:
+        return None
+    return servings
+
+
+def _typed_cost(recipe):
+    return recipe.total_recipe_cost or 0.0
+
+
+def _candidates(recipes, limit, top_k, allow_repeats, cost, servings_of=None):
+    # Time Complexity: O(n log n)
+
+    #only the cheapest few recipes of each serving size can be in a top-k plan:
+    #a plan never needs more than limit // size of them, plus k - 1 for the alternatives
+    by_size = defaultdict(list)
+    for recipe in recipes:
+        servings = _servings_of(recipe, servings_of)
+        if servings is None or servings > limit:
+            continue
+        by_size[servings].append(recipe)
+
+    items = []
+    for size, group in by_size.items():
+        keep = top_k if allow_repeats else limit // size + top_k - 1
+        costs = {r: cost(r) for r in group}
+        cheapest = heapq.nsmallest(keep, group, key=costs.__getitem__)
+        items.extend((size, costs[r], r) for r in cheapest)
+    return items
+
+
+def _extend(entries, cost, item_index, top_k, into):
+    #merge "entries + one more item" into the sorted list "into", keeping the k cheapest
+    if len(into) == top_k and entries[0][0] + cost >= into[-1][0]:
+        return into   #nothing new can get into the top k
+    merged = []
+    i = j = 0
+    while len(merged) < top_k and (i < len(into) or j < len(entries)):
+        if j == len(entries) or (i < len(into) and into[i][0] <= entries[j][0] + cost):
+            merged.append(into[i])
+            i += 1
+        else:
+            merged.append((entries[j][0] + cost, (item_index, entries[j][1])))
+            j += 1
+    return merged
+
+
+def _unwind(node, items):
+    #follow the back-pointers of a plan to get its recipes
+    recipes = []
+    while node is not None:
+        item_index, node = node
+        recipes.append(items[item_index][2])
+    recipes.reverse()
+    return recipes
+
+
+def cheapest_meals(recipes, target_servings, allow_repeats=False, top_k=1, cost=None, progress=None, servings=None):
+    # Time Complexity: O(m * S * k)
+    # m = candidate recipes after pruning, S = target servings (+ largest serving size), k = top_k
+    # pseudo-polynomial: it grows with the target, not exponentially with the number of recipes
+
+    #find the k cheapest sets of recipes whose servings add up to exactly target_servings
+    #cost(recipe) gives a recipe's price, the total typed in for it by default
+    #servings(recipe) gives its servings, recipe.servings by default
+    #progress(done, total) is called after each candidate recipe, it may raise to stop the search
+    if target_servings <= 0 or top_k <= 0:
+        return MealPlanOptions(target_servings, [])
+
+    largest = max((_servings_of(r, servings) or 0 for r in recipes), default=0)
+    limit = target_servings + max(largest - 1, 0)   #look a little past the target for the nearest total over it
+    items = _candidates(recipes, limit, top_k, allow_repeats, cost or _typed_cost, servings)
+
+    #best[s] = up to k cheapest (cost, plan) for exactly s servings, plan is a linked list of item indexes
+    best = [[] for _ in range(limit + 1)]
+    best[0] = [(0.0, None)]
+    for index, (size, cost, _) in enumerate(items):
+        #ascending totals let the same recipe be reused, descending uses each recipe once
+        totals = range(size, limit + 1) if allow_repeats else range(limit, size - 1, -1)
+        for s in totals:
+            previous = best[s - size]
+            if not previous:
+                continue
+            if top_k == 1:
+                candidate = previous[0][0] + cost
+                if not best[s] or candidate < best[s][0][0]:
+                    best[s] = [(candidate, (index, previous[0][1]))]
+                continue
+            best[s] = _extend(previous, cost, index, top_k, best[s])
+        if progress is not None:
+            progress(index + 1, len(items))
+
+    plans = [(_unwind(node, items), cost) for cost, node in best[target_servings]]
+
+    def nearest(totals):
+        for s in totals:
+            if s != 0 and best[s]:
+                cost, node = best[s][0]
+                return (s, _unwind(node, items), cost)
+        return None
+
+    nearest_below = nearest(range(target_servings - 1, 0, -1)) if not plans else None
+    nearest_above = nearest(range(target_servings + 1, limit + 1)) if not plans else None
+    return MealPlanOptions(target_servings, plans, nearest_below, nearest_above)
@@ -0,0 +1,82 @@
+#"what can I cook": which recipes the ingredients on hand cover, fully or with a few items missing
+#every ingredient name gets a bit number, each recipe keeps the bits of its raw ingredients
+#(sub-recipes expanded) as one int, so checking a recipe against the pantry is a single bitwise and
+
+from dependency_graph import name_key
+
+
+#bitsets of the flattened ingredients of every recipe, see RecipeManager.what_can_i_cook
+class PantryMatcher:
+    def __init__(self):
+        self._bits = {}   #ingredient name -> bit number
+        self._names = []   #bit number -> ingredient name as first written
+        self._entries = {}   #recipe -> (flattened ingredients it was made from, bitset, {bit: cost of that ingredient})
+        self._generation = None   #RecipeManager.generation the entries were made at
+
+    def _bit(self, name):
+        bit = self._bits.get(name_key(name))
+        if bit is None:
+            bit = self._bits[name_key(name)] = len(self._names)
+            self._names.append(name)
+        return bit
+
+    def _entry(self, flat):
+        # Time Complexity: O(m)
+        need, costs = 0, {}
+        for ing in flat:
+            if not ing or not ing.name:
+                continue
+            bit = self._bit(ing.name)
+            need |= 1 << bit
+            costs[bit] = costs.get(bit, 0.0) + ing.total_cost()
+        return flat, need, costs
+
+    def refresh(self, recipes, batch, generation):
+        # Time Complexity: O(1) at the same generation, else O(n) plus O(m) per changed recipe
+
+        #bring the bitsets in step with the recipes, batch(recipe) gives its memoized flattened ingredients
+        #only recipes whose flattened ingredients were worked out again (the recipe or a sub-recipe changed) get a new bitset
+        if self._generation == generation:
+            return
+        entries = {}
+        for recipe in recipes:
+            try:
+                flat = batch(recipe)
+            except ValueError:
+                flat = recipe.ingredients   #part of a cycle, only its own ingredient lines count
+            old = self._entries.get(recipe)
+            entries[recipe] = old if old is not None and old[0] is flat else self._entry(flat)
+        self._entries = entries
+        self._generation = generation
+
+    def pantry_bits(self, names):
+        # Time Complexity: O(p)
+        #the bitset of the ingredients on hand, names no recipe uses are left out
+        have = 0
+        for name in names:
+            bit = self._bits.get(name_key(name))
+            if bit is not None:
+                have |= 1 << bit
+        return have
+
+    def match(self, names, max_missing=0):
+        # Time Complexity: O(n) bitwise operations, plus O(k) per result
+        # n = recipes, k = items missing from that result
+
+        #[(recipe, missing ingredient names, cost to buy them)] for every recipe missing at most
+        #max_missing ingredients, fewest missing first, then cheapest to complete, then by title
+        #call refresh first so the bitsets match the recipes
+        have = self.pantry_bits(names)
+        results = []
+        for recipe, (_, need, costs) in self._entries.items():
+            missing = need & ~have
+            if not need or missing.bit_count() > max_missing:
+                continue   #a recipe with no ingredients listed says nothing about the pantry
+            bits = []
+            while missing:
+                low = missing & -missing
+                bits.append(low.bit_length() - 1)
+                missing ^= low
+            results.append((recipe, [self._names[b] for b in bits], sum(costs[b] for b in bits)))
+        results.sort(key=lambda r: (len(r[1]), r[2], r[0].title.lower()))
+        return results
@@ -4,19 +4,26 @@
 
 
 import json   #for saving and loading data
-import os   #for checking if files exist
-import tkinter as tk   
-from tkinter import simpledialog, messagebox, ttk
-from collections import defaultdict   #dictionary that makes defult values
-from itertools import combinations   # use for generating combinations of item
+import os
+import re
+import threading
+from sys import intern
 
 
 
+def _intern(value):
+    #share one copy of repeated strings such as "g", "cup", "Italian" or "Flour"
+    return intern(value) if type(value) is str else value
+
+
+#__slots__ drops the per-object __dict__, the attributes themselves work as before
 class Ingredient:
+    __slots__ = ("name", "quantity", "unit", "cost_per_unit")
+
     def __init__(self, name, quantity, unit, cost_per_unit=0.0):
-        self.name = name
+        self.name = _intern(name)
         self.quantity = quantity   #amount use of ingridient
-        self.unit = unit
+        self.unit = _intern(unit)
         self.cost_per_unit=cost_per_unit
 
     def display(self):
@@ -32,13 +39,17 @@ class Ingredient:
     
 
 class Recipe:
+    __slots__ = ("title", "description", "servings", "cuisine", "category", "ingredients",
+                 "steps", "rating", "notes", "image_path", "total_recipe_cost", "recipe_id")
+
     def __init__(self, title, description, servings, cuisine, category,
-                 ingredients=None, steps=None, rating=None, notes=None, image_path=None, total_cost=0.0):
+                 ingredients=None, steps=None, rating=None, notes=None, image_path=None, total_cost=0.0, recipe_id=None):
+        self.recipe_id = recipe_id   #stable number given by RecipeManager, meal plans refer to recipes by it
         self.title = title
         self.description = description
         self.servings = servings
-        self.cuisine = cuisine
-        self.category = category
+        self.cuisine = _intern(cuisine)
+        self.category = _intern(category)
         self.ingredients = ingredients if ingredients else []   #list of Ingredient objects
         self.steps = steps if steps else []   #list of steps to make recipe
         self.rating = rating   #this is optional for user rating
@@ -56,6 +67,10 @@ class Recipe:
             ing for ing in self.ingredients if ing.name.lower() != ingredient_name.lower()
         ]
 
+    def ingredient_names(self):
+        #names of the listed ingredients, what the search index and sub-recipe graph are built from
+        return [ing.name for ing in self.ingredients if ing and ing.name]
+
     def add_step(self, step):
         #add cooking steps to the steps list
         self.steps.append(step)
@@ -67,6 +82,7 @@ class Recipe:
 
     def update_servings(self, new_servings):
         #adjust ingredient quantities when the number of serving changes
+        #this changes the recipe itself, use scaled() to cook it for a different number of people
         if new_servings <= 0:
             return   #do nothing if the new value is invalid
         factor = new_servings / self.servings
@@ -78,6 +94,10 @@ class Recipe:
         #caculate cost per serving safely and avoid dividing by zero
         return self.total_recipe_cost / self.servings if self.servings else 0
 
+    def scaled(self, servings):
+        #a view of this recipe for a number of servings, the recipe itself is not changed
+        return ScaledRecipe(self, servings / self.servings if servings and self.servings else 1.0)
+
     @classmethod
     def from_dict(cls, data):
     #when loading from file create a Recipe object from a dictionary
@@ -96,11 +116,37 @@ class Recipe:
             rating=data.get("rating"),
             notes=data.get("notes"),
             image_path=data.get("image_path"),
-            total_cost=data.get("total_cost", 0.0)
+            total_cost=data.get("total_cost", 0.0),
+            recipe_id=data.get("id")
         )
 
 
 
+    def to_dict(self):
+        #convert the recipe into a dictionary for saving
+        recipe_data = {
+            "title": self.title,
+            "description": self.description,
+            "servings": self.servings,
+            "cuisine": self.cuisine,
+            "category": self.category,
+            "ingredients": [
+                    {"name": i.name, "quantity": i.quantity, "unit": i.unit, "cost_per_unit": i.cost_per_unit} for i in self.ingredients
+                ],
+            "steps": self.steps,
+            "total_cost": self.total_recipe_cost
+
+        }
+        if self.recipe_id is not None:
+            recipe_data["id"] = self.recipe_id
+        if self.rating is not None:
+            recipe_data["rating"] = self.rating
+        if self.notes:
+            recipe_data["notes"] = self.notes
+        if self.image_path:
+            recipe_data["image_path"] = self.image_path
+        return recipe_data
+
     def display(self):
         #print the recipe details in a readable format
         print(f"\n--- {self.title} ---")
@@ -119,4 +165,315 @@ class Recipe:
         if self.notes:
             print(f"Notes: {self.notes}")
         if self.image_path:
-            print(f"Image Path: {self.image_path}")
\ No newline at end of file
+            print(f"Image Path: {self.image_path}")
+
+
+
+#an ingredient seen through a ScaledRecipe, the quantity is worked out each time it is read
+class ScaledIngredient:
+    __slots__ = ("ingredient", "factor")
+
+    def __init__(self, ingredient, factor):
+        self.ingredient = ingredient
+        self.factor = factor
+
+    @property
+    def name(self):
+        return self.ingredient.name
+
+    @property
+    def unit(self):
+        return self.ingredient.unit
+
+    @property
+    def cost_per_unit(self):
+        return self.ingredient.cost_per_unit
+
+    @property
+    def quantity(self):
+        quantity = self.ingredient.quantity
+        return quantity * self.factor if quantity is not None else None
+
+    def display(self):
+        return f"{self.quantity} {self.unit} {self.name}"
+
+    def total_cost(self):
+        return self.ingredient.total_cost() * self.factor
+
+
+#the ingredient list of a ScaledRecipe, read through the recipe's own list without copying it
+class ScaledIngredients:
+    __slots__ = ("ingredients", "factor")
+
+    def __init__(self, ingredients, factor):
+        self.ingredients = ingredients
+        self.factor = factor
+
+    def __len__(self):
+        return len(self.ingredients)
+
+    def __getitem__(self, index):
+        return ScaledIngredient(self.ingredients[index], self.factor)
+
+    def __iter__(self):
+        for ing in self.ingredients:
+            yield ScaledIngredient(ing, self.factor) if ing else ing
+
+
+#a recipe cooked for a different number of servings: the recipe plus a scale factor
+#quantities and costs are worked out when read, so scaling never builds up rounding errors
+#or changes the Recipe shared by meal plans, every other attribute is the recipe's own
+class ScaledRecipe:
+    __slots__ = ("recipe", "factor")
+
+    def __init__(self, recipe, factor):
+        if isinstance(recipe, ScaledRecipe):
+            recipe, factor = recipe.recipe, recipe.factor * factor
+        self.recipe = recipe
+        self.factor = factor
+
+    def __getattr__(self, name):
+        #title, recipe_id, steps, cuisine... come from the recipe
+        return getattr(self.recipe, name)
+
+    @property
+    def servings(self):
+        return self.recipe.servings * self.factor
+
+    @property
+    def ingredients(self):
+        return ScaledIngredients(self.recipe.ingredients, self.factor)
+
+    @property
+    def total_recipe_cost(self):
+        return (self.recipe.total_recipe_cost or 0.0) * self.factor
+
+    def cost_per_serving(self):
+        return self.recipe.cost_per_serving()
+
+    def scaled(self, servings):
+        return self.recipe.scaled(servings)
+
+
+_hydrate_lock = threading.RLock()   #one LazyRecipe is opened at a time, so two threads never load the same one twice
+SUMMARY_FIELDS = ("id", "title", "servings", "cuisine", "category", "rating", "total_cost")   #read when loading lazily
+LAZY_FIELDS = ("description", "ingredients", "steps", "notes", "image_path")   #built on first use
+
+
+#a recipe loaded with only the summary the list view needs (id, title, servings, cuisine, category, rating, cost)
+#the rest is built the first time any of LAZY_FIELDS is read
+class LazyRecipe(Recipe):
+    __slots__ = ("_loader",)
+
+    def __init__(self, summary, loader):
+        self.recipe_id = summary.get("id")
+        self.title = summary["title"]
+        self.servings = summary.get("servings", 1)
+        self.cuisine = _intern(summary.get("cuisine", ""))
+        self.category = _intern(summary.get("category", ""))
+        self.rating = summary.get("rating")
+        self.total_recipe_cost = summary.get("total_cost", 0.0)
+        self._loader = loader   #returns the full recipe dictionary, dropped once used
+
+    def is_loaded(self):
+        return self._loader is None
+
+    def _is_set(self, field):
+        #true if the slot has a value, without triggering __getattr__
+        try:
+            object.__getattribute__(self, field)
+        except AttributeError:
+            return False
+        return True
+
+    def __getattr__(self, name):
+        #only called for attributes that are not set yet, i.e. the lazy ones before loading
+        if name in LAZY_FIELDS and self._loader is not None:
+            self._hydrate()
+            return getattr(self, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _hydrate(self):
+        # Time Complexity: O(m)
+        # m = ingredients and steps of this recipe
+        #the loader is dropped only once every field is set, a reader on another thread that
+        #still sees it waits here instead of finding a field missing
+        with _hydrate_lock:
+            if self._loader is None:
+                return   #opened by another thread while this one waited
+            full = Recipe.from_dict(self._loader())
+            for field in LAZY_FIELDS:
+                if not self._is_set(field):   #keep anything set before loading
+                    setattr(self, field, getattr(full, field))
+            self._loader = None
+
+    def ingredient_names(self):
+        #read from the stored recipe while it is not opened, without building Ingredient objects
+        if self._loader is None or self._is_set("ingredients"):
+            return Recipe.ingredient_names(self)
+        return [i["name"] for i in self._loader().get("ingredients", []) if i.get("name")]
+
+    def to_dict(self):
+        #save without building Ingredient objects if the recipe was never opened
+        if self._loader is None or any(self._is_set(field) for field in LAZY_FIELDS):
+            return Recipe.to_dict(self)
+        recipe_data = dict(self._loader())
+        recipe_data.update({
+            "title": self.title,
+            "servings": self.servings,
+            "cuisine": self.cuisine,
+            "category": self.category,
+            "total_cost": self.total_recipe_cost,
+        })
+        recipe_data.pop("rating", None)
+        recipe_data.pop("id", None)
+        if self.recipe_id is not None:
+            recipe_data["id"] = self.recipe_id
+        if self.rating is not None:
+            recipe_data["rating"] = self.rating
+        return recipe_data
+
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+
+def _skip(text, i):
+    return _WHITESPACE.match(text, i).end()
+
+
+def _expect(text, i, char):
+    #the position after char, the next thing in the text that is not white space
+    i = _skip(text, i)
+    if not text.startswith(char, i):
+        raise json.JSONDecodeError(f"Expecting '{char}'", text, i)
+    return _skip(text, i + 1)
+
+
+def _scan_recipe_list(text, i, decoder, entries):
+    #add (summary, start, end) for every recipe in the JSON list at text[i], returns where the list ends
+    #each recipe is decoded to find where it ends, the C decoder does that faster than skipping over it here,
+    #and only its summary is kept
+    i = _expect(text, i, "[")
+    while not text.startswith("]", i):
+        data, end = decoder.raw_decode(text, i)
+        if not isinstance(data, dict):
+            raise json.JSONDecodeError("Expecting a recipe", text, i)
+        entries.append(({field: data[field] for field in SUMMARY_FIELDS if field in data}, i, end))
+        i = _skip(text, end)
+        if text.startswith(",", i):
+            i = _skip(text, i + 1)
+        elif not text.startswith("]", i):
+            raise json.JSONDecodeError("Expecting ',' or ']'", text, i)
+    return i + 1
+
+
+def _scan_recipes(text):
+    # Time Complexity: O(size of the text)
+
+    #([(summary, start, end)], next id) for a recipes file, start and end are positions in the text
+    #the file is {"next_id": ..., "recipes": [...]}, or only the list in files written before ids were kept
+    decoder = json.JSONDecoder()
+    entries = []
+    next_id = 1
+    i = _skip(text, 0)
+    if text.startswith("[", i):
+        _scan_recipe_list(text, i, decoder, entries)
+        return entries, next_id
+    i = _expect(text, i, "{")
+    while not text.startswith("}", i):
+        if not text.startswith('"', i):
+            raise json.JSONDecodeError("Expecting a key", text, i)
+        key, i = decoder.raw_decode(text, i)
+        i = _expect(text, i, ":")
+        if key == "recipes":
+            i = _scan_recipe_list(text, i, decoder, entries)
+        else:
+            value, i = decoder.raw_decode(text, i)
+            if key == "next_id":
+                next_id = value
+        i = _skip(text, i)
+        if text.startswith(",", i):
+            i = _skip(text, i + 1)
+        elif not text.startswith("}", i):
+            raise json.JSONDecodeError("Expecting ',' or '}'", text, i)
+    return entries, next_id
+
+
+def _file_stamp(f):
+    #tells a rewritten file apart from the one scanned, write_json_atomic puts a new file in its place
+    stat = os.fstat(f.fileno())
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+#where each recipe sits in a recipes file, so a LazyRecipe reads only its own part of the file when it is opened
+#nothing of the file is kept in memory but the positions, once the file is rewritten (by a save or a
+#journal compaction) it is scanned again and the recipes are found by id
+class RecipeFile:
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._by_position = []   #[(start, end)] in the order the scanned file lists the recipes
+        self._by_id = None   #recipe id -> (start, end), once the file was rewritten
+
+    def _scan(self, f):
+        #byte positions, the text is only decoded to find them
+        data = f.read()
+        text = data.decode("utf-8")
+        entries, next_id = _scan_recipes(text)
+        if len(text) != len(data):   #not all ASCII, character positions are not byte positions
+            ends = {}
+            offset = previous = 0
+            for position in sorted({p for _, start, end in entries for p in (start, end)}):
+                offset += len(text[previous:position].encode("utf-8"))
+                ends[position] = offset
+                previous = position
+            entries = [(summary, ends[start], ends[end]) for summary, start, end in entries]
+        return entries, next_id
+
+    def load(self):
+        # Time Complexity: O(size of the file)
+        #([(position, summary)], next id) of the recipes in the file
+        #raises json.JSONDecodeError if the file is not a list of recipes
+        with self._lock, open(self.filename, "rb") as f:
+            self._stamp = _file_stamp(f)
+            entries, next_id = self._scan(f)
+            self._by_position = [(start, end) for _, start, end in entries]
+            self._by_id = None
+        return [(position, summary) for position, (summary, _, _) in enumerate(entries)], next_id
+
+    def read(self, position, recipe_id):
+        # Time Complexity: O(size of the recipe), O(size of the file) the first time after the file was rewritten
+        #the dictionary of one recipe, by where it was when the file was loaded, or by id after a rewrite
+        with self._lock, open(self.filename, "rb") as f:
+            stamp = _file_stamp(f)
+            if stamp != self._stamp:
+                entries, _ = self._scan(f)
+                self._stamp = stamp
+                self._by_position = None
+                self._by_id = {summary.get("id"): (start, end) for summary, start, end in entries}
+            span = self._by_position[position] if self._by_position is not None else self._by_id.get(recipe_id)
+            if span is None:
+                raise KeyError(f"recipe {recipe_id} is no longer in {self.filename}")
+            f.seek(span[0])
+            return json.loads(f.read(span[1] - span[0]))
+
+    def loader(self, position, recipe):
+        #the loader of a LazyRecipe, it asks for the recipe's id only when it is opened, ids can be given after loading
+        return lambda: self.read(position, recipe.recipe_id)
+
+
+def lazy_recipes_from_json(filename):
+    # Time Complexity: O(size of the file)
+
+    #read a recipes file into LazyRecipe objects, returns (recipes, the saved next id or 1)
+    #each recipe keeps only where it sits in the file and reads that part again when it is opened
+    #raises json.JSONDecodeError if the file is not a list of recipes
+    source = RecipeFile(filename)
+    entries, next_id = source.load()
+    recipes = []
+    for position, summary in entries:
+        recipe = LazyRecipe(summary, None)
+        recipe._loader = source.loader(position, recipe)
+        recipes.append(recipe)
+    return recipes, next_id
@@ -0,0 +1,213 @@
+import heapq
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from fuzzy_index import TrigramIndex
+
+
+TOKEN_RE = re.compile(r"[^\W_]+")   #words made of letters and digits
+
+TITLE_WEIGHT = 2   #a term found in the title counts more than one in the ingredients
+INGREDIENT_WEIGHT = 1
+
+FUZZY_DISTANCE = 2   #most edits a misspelt word may be away from an indexed one
+
+
+def tokenize(text):
+    #split text into lowercase word tokens
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+
+#inverted index from title and ingredient-name tokens to recipes
+class SearchIndex:
+    def __init__(self):
+        self.title_postings = defaultdict(set)   #token -> recipes with it in the title
+        self.ingredient_postings = defaultdict(set)   #token -> recipes with it in an ingredient name
+        self.vocabulary = []   #sorted list of every token, used for prefix matches
+        self.fuzzy = TrigramIndex()   #the vocabulary again, by trigram, for typo-tolerant matches
+        self._indexed = {}   #recipe -> (title tokens, ingredient tokens) so it can be removed later
+
+    def clear(self):
+        self.title_postings = defaultdict(set)
+        self.ingredient_postings = defaultdict(set)
+        self.vocabulary = []
+        self.fuzzy = TrigramIndex()
+        self._indexed = {}
+
+    def build(self, recipes, ingredient_names=None):
+        # Time Complexity: O(t log t)
+        # t = total number of tokens in all recipes
+
+        #ingredient_names(recipe) gives the names to index, by default recipe.ingredient_names()
+        self.clear()
+        for recipe in recipes:
+            self._add_postings(recipe, ingredient_names(recipe) if ingredient_names else None)
+        tokens = set(self.title_postings) | set(self.ingredient_postings)
+        self.vocabulary = sorted(tokens)
+        self.fuzzy = TrigramIndex(self.vocabulary)
+
+    def _add_postings(self, recipe, names=None):
+        title_tokens = set(tokenize(recipe.title))
+        ingredient_tokens = set()
+        for name in recipe.ingredient_names() if names is None else names:
+            ingredient_tokens.update(tokenize(name))
+        for token in title_tokens:
+            self.title_postings[token].add(recipe)
+        for token in ingredient_tokens:
+            self.ingredient_postings[token].add(recipe)
+        self._indexed[recipe] = (title_tokens, ingredient_tokens)
+        return title_tokens | ingredient_tokens
+
+    def add(self, recipe):
+        # Time Complexity: O(k log v)
+        # k = tokens in the recipe, v = size of the vocabulary
+        if recipe in self._indexed:
+            self.remove(recipe)
+        for token in self._add_postings(recipe):
+            i = bisect_left(self.vocabulary, token)
+            if i == len(self.vocabulary) or self.vocabulary[i] != token:
+                insort(self.vocabulary, token)
+                self.fuzzy.add(token)
+
+    def remove(self, recipe):
+        # Time Complexity: O(k log v)
+        entry = self._indexed.pop(recipe, None)
+        if entry is None:
+            return
+        title_tokens, ingredient_tokens = entry
+        for postings, tokens in ((self.title_postings, title_tokens), (self.ingredient_postings, ingredient_tokens)):
+            for token in tokens:
+                recipes = postings.get(token)
+                if recipes is None:
+                    continue
+                recipes.discard(recipe)
+                if not recipes:
+                    del postings[token]
+        for token in title_tokens | ingredient_tokens:
+            if token not in self.title_postings and token not in self.ingredient_postings:
+                i = bisect_left(self.vocabulary, token)
+                if i < len(self.vocabulary) and self.vocabulary[i] == token:
+                    self.vocabulary.pop(i)
+                self.fuzzy.remove(token)
+
+    def _expand(self, term):
+        #every indexed token that starts with the term, so "spag" still finds "spaghetti"
+        i = bisect_left(self.vocabulary, term)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+            yield self.vocabulary[i]
+            i += 1
+
+    def _postings_for(self, term, prefix=False):
+        #recipes matching a term in the title and in the ingredients
+        if not prefix:
+            return self.title_postings.get(term, set()), self.ingredient_postings.get(term, set())
+        in_title = set()
+        in_ingredients = set()
+        for token in self._expand(term):
+            in_title |= self.title_postings.get(token, set())
+            in_ingredients |= self.ingredient_postings.get(token, set())
+        return in_title, in_ingredients
+
+    def similar_tokens(self, term, max_distance=None):
+        # Time Complexity: sublinear in the vocabulary, see TrigramIndex.search
+
+        #[(distance, token)] of indexed tokens within max_distance edits of term, closest first
+        #without a max_distance short words get fewer edits, or every three-letter word would match every other
+        if max_distance is None:
+            max_distance = min(FUZZY_DISTANCE, max(1, len(term) // 4))
+        return self.fuzzy.search(term, max_distance)
+
+    def fuzzy_search(self, query, max_distance=None, limit=None):
+        # Time Complexity: O(q * (trigram lookup + p) + r log r), O(q * (trigram lookup + p) + r log limit) with a limit
+
+        #like search, but each word may also match indexed words a few edits away ("spagheti", "grond beef")
+        #recipes needing fewer edits come first, then title matches as in search
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        edits = None   #recipe -> edits needed to match every term so far
+        titled = defaultdict(int)   #recipe -> terms matched in the title
+        for term in terms:
+            best = {}
+            for distance, token in self.similar_tokens(term, max_distance):
+                for postings, in_title in ((self.title_postings, True), (self.ingredient_postings, False)):
+                    for recipe in postings.get(token, ()):
+                        if recipe not in best or distance < best[recipe][0] or (distance == best[recipe][0] and in_title):
+                            best[recipe] = (distance, in_title)
+            if edits is None:
+                edits = {recipe: distance for recipe, (distance, _) in best.items()}
+            else:
+                edits = {recipe: total + best[recipe][0] for recipe, total in edits.items() if recipe in best}
+            if not edits:
+                return []
+            for recipe, (_, in_title) in best.items():
+                titled[recipe] += in_title
+        return _ranked(edits, lambda r: (edits[r], -titled[r], r.title.lower()), limit)
+
+    def refine(self, query, recipes):
+        # Time Complexity: O(r * q * k + r log r)
+        # r = recipes given, k = tokens per recipe
+
+        #search only within recipes, e.g. the results of a query this one extends ("spag" -> "spaghetti b")
+        #checks each recipe's own tokens, so no posting lists are merged, results are ranked like search
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return list(recipes)
+        *whole, last = terms
+        scores = {}
+        for recipe in recipes:
+            entry = self._indexed.get(recipe)
+            if entry is None:
+                continue
+            score = 0
+            for tokens, weight in ((entry[0], TITLE_WEIGHT), (entry[1], INGREDIENT_WEIGHT)):
+                hits = sum(1 for term in whole if term in tokens)
+                if any(token.startswith(last) for token in tokens):
+                    hits += 1
+                score += hits * weight
+            if all(term in entry[0] or term in entry[1] for term in whole) and \
+                    any(token.startswith(last) for tokens in entry for token in tokens):
+                scores[recipe] = score
+        return sorted(scores, key=lambda r: (-scores[r], r.title.lower()))
+
+    def search(self, query, limit=None):
+        # Time Complexity: O(q * p + r log r), O(q * p + r log limit) with a limit
+        # q = query terms, p = size of their posting lists, r = number of results
+
+        #with a limit only the best limit results are returned, a short prefix such as "s" matches
+        #most of a large collection and ranking all of it is what makes it slow
+        terms = list(dict.fromkeys(tokenize(query)))   #drop repeated terms, keep order
+        if not terms:
+            return []
+
+        #whole words must match exactly, the last word may still be being typed
+        per_term = []
+        for i, term in enumerate(terms):
+            in_title, in_ingredients = self._postings_for(term, prefix=(i == len(terms) - 1))
+            per_term.append((in_title, in_ingredients))
+
+        #a recipe must match every term somewhere, start from the smallest posting list
+        matches = [in_title | in_ingredients for in_title, in_ingredients in per_term]
+        matches.sort(key=len)
+        candidates = set(matches[0])
+        for postings in matches[1:]:
+            candidates &= postings
+            if not candidates:
+                return []
+
+        #rank by where each term matched, title hits first
+        def score(recipe):
+            title_hits = sum(1 for in_title, _ in per_term if recipe in in_title)
+            ingredient_hits = sum(1 for _, in_ingredients in per_term if recipe in in_ingredients)
+            return title_hits * TITLE_WEIGHT + ingredient_hits * INGREDIENT_WEIGHT
+
+        return _ranked(candidates, lambda r: (-score(r), r.title.lower()), limit)
+
+
+def _ranked(recipes, key, limit=None):
+    #recipes sorted by key, or only the first limit of them, picked with a heap instead of sorting them all
+    if limit is not None and len(recipes) > limit:
+        return heapq.nsmallest(limit, recipes, key=key)
+    return sorted(recipes, key=key)
@@ -0,0 +1,98 @@
+from units import to_base, for_display
+
+
+EPSILON = 1e-9   #a line this close to nothing after taking meals away is dropped
+
+
+#one line of a shopping list: how much of an ingredient to buy in one unit and what it costs
+class ShoppingItem:
+    __slots__ = ("name", "unit", "quantity", "cost")
+
+    def __init__(self, name, unit, quantity, cost=0.0):
+        self.name = name
+        self.unit = unit
+        self.quantity = quantity
+        self.cost = cost
+
+    def display(self):
+        #the text the shopping list has always shown, e.g. "1.00 kg Rice"
+        quantity, unit = for_display(self.quantity, self.unit)
+        return f"{quantity:.2f} {unit} {self.name.title()}"
+
+    def to_dict(self):
+        return {"name": self.name, "unit": self.unit, "quantity": self.quantity, "cost": self.cost}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["unit"], data["quantity"], data.get("cost", 0.0))
+
+    @classmethod
+    def parse(cls, text):
+        #read an item saved as text by older versions, e.g. "1.00 kg Rice"
+        quantity, unit, name = text.split(" ", 2)
+        return cls(name, unit, float(quantity))
+
+    @classmethod
+    def load(cls, value):
+        #a saved item is a dictionary, or text in files written by older versions
+        if isinstance(value, ShoppingItem):
+            return value
+        if isinstance(value, str):
+            return cls.parse(value)
+        return cls.from_dict(value)
+
+
+#the merged items of one or more days, one entry per (name, base unit)
+#quantities are kept in the base unit of their dimension (g, ml or pcs), so 500 g and 1 kg of flour are one line
+class ShoppingList:
+    def __init__(self, items=()):
+        self._items = {}   #(name, unit) -> ShoppingItem
+        self.total_cost = 0.0
+        for item in items:
+            self.add(item)
+
+    @classmethod
+    def from_ingredients(cls, ingredients, factor=1):
+        # Time Complexity: O(m)
+        #the shopping lines for a list of ingredients, an ingredient with no unit is counted in pieces
+        shopping_list = cls()
+        for ing in ingredients:
+            if not ing or not ing.name:
+                continue  # skip invalid ingredient
+            shopping_list.add(ShoppingItem(ing.name, ing.unit, ing.quantity, ing.total_cost()), factor)
+        return shopping_list
+
+    def add(self, item, factor=1):
+        # Time Complexity: O(1)
+        #add an item, scaled by factor, a negative factor takes it away again
+        item = ShoppingItem.load(item)
+        quantity, unit = to_base(item.quantity, item.unit)
+        quantity, cost = quantity * factor, (item.cost or 0) * factor
+        key = (item.name.lower(), unit)
+        line = self._items.get(key)
+        if line is None:
+            self._items[key] = ShoppingItem(item.name, unit, quantity, cost)
+        else:
+            line.quantity += quantity
+            line.cost += cost
+            if abs(line.quantity) < EPSILON and abs(line.cost) < EPSILON:
+                del self._items[key]   #everything that needed it was taken away
+        self.total_cost += cost
+        if not self._items:
+            self.total_cost = 0.0   #do not keep rounding left overs on an empty list
+
+    def merge(self, other, factor=1):
+        # Time Complexity: O(k)
+        # k = lines in the other list
+        for item in other.items():
+            self.add(item, factor)
+
+    def items(self):
+        return list(self._items.values())
+
+    def __len__(self):
+        return len(self._items)
+
+    def to_dict(self):
+        return [item.to_dict() for item in self._items.values()]
+
@@ -0,0 +1,555 @@
+import json   #for saving and loading data
+import os   #for checking if files exist
+import sqlite3
+from contextlib import contextmanager, nullcontext
+from journal import write_json_atomic
+from recipe import SUMMARY_FIELDS
+
+
+#interface shared by every storage backend
+#recipes are passed around as the same dictionaries the JSON files hold (see Recipe.to_dict)
+class Storage:
+    def load_recipes(self):
+        #every recipe as a list of dictionaries
+        raise NotImplementedError
+
+    def load_recipe_summaries(self):
+        #title, servings, cuisine, category, rating and total_cost of every recipe, for lazy loading
+        return [{field: r[field] for field in SUMMARY_FIELDS if field in r} for r in self.load_recipes()]
+
+    def ingredient_names(self):
+        #{recipe id: names of its ingredients} for every stored recipe with an id, for indexing lazily loaded recipes
+        return {r["id"]: [i["name"] for i in r.get("ingredients", []) if i.get("name")]
+                for r in self.load_recipes() if r.get("id") is not None}
+
+    def next_recipe_id(self):
+        #the id the next new recipe gets, above every id ever stored so a deleted recipe's id is not given out again
+        return max([1] + [r["id"] + 1 for r in self.load_recipes() if isinstance(r.get("id"), int)])
+
+    def replace_recipes(self, recipes, next_id=1):
+        #replace all stored recipes with the given list of dictionaries, next_id as in next_recipe_id
+        raise NotImplementedError
+
+    def put_recipe(self, recipe, old_title=None):
+        #insert a recipe or replace the one called old_title (or the same title)
+        raise NotImplementedError
+
+    def delete_recipe(self, title):
+        raise NotImplementedError
+
+    def get_recipe(self, title):
+        #one recipe dictionary by title ignoring capital letters, or None
+        raise NotImplementedError
+
+    def get_recipe_by_id(self, recipe_id):
+        #one recipe dictionary by id, or None, ids stay the same when a recipe is renamed
+        return next((r for r in self.load_recipes() if r.get("id") == recipe_id), None)
+
+    def filter_recipes(self, cuisine=None, category=None, rating=None):
+        #recipe dictionaries matching every filter given
+        raise NotImplementedError
+
+    def filter_recipe_ids(self, cuisine=None, category=None, rating=None):
+        #ids of the recipes filter_recipes would return, for callers that already hold the recipes
+        return [r["id"] for r in self.filter_recipes(cuisine, category, rating) if r.get("id") is not None]
+
+    def load_meal_plan(self):
+        #{"planned_meals": {date: [{"id": ..., "title": ...}, or titles of meals no recipe has]}}
+        raise NotImplementedError
+
+    def replace_meal_plan(self, data):
+        raise NotImplementedError
+
+    def set_day(self, date, meals):
+        #replace the meals planned for one date, an empty list clears the date
+        raise NotImplementedError
+
+    def meals_between(self, start, end):
+        #{date: [meals as in load_meal_plan]} for start <= date <= end (ISO dates compare as text)
+        raise NotImplementedError
+
+    def load_shopping_lists(self):
+        #{date: items}
+        raise NotImplementedError
+
+    def replace_shopping_lists(self, data):
+        raise NotImplementedError
+
+    def set_shopping_list(self, date, items):
+        raise NotImplementedError
+
+    def batch(self):
+        #group many changes so the backend can write them together, e.g. in one transaction
+        return nullcontext()
+
+    def close(self):
+        pass
+
+
+def _read_json(filename, default):
+    #read a JSON file the same way the managers do, falling back to a default
+    try:
+        with open(filename, "r") as f:
+            if os.path.getsize(filename) > 0:
+                return json.load(f)
+    except FileNotFoundError:
+        pass
+    except json.JSONDecodeError:
+        print(f"Error decoding JSON from {filename}. The file may be corrupted or empty.")
+    return default
+
+
+def _key(value):
+    return value.lower() if value else ""
+
+
+#the original three JSON files, kept as an import and export format
+#every change rewrites the whole file, so use SqliteStorage for large collections
+class JsonStorage(Storage):
+    def __init__(self, recipes_file="recipes.json", mealplan_file="mealplan.json", shoppinglist_file="shoppinglist.json"):
+        self.recipes_file = recipes_file
+        self.mealplan_file = mealplan_file
+        self.shoppinglist_file = shoppinglist_file
+
+    def _load_file(self):
+        #{"next_id": ..., "recipes": [...]} as RecipeManager saves it, older files hold only the list
+        data = _read_json(self.recipes_file, [])
+        return data if isinstance(data, dict) else {"recipes": data}
+
+    def load_recipes(self):
+        return self._load_file().get("recipes", [])
+
+    def next_recipe_id(self):
+        data = self._load_file()
+        return max(data.get("next_id", 1), Storage.next_recipe_id(self))
+
+    def replace_recipes(self, recipes, next_id=1):
+        recipes = list(recipes)
+        next_id = max([next_id, self.next_recipe_id()] + [r["id"] + 1 for r in recipes if isinstance(r.get("id"), int)])
+        write_json_atomic(self.recipes_file, {"next_id": next_id, "recipes": recipes})
+
+    def put_recipe(self, recipe, old_title=None):
+        # Time Complexity: O(n)
+        recipes = self.load_recipes()
+        wanted = {_key(old_title or recipe["title"]), _key(recipe["title"])}
+        for i, existing in enumerate(recipes):
+            if _key(existing.get("title")) in wanted:
+                recipes[i] = recipe
+                break
+        else:
+            recipes.append(recipe)
+        self.replace_recipes(recipes)
+
+    def delete_recipe(self, title):
+        # Time Complexity: O(n)
+        self.replace_recipes([r for r in self.load_recipes() if _key(r.get("title")) != _key(title)])   #the next id is kept
+
+    def get_recipe(self, title):
+        # Time Complexity: O(n)
+        return next((r for r in self.load_recipes() if _key(r.get("title")) == _key(title)), None)
+
+    def filter_recipes(self, cuisine=None, category=None, rating=None):
+        # Time Complexity: O(n)
+        results = self.load_recipes()
+        if cuisine:
+            results = [r for r in results if _key(r.get("cuisine")) == _key(cuisine)]
+        if category:
+            results = [r for r in results if _key(r.get("category")) == _key(category)]
+        if rating:
+            results = [r for r in results if r.get("rating") and r["rating"] >= rating]
+        return results
+
+    def load_meal_plan(self):
+        return _read_json(self.mealplan_file, {"planned_meals": {}})
+
+    def replace_meal_plan(self, data):
+        write_json_atomic(self.mealplan_file, data)
+
+    def set_day(self, date, meals):
+        data = self.load_meal_plan()
+        days = data.setdefault("planned_meals", {})
+        if meals:
+            days[date] = list(meals)
+        else:
+            days.pop(date, None)
+        self.replace_meal_plan(data)
+
+    def meals_between(self, start, end):
+        days = self.load_meal_plan().get("planned_meals", {})
+        return {day: titles for day, titles in sorted(days.items()) if start <= day <= end}
+
+    def load_shopping_lists(self):
+        data = _read_json(self.shoppinglist_file, {})
+        return data["shopping_list"] if "shopping_list" in data else data
+
+    def replace_shopping_lists(self, data):
+        write_json_atomic(self.shoppinglist_file, data)
+
+    def set_shopping_list(self, date, items):
+        data = self.load_shopping_lists()
+        data[date] = items
+        self.replace_shopping_lists(data)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    title_key TEXT NOT NULL UNIQUE,
+    description TEXT,
+    servings REAL,
+    cuisine TEXT,
+    cuisine_key TEXT,
+    category TEXT,
+    category_key TEXT,
+    rating REAL,
+    notes TEXT,
+    image_path TEXT,
+    total_cost REAL
+);
+CREATE INDEX IF NOT EXISTS idx_recipes_cuisine ON recipes (cuisine_key);
+CREATE INDEX IF NOT EXISTS idx_recipes_category ON recipes (category_key);
+CREATE INDEX IF NOT EXISTS idx_recipes_rating ON recipes (rating);
+
+CREATE TABLE IF NOT EXISTS ingredients (
+    recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT,
+    quantity REAL,
+    unit TEXT,
+    cost_per_unit REAL,
+    PRIMARY KEY (recipe_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS steps (
+    recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text TEXT,
+    PRIMARY KEY (recipe_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS planned_meals (
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    recipe_id INTEGER,
+    servings REAL,
+    PRIMARY KEY (date, position)
+);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS shopping_lists (
+    date TEXT PRIMARY KEY,
+    items TEXT NOT NULL
+);
+"""
+
+RECIPE_COLUMNS = "id, title, description, servings, cuisine, category, rating, notes, image_path, total_cost"
+CHUNK = 500   #ids per IN (...) query, well under SQLite's parameter limit
+
+
+def _number(value):
+    #keep whole numbers as ints so loaded recipes look like the JSON ones
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+#normalized SQLite database, lookups and filters run as indexed queries
+class SqliteStorage(Storage):
+    def __init__(self, path="recipes.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(planned_meals)")]
+        for column, kind in (("recipe_id", "INTEGER"), ("servings", "REAL")):
+            if column not in columns:
+                #databases made before meal plans held recipe ids and servings
+                self.conn.execute(f"ALTER TABLE planned_meals ADD COLUMN {column} {kind}")
+        self._batching = 0   #depth of open batch() blocks
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        #commit each change on its own, unless it is part of a batch
+        try:
+            yield
+        except BaseException:
+            if not self._batching:
+                self.conn.rollback()
+            raise
+        if not self._batching:
+            self.conn.commit()
+
+    @contextmanager
+    def batch(self):
+        #one transaction (and one disk sync) for everything inside the block
+        self._batching += 1
+        try:
+            yield
+        finally:
+            self._batching -= 1
+        if not self._batching:
+            self.conn.commit()
+
+    def _hydrate(self, rows):
+        # Time Complexity: O(r + i + s)
+        # r = recipes, i = their ingredients, s = their steps, fetched with one query per chunk
+
+        #turn recipe rows into the same dictionaries Recipe.to_dict makes
+        ingredients = {}
+        steps = {}
+        ids = [row[0] for row in rows]
+        for start in range(0, len(ids), CHUNK):
+            chunk = ids[start:start + CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for recipe_id, name, quantity, unit, cost in self.conn.execute(
+                    f"SELECT recipe_id, name, quantity, unit, cost_per_unit FROM ingredients "
+                    f"WHERE recipe_id IN ({marks}) ORDER BY recipe_id, position", chunk):
+                ingredients.setdefault(recipe_id, []).append(
+                    {"name": name, "quantity": quantity, "unit": unit, "cost_per_unit": cost})
+            for recipe_id, text in self.conn.execute(
+                    f"SELECT recipe_id, text FROM steps WHERE recipe_id IN ({marks}) ORDER BY recipe_id, position", chunk):
+                steps.setdefault(recipe_id, []).append(text)
+
+        recipes = []
+        for recipe_id, title, description, servings, cuisine, category, rating, notes, image_path, total_cost in rows:
+            recipe_data = {
+                "id": recipe_id,
+                "title": title,
+                "description": description,
+                "servings": _number(servings),
+                "cuisine": cuisine,
+                "category": category,
+                "ingredients": ingredients.get(recipe_id, []),
+                "steps": steps.get(recipe_id, []),
+                "total_cost": total_cost,
+            }
+            if rating is not None:
+                recipe_data["rating"] = rating
+            if notes:
+                recipe_data["notes"] = notes
+            if image_path:
+                recipe_data["image_path"] = image_path
+            recipes.append(recipe_data)
+        return recipes
+
+    def load_recipes(self):
+        rows = self.conn.execute(f"SELECT {RECIPE_COLUMNS} FROM recipes ORDER BY id").fetchall()
+        return self._hydrate(rows)
+
+    def load_recipe_summaries(self):
+        # Time Complexity: O(n)
+        #only the recipes table is read, ingredients and steps stay in the database
+        rows = self.conn.execute(f"SELECT {', '.join(SUMMARY_FIELDS)} FROM recipes ORDER BY id")
+        summaries = []
+        for row in rows:
+            summary = dict(zip(SUMMARY_FIELDS, row))
+            summary["servings"] = _number(summary["servings"])
+            summaries.append(summary)
+        return summaries
+
+    def ingredient_names(self):
+        # Time Complexity: O(n + i)
+        #one query over the ingredient names, no recipe is built
+        names = {}
+        for recipe_id, name in self.conn.execute(
+                "SELECT recipes.id, ingredients.name FROM recipes LEFT JOIN ingredients ON ingredients.recipe_id = recipes.id "
+                "ORDER BY recipes.id, ingredients.position"):
+            found = names.setdefault(recipe_id, [])
+            if name:
+                found.append(name)
+        return names
+
+    def _write_recipe(self, recipe, recipe_id=None):
+        values = (
+            recipe["title"], _key(recipe["title"]), recipe.get("description", ""), recipe.get("servings", 1),
+            recipe.get("cuisine", ""), _key(recipe.get("cuisine")), recipe.get("category", ""), _key(recipe.get("category")),
+            recipe.get("rating"), recipe.get("notes"), recipe.get("image_path"), recipe.get("total_cost", 0.0),
+        )
+        if recipe_id is None:
+            #the row id is the recipe's id, a recipe without one is numbered by SQLite
+            recipe_id = self.conn.execute(
+                "INSERT INTO recipes (id, title, title_key, description, servings, cuisine, cuisine_key, category, "
+                "category_key, rating, notes, image_path, total_cost) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (recipe.get("id") if recipe.get("id") is not None else self.next_recipe_id(),) + values).lastrowid
+            self._keep_next_id(recipe_id + 1)
+        else:
+            self.conn.execute(
+                "UPDATE recipes SET title = ?, title_key = ?, description = ?, servings = ?, cuisine = ?, "
+                "cuisine_key = ?, category = ?, category_key = ?, rating = ?, notes = ?, image_path = ?, "
+                "total_cost = ? WHERE id = ?", values + (recipe_id,))
+            self.conn.execute("DELETE FROM ingredients WHERE recipe_id = ?", (recipe_id,))
+            self.conn.execute("DELETE FROM steps WHERE recipe_id = ?", (recipe_id,))
+        self.conn.executemany(
+            "INSERT INTO ingredients (recipe_id, position, name, quantity, unit, cost_per_unit) VALUES (?, ?, ?, ?, ?, ?)",
+            [(recipe_id, i, ing.get("name"), ing.get("quantity"), ing.get("unit"), ing.get("cost_per_unit", 0.0))
+             for i, ing in enumerate(recipe.get("ingredients", []))])
+        self.conn.executemany(
+            "INSERT INTO steps (recipe_id, position, text) VALUES (?, ?, ?)",
+            [(recipe_id, i, step) for i, step in enumerate(recipe.get("steps", []))])
+
+    def next_recipe_id(self):
+        # Time Complexity: O(log n)
+        #the highest id is kept in the counters table, deleting the recipe holding it does not lower it
+        row = self.conn.execute(
+            "SELECT MAX(COALESCE((SELECT value FROM counters WHERE name = 'next_recipe_id'), 1), "
+            "COALESCE((SELECT MAX(id) FROM recipes), 0) + 1)").fetchone()
+        return row[0]
+
+    def _keep_next_id(self, next_id):
+        self.conn.execute(
+            "INSERT INTO counters (name, value) VALUES ('next_recipe_id', ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = MAX(value, excluded.value)", (next_id,))
+
+    def replace_recipes(self, recipes, next_id=1):
+        with self._transaction():
+            self._keep_next_id(next_id)
+            self.conn.execute("DELETE FROM recipes")
+            seen = set()
+            for recipe in recipes:
+                key = _key(recipe.get("title"))
+                if key and key not in seen:   #the first recipe with a title wins, like RecipeManager
+                    seen.add(key)
+                    self._write_recipe(recipe)
+
+    def put_recipe(self, recipe, old_title=None):
+        # Time Complexity: O(log n + m)
+        # m = ingredients and steps of the recipe
+        with self._transaction():
+            row = self.conn.execute("SELECT id FROM recipes WHERE title_key = ?", (_key(old_title or recipe["title"]),)).fetchone()
+            if row is None and old_title:
+                row = self.conn.execute("SELECT id FROM recipes WHERE title_key = ?", (_key(recipe["title"]),)).fetchone()
+            self._write_recipe(recipe, row[0] if row else None)
+
+    def delete_recipe(self, title):
+        with self._transaction():
+            self.conn.execute("DELETE FROM recipes WHERE title_key = ?", (_key(title),))
+
+    def get_recipe(self, title):
+        # Time Complexity: O(log n + m)
+        rows = self.conn.execute(f"SELECT {RECIPE_COLUMNS} FROM recipes WHERE title_key = ?", (_key(title),)).fetchall()
+        found = self._hydrate(rows)
+        return found[0] if found else None
+
+    def get_recipe_by_id(self, recipe_id):
+        # Time Complexity: O(log n + m)
+        rows = self.conn.execute(f"SELECT {RECIPE_COLUMNS} FROM recipes WHERE id = ?", (recipe_id,)).fetchall()
+        found = self._hydrate(rows)
+        return found[0] if found else None
+
+    @staticmethod
+    def _filter_where(cuisine, category, rating):
+        clauses = []
+        params = []
+        if cuisine:
+            clauses.append("cuisine_key = ?")
+            params.append(_key(cuisine))
+        if category:
+            clauses.append("category_key = ?")
+            params.append(_key(category))
+        if rating:
+            clauses.append("rating >= ?")
+            params.append(rating)
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def filter_recipes(self, cuisine=None, category=None, rating=None):
+        # Time Complexity: O(log n + k)
+        # k = number of matching recipes
+        where, params = self._filter_where(cuisine, category, rating)
+        rows = self.conn.execute(f"SELECT {RECIPE_COLUMNS} FROM recipes{where} ORDER BY id", params).fetchall()
+        return self._hydrate(rows)
+
+    def filter_recipe_ids(self, cuisine=None, category=None, rating=None):
+        # Time Complexity: O(log n + k)
+        #only the recipes table is read, through the cuisine, category and rating indexes
+        where, params = self._filter_where(cuisine, category, rating)
+        return [row[0] for row in self.conn.execute(f"SELECT id FROM recipes{where} ORDER BY id", params)]
+
+    def load_meal_plan(self):
+        return {"planned_meals": self._days("SELECT date, title, recipe_id, servings FROM planned_meals ORDER BY date, position")}
+
+    def _days(self, query, params=()):
+        days = {}
+        for date, title, recipe_id, servings in self.conn.execute(query, params):
+            meal = {}
+            if recipe_id is not None:
+                meal["id"] = recipe_id
+            if title:
+                meal["title"] = title
+            if servings is not None:
+                meal["servings"] = _number(servings)
+            if len(meal) == 1:
+                meal = recipe_id if recipe_id is not None else title   #a bare id is a row saved before titles were kept with ids
+            days.setdefault(date, []).append(meal)
+        return days
+
+    def replace_meal_plan(self, data):
+        with self._transaction():
+            self.conn.execute("DELETE FROM planned_meals")
+            for date, titles in data.get("planned_meals", {}).items():
+                self._insert_day(date, titles)
+
+    def _insert_day(self, date, meals):
+        #a meal is {"id": ..., "title": ...} (and "servings"), a title when no recipe has it, or a bare recipe id
+        rows = []
+        for i, meal in enumerate(meals):
+            recipe_id, title, servings = None, meal, None
+            if isinstance(meal, dict):
+                recipe_id, title, servings = meal.get("id"), meal.get("title"), meal.get("servings")
+            elif isinstance(meal, int):
+                recipe_id, title = meal, None
+            if recipe_id is not None or title:
+                rows.append((date, i, title or "", recipe_id, servings))
+        self.conn.executemany(
+            "INSERT INTO planned_meals (date, position, title, recipe_id, servings) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def set_day(self, date, meals):
+        with self._transaction():
+            self.conn.execute("DELETE FROM planned_meals WHERE date = ?", (date,))
+            self._insert_day(date, meals)
+
+    def meals_between(self, start, end):
+        # Time Complexity: O(log n + k)
+        # uses the (date, position) primary key as the date index
+        return self._days(
+            "SELECT date, title, recipe_id, servings FROM planned_meals WHERE date BETWEEN ? AND ? ORDER BY date, position", (start, end))
+
+    def load_shopping_lists(self):
+        return {date: json.loads(items) for date, items in self.conn.execute("SELECT date, items FROM shopping_lists ORDER BY date")}
+
+    def replace_shopping_lists(self, data):
+        with self._transaction():
+            self.conn.execute("DELETE FROM shopping_lists")
+            self.conn.executemany("INSERT INTO shopping_lists (date, items) VALUES (?, ?)",
+                                  [(date, json.dumps(items)) for date, items in data.items()])
+
+    def set_shopping_list(self, date, items):
+        with self._transaction():
+            self.conn.execute("INSERT OR REPLACE INTO shopping_lists (date, items) VALUES (?, ?)", (date, json.dumps(items)))
+
+
+def copy_storage(source, target):
+    # Time Complexity: O(n)
+
+    #copy every recipe, meal plan and shopping list from one backend to another
+    target.replace_recipes(source.load_recipes(), source.next_recipe_id())
+    target.replace_meal_plan(source.load_meal_plan())
+    target.replace_shopping_lists(source.load_shopping_lists())
+
+
+def import_json(target, recipes_file="recipes.json", mealplan_file="mealplan.json", shoppinglist_file="shoppinglist.json"):
+    #load the JSON files into another backend, e.g. import_json(SqliteStorage("recipes.db"))
+    copy_storage(JsonStorage(recipes_file, mealplan_file, shoppinglist_file), target)
+
+
+def export_json(source, recipes_file="recipes.json", mealplan_file="mealplan.json", shoppinglist_file="shoppinglist.json"):
+    #write a backend's data back out as the JSON files
+    copy_storage(source, JsonStorage(recipes_file, mealplan_file, shoppinglist_file))
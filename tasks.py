@@ -0,0 +1,104 @@
+#runs slow work (optimising, loading, building big shopping lists) off the GUI thread
+#no tkinter here: the GUI calls poll() from root.after, and every callback runs inside poll(),
+#so callbacks can touch widgets and the managers without any locking
+#work functions run on a worker while the GUI thread keeps using the managers, so they must not
+#touch shared managers or recipes: hand them a copy made before submitting, e.g. RecipeManager.prepare_cheapest_meals
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+#one submitted piece of work, handed to the work function so it can report progress and notice cancellation
+class Task:
+    __slots__ = ("name", "cancelled", "done", "total")
+
+    def __init__(self, name):
+        self.name = name
+        self.cancelled = False
+        self.done = 0
+        self.total = 0
+
+    def cancel(self):
+        self.cancelled = True
+
+    def report(self, done, total):
+        #called by the work function as it goes, raises TaskCancelled once the task is cancelled
+        self.done, self.total = done, total
+        if self.cancelled:
+            raise TaskCancelled(self.name)
+
+
+#thread pool with one live task per name: submitting a name again cancels the older task
+#and its result is dropped, so the GUI only ever shows the answer to the latest request
+class TaskRunner:
+    def __init__(self, workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="task")
+        self._finished = queue.SimpleQueue()   #(task, result, error) put by the workers
+        self._latest = {}   #name -> newest Task with that name still running
+        self._callbacks = {}   #Task -> (on_done, on_error, on_progress)
+
+    def submit(self, name, work, on_done, on_error=None, on_progress=None):
+        # Time Complexity: O(1) here, the work runs on a worker thread
+
+        #run work(task) on a worker, then on_done(result) or on_error(exception) from poll()
+        #on_progress(done, total) is called from poll() while the task is running
+        self.cancel(name)
+        task = Task(name)
+        self._latest[name] = task
+        self._callbacks[task] = (on_done, on_error, on_progress)
+
+        def run():
+            try:
+                self._finished.put((task, work(task), None))
+            except Exception as e:
+                self._finished.put((task, None, e))
+
+        self._pool.submit(run)
+        return task
+
+    def cancel(self, name):
+        #ask a running task to stop, its result is dropped either way
+        task = self._latest.pop(name, None)
+        if task is not None:
+            task.cancel()
+
+    def cancel_all(self):
+        for name in list(self._latest):
+            self.cancel(name)
+
+    def busy(self, name=None):
+        return name in self._latest if name is not None else bool(self._latest)
+
+    def poll(self):
+        # Time Complexity: O(finished tasks + running tasks)
+
+        #deliver finished results and progress, return True while tasks are still running
+        while True:
+            try:
+                task, result, error = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            on_done, on_error, _ = self._callbacks.pop(task)
+            if task.cancelled or self._latest.get(task.name) is not task:
+                continue   #superseded or cancelled, nobody is waiting for this any more
+            del self._latest[task.name]
+            if error is None:
+                on_done(result)
+            elif on_error is not None:
+                on_error(error)
+            else:
+                print(f"Error in background task {task.name}: {error}")
+        for task in list(self._latest.values()):
+            on_progress = self._callbacks[task][2]
+            if on_progress is not None and task.total:
+                on_progress(task.done, task.total)
+        return bool(self._latest)
+
+    def shutdown(self, wait=True):
+        #cancel everything still running, wait=True blocks until the workers have stopped
+        self.cancel_all()
+        self._pool.shutdown(wait=wait)
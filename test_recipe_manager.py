@@ -1,6 +1,26 @@
+import datetime
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
 import unittest
-from recipe import Recipe, Ingredient
-from manager import RecipeManager, MealPlanner, ShoppingListGenerator
+import journal
+from recipe import Recipe, Ingredient, lazy_recipes_from_json
+from manager import RecipeManager, MealPlanner, ShoppingListGenerator, ShoppingListManager
+from optimiser import cheapest_meals
+from feed import read_json_lines
+from shopping_list import ShoppingItem
+from list_view import RecipeListModel
+from tasks import TaskRunner
+from autosave import AutosaveWriter
+from typeahead import TypeaheadSearch
+from fuzzy_index import TrigramIndex, edit_distance
+from storage import SqliteStorage, import_json, export_json
+from cli import main as cli_main
+from bench_import import import_times, CORE_MODULES, GUI_MODULES
 
 class TestRecipeManager(unittest.TestCase):
 
@@ -29,6 +49,70 @@ class TestRecipeManager(unittest.TestCase):
         self.assertIsNotNone(found)
         self.assertEqual(found.title, "Test Recipe")
 
+    def test_title_lookup_ignores_case(self):
+        self.assertIs(self.manager.get_recipe_by_title("test RECIPE"), self.recipe)
+
+    def test_add_duplicate_title_is_rejected(self):
+        duplicate = Recipe("TEST recipe", "", 1, "", "")
+        self.assertFalse(self.manager.add_recipe(duplicate))
+        self.assertNotIn(duplicate, self.manager.recipes)
+
+    def test_remove_recipe_updates_index(self):
+        self.manager.remove_recipe("test recipe")
+        self.assertIsNone(self.manager.get_recipe_by_title("Test Recipe"))
+        self.assertNotIn(self.recipe, self.manager.recipes)
+
+    def test_update_recipe_rename_moves_index(self):
+        self.assertTrue(self.manager.update_recipe(self.recipe, title="Renamed Recipe"))
+        self.assertIsNone(self.manager.get_recipe_by_title("Test Recipe"))
+        self.assertIs(self.manager.get_recipe_by_title("renamed recipe"), self.recipe)
+
+    def test_search_ranks_title_matches_first(self):
+        flour_cake = Recipe("Flour Cake", "", 1, "", "", ingredients=[Ingredient("Eggs", 2, "")])
+        self.manager.add_recipe(flour_cake)
+        results = self.manager.search_recipes("flour")
+        self.assertEqual(results[:2], [flour_cake, self.recipe])
+
+    def test_search_requires_every_term(self):
+        self.assertIn(self.recipe, self.manager.search_recipes("flour sug"))
+        self.assertNotIn(self.recipe, self.manager.search_recipes("flour butter"))
+
+    def test_search_follows_edits(self):
+        self.manager.update_recipe(self.recipe, ingredients=[Ingredient("Butter", 1, "kg")])
+        self.assertNotIn(self.recipe, self.manager.search_recipes("flour"))
+        self.assertIn(self.recipe, self.manager.search_recipes("butter"))
+
+    def test_filter_recipes_by_facets(self):
+        rated = Recipe("Rated Test", "", 2, "test cuisine", "TEST", rating=8)
+        self.manager.add_recipe(rated)
+        self.assertEqual(self.manager.filter_recipes(cuisine="Test Cuisine", category="test"), [self.recipe, rated])
+        self.assertEqual(self.manager.filter_recipes(cuisine="Test Cuisine", rating=7), [rated])
+        self.assertEqual(self.manager.count_recipes(cuisine="TEST CUISINE", category="Test"), 2)
+        self.assertEqual(self.manager.facet_counts("category", cuisine="test cuisine"), {"Test": 2})
+
+    def test_filter_follows_edits(self):
+        self.manager.update_recipe(self.recipe, cuisine="Other")
+        self.assertEqual(self.manager.filter_recipes(cuisine="Test Cuisine"), [])
+        self.assertEqual(self.manager.filter_recipes(cuisine="other"), [self.recipe])
+
+class TestCompactRecipe(unittest.TestCase):
+
+    def test_slotted_attributes_still_work(self):
+        ing = Ingredient("Flour", 1, "kg")
+        ing.quantity = 2
+        self.assertEqual(ing.display(), "2 kg Flour")
+        self.assertFalse(hasattr(ing, "__dict__"))
+        recipe = Recipe("Bread", "", 1, "French", "Bakery")
+        recipe.rating = 5
+        self.assertEqual(recipe.to_dict()["rating"], 5)
+
+    def test_repeated_strings_are_shared(self):
+        a = Ingredient("".join(["Flo", "ur"]), 1, "".join(["k", "g"]))
+        b = Ingredient("".join(["Fl", "our"]), 1, "".join(["", "kg"]))
+        self.assertIs(a.name, b.name)
+        self.assertIs(a.unit, b.unit)
+
+
 class TestMealPlanner(unittest.TestCase):
 
     def setUp(self):
@@ -52,6 +136,111 @@ class TestMealPlanner(unittest.TestCase):
         self.assertIn(self.recipe, meals)
 
 
+class TestPlanDates(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.planner = MealPlanner(recipe_manager=None)
+        for day in ("2025-06-02", "2025-05-31", "2025-05-26", "2025-05-01", "2025-06-01"):
+            self.planner.add_meal(day, f"Meal {day}")
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def dates(self, pairs):
+        return [day.isoformat() for day, _ in pairs]
+
+    def test_range_queries(self):
+        self.assertEqual(self.dates(self.planner.meals_between("2025-05-26", "2025-06-01")), ["2025-05-26", "2025-05-31", "2025-06-01"])
+        self.assertEqual(self.dates(self.planner.meals_in_week("2025-05-28")), ["2025-05-26", "2025-05-31", "2025-06-01"])
+        self.assertEqual(self.dates(self.planner.meals_in_month("2025-05-15")), ["2025-05-01", "2025-05-26", "2025-05-31"])
+        self.assertEqual(self.dates(self.planner.upcoming_meals(2, start="2025-06-01")), ["2025-06-01", "2025-06-02"])
+
+    def test_ids_of_deleted_recipes_are_not_reused(self):
+        recipes = RecipeManager()
+        recipes.add_recipe(Recipe("Soup", "", 2, "", ""))
+        recipes.add_recipe(Recipe("Stew", "", 2, "", ""))
+        recipes.remove_recipe("Stew")
+        recipes.save_to_file()
+        for lazy in (False, True):
+            reloaded = RecipeManager(lazy=lazy)
+            reloaded.add_recipe(Recipe("Salad", "", 1, "", ""))
+            self.assertEqual(reloaded.get_recipe_by_title("Salad").recipe_id, 3)
+
+    def test_plan_is_saved_by_recipe_id(self):
+        recipes = RecipeManager()
+        recipes.add_recipe(Recipe("Soup", "", 2, "", ""))
+        recipes.add_recipe(Recipe("Stew", "", 2, "", ""))
+        with open("mealplan.json", "w") as f:
+            f.write('{"planned_meals": {"2025-05-10": ["soup", "Toast"]}}')   #older files hold titles
+        planner = MealPlanner(recipes)
+        soup = recipes.get_recipe_by_title("Soup")
+        self.assertIs(planner.get_meals_for_date("2025-05-10")[0], soup)
+        planner.add_meal("2025-05-10", "stew")
+        recipes.update_recipe(soup, title="Leek Soup")
+        recipes.save_to_file()
+        planner.save_to_file()
+
+        reloaded = RecipeManager()
+        meals = MealPlanner(reloaded).get_meals_for_date("2025-05-10")
+        self.assertEqual([MealPlanner._meal_title(m) for m in meals], ["Leek Soup", "Toast", "Stew"])
+        self.assertIs(meals[0], reloaded.get_recipe_by_id(soup.recipe_id))
+
+    def test_meal_of_a_deleted_recipe_keeps_its_title(self):
+        recipes = RecipeManager()
+        recipes.add_recipe(Recipe("Soup", "", 2, "", ""))
+        planner = MealPlanner(recipes)
+        planner.add_meal("2025-05-10", "Soup")
+        planner.add_meal("2025-05-11", "Soup", servings=4)
+        recipes.remove_recipe("Soup")
+        recipes.save_to_file()
+        planner.save_to_file()
+
+        reloaded = MealPlanner(RecipeManager())
+        output = io.StringIO()
+        sys.stdout, old_stdout = output, sys.stdout
+        try:
+            reloaded.display_schedule()
+        finally:
+            sys.stdout = old_stdout
+        self.assertEqual(output.getvalue().count(" - Soup"), 2)
+        reloaded.remove_meal("2025-05-10", "soup")
+        self.assertEqual(reloaded.get_meals_for_date("2025-05-10"), [])
+
+    def test_scaled_meals(self):
+        recipes = RecipeManager()
+        soup = Recipe("Soup", "", 2, "", "", ingredients=[Ingredient("Leek", 200, "g", 0.01)])
+        recipes.add_recipe(soup)
+        lists = ShoppingListManager()
+        planner = MealPlanner(recipes, shopping_lists=lists)
+        planner.add_meal("2025-05-10", soup, servings=6)
+        planner.add_meal("2025-05-10", soup)
+        view = planner.get_meals_for_date("2025-05-10")[0]
+        self.assertEqual((view.servings, view.ingredients[0].quantity), (6, 600))
+        self.assertEqual((soup.servings, soup.ingredients[0].quantity), (2, 200))   #the recipe is not changed
+        self.assertAlmostEqual(view.scaled(1).ingredients[0].quantity, 100)
+        self.assertAlmostEqual(recipes.recipe_cost(view), 6.0)
+        self.assertEqual(lists.get_list("2025-05-10")[0].quantity, 800)
+        recipes.save_to_file()
+        planner.save_to_file()
+
+        reloaded = RecipeManager()
+        meals = MealPlanner(reloaded).get_meals_for_date("2025-05-10")
+        self.assertEqual([m.servings for m in meals], [6, 2])
+        planner.remove_meal("2025-05-10", "soup")
+        self.assertEqual(lists.get_list("2025-05-10"), [])
+
+    def test_dates_are_validated(self):
+        with self.assertRaises(ValueError):
+            self.planner.add_meal("31/05/2025", "Soup")
+        self.assertEqual(self.planner.get_meals_for_date("not a date"), [])
+        self.planner.remove_meal("2025-05-31", "meal 2025-05-31")
+        self.assertEqual(list(self.planner.to_dict()["planned_meals"]), ["2025-05-01", "2025-05-26", "2025-06-01", "2025-06-02"])
+
+
 class TestShoppingListGenerator(unittest.TestCase):
 
     def test_generate_list_output(self):
@@ -69,6 +258,851 @@ class TestShoppingListGenerator(unittest.TestCase):
         result = generator.generate_list([recipe])
         self.assertIn("1.00 kg Rice", result)
 
+    def test_items_are_merged_with_cost(self):
+        rice = Recipe("Rice", "", 1, "", "", ingredients=[Ingredient("Rice", 1, "kg", 2), Ingredient("rice", 0.5, "kg", 2)])
+        items = ShoppingListGenerator(recipe_manager=None).generate_items([rice, rice])
+        self.assertEqual([(i.name, i.unit, i.quantity, i.cost) for i in items], [("Rice", "g", 3000.0, 6.0)])
+
+    def test_units_are_converted_and_unitless_items_kept(self):
+        cake = Recipe("Cake", "", 1, "", "", ingredients=[
+            Ingredient("Flour", 500, "g"), Ingredient("flour", 1, "Kg"), Ingredient("Milk", 1, "cup"),
+            Ingredient("Milk", 2, "tbsp"), Ingredient("Eggs", 2, ""), Ingredient("Eggs", 1, None), Ingredient("Saffron", 1, "pinch")])
+        result = ShoppingListGenerator(recipe_manager=None).generate_list([cake])
+        self.assertEqual(result, ["1.50 kg Flour", "270.00 ml Milk", "3.00 pcs Eggs", "1.00 pinch Saffron"])
+
+
+class TestShoppingListManager(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_get_list_returns_only_that_date(self):
+        lists = ShoppingListManager()
+        lists.save_list("2025-05-10", [ShoppingItem("Rice", "kg", 1, 2.0)])
+        lists.save_list("2025-05-11", [ShoppingItem("Milk", "l", 1, 1.0)])
+        self.assertEqual([i.name for i in lists.get_list("2025-05-11")], ["Milk"])
+        self.assertEqual(lists.get_list("2025-05-12"), [])
+
+    def test_consolidate_date_range(self):
+        lists = ShoppingListManager()
+        for day, rice in (("2025-05-12", 1), ("2025-05-10", 2), ("2025-05-11", 3), ("2025-06-01", 4)):
+            lists.save_list(day, [ShoppingItem("Rice", "kg", rice, rice * 2.0), ShoppingItem("Milk", "l", 1, 1.0)])
+        week = lists.consolidate("2025-05-10", "2025-05-16")
+        self.assertEqual([i.display() for i in week.items()], ["6.00 kg Rice", "3.00 l Milk"])
+        self.assertEqual(week.total_cost, 15.0)
+        self.assertEqual(lists.consolidate(datetime.date(2025, 5, 11), datetime.date(2025, 5, 12)).total_cost, 10.0)
+        with self.assertRaises(ValueError):
+            lists.consolidate("2025-5-1", "2025-05-16")
+
+    def test_plan_edits_update_lists_by_delta(self):
+        recipes = RecipeManager()
+        soup = Recipe("Soup", "", 2, "", "", ingredients=[Ingredient("Leek", 2, "pcs", 0.5), Ingredient("Stock", 1, "l")])
+        recipes.add_recipe(soup)
+        lists = ShoppingListManager()
+        planner = MealPlanner(recipes, shopping_lists=lists)
+        planner.add_meal("2025-05-10", soup)
+        planner.add_meal("2025-05-10", "Soup")
+        self.assertEqual([i.display() for i in lists.get_list("2025-05-10")], ["4.00 pcs Leek", "2.00 l Stock"])
+        self.assertEqual(lists.list_by_date["2025-05-10"].total_cost, 2.0)
+
+        recipes.update_recipe(soup, title="Leek Soup", ingredients=[Ingredient("Leek", 3, "pcs", 0.5)])
+        self.assertEqual([i.display() for i in lists.get_list("2025-05-10")], ["6.00 pcs Leek"])
+        self.assertEqual(planner.get_meals_for_date("2025-05-10"), [soup, soup])
+
+        planner.remove_meal("2025-05-10", "leek soup")
+        self.assertEqual(lists.get_list("2025-05-10"), [])
+        self.assertEqual(lists.list_by_date["2025-05-10"].total_cost, 0.0)
+
+    def test_dates_without_a_list_are_rebuilt_not_negative(self):
+        recipes = RecipeManager()
+        soup = Recipe("Soup", "", 2, "", "", ingredients=[Ingredient("Leek", 2, "pcs", 0.5)])
+        stew = Recipe("Stew", "", 2, "", "", ingredients=[Ingredient("Beef", 500, "g")])
+        recipes.add_recipe(soup)
+        recipes.add_recipe(stew)
+        planner = MealPlanner(recipes)   #planned before any shopping lists were kept
+        for day in ("2025-05-10", "2025-05-11", "2025-05-12"):
+            planner.add_meal(day, soup)
+            planner.add_meal(day, stew)
+        planner.save_to_file()
+        lists = ShoppingListManager()
+        planner = MealPlanner(recipes, shopping_lists=lists)
+
+        planner.remove_meal("2025-05-10", "Soup")
+        self.assertEqual([i.display() for i in lists.get_list("2025-05-10")], ["500.00 g Beef"])
+        planner.add_meal("2025-05-11", soup)
+        self.assertEqual([i.display() for i in lists.get_list("2025-05-11")], ["4.00 pcs Leek", "500.00 g Beef"])
+        recipes.update_recipe(soup, ingredients=[Ingredient("Leek", 3, "pcs")])
+        self.assertEqual([i.display() for i in lists.get_list("2025-05-12")], ["3.00 pcs Leek", "500.00 g Beef"])
+        self.assertEqual(sorted(i.display() for i in lists.get_list("2025-05-11")), ["500.00 g Beef", "6.00 pcs Leek"])
+
+    def test_old_text_lists_are_read(self):
+        with open("shoppinglist.json", "w") as f:
+            f.write('{"2025-05-10": ["1.50 kg Rice", "2.00 tablespoon Olive Oil"]}')
+        items = ShoppingListManager().get_list("2025-05-10")
+        self.assertEqual([(i.name, i.unit, i.quantity) for i in items], [("Rice", "g", 1500.0), ("Olive Oil", "ml", 30.0)])
+        self.assertEqual(items[0].display(), "1.50 kg Rice")
+
+class TestRecursiveIngredients(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = RecipeManager()
+        self.sauce = Recipe("Test Sauce", "", 4, "", "", ingredients=[
+            Ingredient("Tomato", 4, "pcs"),
+            Ingredient("Salt", 1, "tsp"),
+        ])
+        self.pasta = Recipe("Test Pasta", "", 2, "", "", ingredients=[
+            Ingredient("Pasta", 200, "g"),
+            Ingredient("Test Sauce", 2, "servings"),
+            Ingredient("Salt", 1, "tsp"),
+        ])
+        self.manager.add_recipe(self.sauce)
+        self.manager.add_recipe(self.pasta)
+
+    def flat(self, title, servings=None):
+        return {(i.name, i.unit): i.quantity for i in self.manager.get_all_ingredients_recursive(title, servings)}
+
+    def test_sub_recipe_quantities_are_scaled(self):
+        self.assertEqual(self.flat("Test Pasta"), {("Pasta", "g"): 200, ("Tomato", "pcs"): 2, ("Salt", "tsp"): 1.5})
+
+    def test_scaled_to_servings(self):
+        self.assertEqual(self.flat("test pasta", servings=4)[("Pasta", "g")], 400)
+
+    def test_editing_sub_recipe_refreshes_parent(self):
+        self.flat("Test Pasta")
+        self.manager.update_recipe(self.sauce, ingredients=[Ingredient("Tomato", 8, "pcs")])
+        self.assertEqual(self.flat("Test Pasta")[("Tomato", "pcs")], 4)
+
+    def test_cycle_is_reported(self):
+        self.manager.update_recipe(self.sauce, ingredients=[Ingredient("Test Pasta", 1, "batch")])
+        with self.assertRaises(ValueError):
+            self.manager.get_all_ingredients_recursive("Test Pasta")
+
+    def test_ingredient_named_like_its_recipe_is_raw(self):
+        pasta = Recipe("Pasta", "", 2, "", "", ingredients=[Ingredient("Pasta", 200, "g", 0.01), Ingredient("Salt", 1, "tsp")])
+        self.manager.add_recipe(pasta)
+        self.assertEqual(self.flat("Pasta"), {("Pasta", "g"): 200, ("Salt", "tsp"): 1})
+        self.assertAlmostEqual(self.manager.recipe_cost(pasta), 2.0)
+        self.assertIsNone(self.manager._graph.find_cycle("Pasta"))
+
+    def test_cost_rolls_up_through_sub_recipes(self):
+        self.assertEqual(self.manager.recipe_cost(self.pasta), 0.0)   #nothing priced and no total typed in
+        self.manager.reprice_ingredients({"tomato": 0.5, "Salt": 0.1, "Pasta": 0.01})
+        self.assertAlmostEqual(self.manager.recipe_cost(self.sauce), 2.1)
+        self.assertAlmostEqual(self.manager.recipe_cost("Test Pasta"), 2 + 2.1 / 2 + 0.1)
+        self.assertAlmostEqual(self.manager.recipe_cost(self.pasta, servings=4), 2 * (2 + 2.1 / 2 + 0.1))
+
+    def test_unpriced_sub_recipe_keeps_typed_total(self):
+        self.manager.update_recipe(self.pasta, total_recipe_cost=5.0)
+        self.assertEqual(self.manager.recipe_cost(self.pasta), 5.0)   #the sauce has no prices either
+        self.manager.update_recipe(self.sauce, total_recipe_cost=2.0)
+        self.assertEqual(self.manager.recipe_cost(self.pasta), 5.0)
+        self.manager.reprice_ingredients({"Tomato": 0.5})
+        self.assertAlmostEqual(self.manager.recipe_cost(self.pasta), 2.0 / 2)   #priced through the sauce now
+
+    def test_reprice_only_touches_affected_recipes(self):
+        self.manager.reprice_ingredients({"Tomato": 0.5, "Salt": 0.1, "Pasta": 0.01})
+        self.manager.recipe_cost(self.pasta)
+        changed = self.manager.reprice_ingredients({"Tomato": 1.0})
+        self.assertIn(self.sauce, changed)
+        self.assertNotIn(self.pasta, changed)
+        self.assertAlmostEqual(self.manager.recipe_cost(self.pasta), 2 + 4.1 / 2 + 0.1)   #parent costed again through the sauce
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        #work in an empty folder so the real data files are never touched
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_changes_are_replayed_from_journal(self):
+        manager = RecipeManager(journal=True)
+        manager.add_recipe(Recipe("Soup", "", 2, "", ""))
+        manager.add_recipe(Recipe("Salad", "", 1, "", ""))
+        manager.update_recipe(manager.get_recipe_by_title("Soup"), title="Tomato Soup")
+        manager.remove_recipe("Salad")
+        manager.save_to_file()
+        self.assertFalse(os.path.exists("recipes.json"))   #nothing compacted yet
+
+        reloaded = RecipeManager(journal=True)
+        self.assertEqual([r.title for r in reloaded.recipes], ["Tomato Soup"])
+
+    def test_reprice_waits_for_a_running_compaction(self):
+        original = journal.write_json_atomic
+
+        def slow_write(filename, data):
+            time.sleep(0.2)
+            original(filename, data)
+
+        journal.write_json_atomic = slow_write
+        try:
+            manager = RecipeManager(journal=True)
+            manager.add_recipes([{"title": "Soup", "ingredients": [{"name": "Leek", "quantity": 1, "unit": "pcs"}]}])
+            manager.reprice_ingredients({"Leek": 0.5})   #the imported snapshot is still being written
+            manager.save_to_file()
+            manager.journal.close()
+        finally:
+            journal.write_json_atomic = original
+        soup = RecipeManager(journal=True).get_recipe_by_title("Soup")
+        self.assertEqual(soup.ingredients[0].cost_per_unit, 0.5)
+
+    def test_compaction_writes_snapshot(self):
+        planner = MealPlanner(recipe_manager=None, journal=True)
+        planner.journal.compact_every = 2
+        planner.add_meal("2025-05-10", Recipe("Soup", "", 2, "", ""))
+        planner.add_meal("2025-05-10", "Salad")
+        planner.save_to_file()
+        planner.journal.wait()
+        self.assertTrue(os.path.exists("mealplan.json"))
+        self.assertFalse(os.path.exists("mealplan.json.journal.compacting"))
+        planner.remove_meal("2025-05-10", "soup")
+
+        reloaded = MealPlanner(recipe_manager=None, journal=True)
+        self.assertEqual(reloaded.get_meals_for_date("2025-05-10"), ["Salad"])
+
+    def test_duplicate_and_untitled_recipes_are_kept(self):
+        with open("recipes.json", "w") as f:
+            json.dump([{"title": "Soup", "servings": 1}, {"title": "soup", "servings": 2}, {"title": "", "servings": 3}], f)
+        manager = RecipeManager(journal=True)
+        self.assertEqual(len(manager.recipes), 3)
+        self.assertEqual(manager.get_recipe_by_title("SOUP").servings, 1)   #the first title wins
+        manager.save_to_file()
+        manager.journal.close()
+
+        manager = RecipeManager(journal=True)
+        self.assertEqual([r.servings for r in manager.recipes], [1, 2, 3])   #saving did not drop them
+        duplicate, untitled = manager.recipes[1:]
+        self.assertTrue(manager.update_recipe(duplicate, title="Big Soup"))
+        self.assertTrue(manager.update_recipe(untitled, title="Mystery"))
+        manager.save_to_file()
+        manager.journal.close()
+
+        reloaded = RecipeManager(journal=True)
+        self.assertEqual([reloaded.get_recipe_by_title(t).servings for t in ("Soup", "Big Soup", "Mystery")], [1, 2, 3])
+
+    def test_removing_a_title_uncovers_its_duplicate(self):
+        with open("recipes.json", "w") as f:
+            json.dump([{"title": "Soup", "servings": 1}, {"title": "Soup", "servings": 2}], f)
+        manager = RecipeManager()
+        manager.remove_recipe("Soup")
+        self.assertEqual(manager.get_recipe_by_title("Soup").servings, 2)
+
+    def test_shopping_lists_round_trip(self):
+        lists = ShoppingListManager(journal=True)
+        lists.save_list("2025-05-10", ["1.00 kg Rice"])
+        lists.journal.compact(lists.to_dict(), background=False)
+        lists.save_list("2025-05-11", ["2.00 kg Rice"])
+        reloaded = ShoppingListManager(journal=True)
+        self.assertEqual([item.display() for item in reloaded.get_list("2025-05-10")], ["1.00 kg Rice"])
+        self.assertEqual(reloaded.get_list("2025-05-11")[0].quantity, 2000.0)
+
+
+class TestLazyLoading(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        manager = RecipeManager()
+        manager.add_recipe(Recipe("Soup", "Hot", 2, "French", "Dinner", rating=7,
+                                  ingredients=[Ingredient("Leek", 2, "pcs")], steps=["Boil"]))
+        manager.save_to_file()
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_only_summary_is_loaded(self):
+        manager = RecipeManager(lazy=True)
+        soup = manager.get_recipe_by_title("soup")
+        self.assertFalse(soup.is_loaded())
+        self.assertEqual(manager.filter_recipes(cuisine="french", rating=6), [soup])
+        self.assertFalse(soup.is_loaded())
+        self.assertEqual(soup.ingredients[0].name, "Leek")
+        self.assertTrue(soup.is_loaded())
+
+    def test_save_keeps_unloaded_details(self):
+        manager = RecipeManager(lazy=True)
+        manager.update_recipe(manager.get_recipe_by_title("Soup"), rating=9)
+        manager.save_to_file()
+        data = RecipeManager().get_recipe_by_title("Soup").to_dict()
+        self.assertEqual((data["rating"], data["steps"], data["description"]), (9, ["Boil"], "Hot"))
+
+    def test_search_loads_on_demand(self):
+        manager = RecipeManager(lazy=True)
+        self.assertEqual([r.title for r in manager.search_recipes("leek")], ["Soup"])
+
+    def test_recipes_are_read_back_from_the_file(self):
+        with open("recipes.json", "w", encoding="utf-8") as f:
+            json.dump([{"title": "Crème Brûlée", "steps": ["Don't stir ]} \"yet\""], "ingredients": [{"name": "Crème", "quantity": 1, "unit": "l"}]},
+                       {"title": "Tea", "notes": "[{", "ingredients": [{"name": "Leaves", "quantity": 2, "unit": "g"}]}], f, ensure_ascii=False)
+        manager = RecipeManager(lazy=True)
+        tea = manager.get_recipe_by_title("tea")
+        self.assertEqual((tea.ingredients[0].name, tea.notes), ("Leaves", "[{"))
+        self.assertEqual(manager.get_recipe_by_title("crème brûlée").steps, ["Don't stir ]} \"yet\""])
+
+    def test_unopened_recipes_survive_a_rewrite_of_the_file(self):
+        manager = RecipeManager(lazy=True)
+        manager.add_recipe(Recipe("Salad", "", 1, "", "", ingredients=[Ingredient("Feta", 100, "g")]))
+        manager.save_to_file()   #soup is read from the file it is about to replace
+        manager.update_recipe(manager.get_recipe_by_title("Salad"), description="Cold " * 50)
+        manager.save_to_file()   #moves soup to another place in the file
+        soup = manager.get_recipe_by_title("Soup")
+        self.assertFalse(soup.is_loaded())
+        self.assertEqual((soup.description, soup.steps), ("Hot", ["Boil"]))
+
+    def test_a_file_that_is_not_a_list_loads_no_recipes(self):
+        for text in ('"Soup"', "5", '{"recipes": 5}', "[1]"):
+            with open("recipes.json", "w") as f:
+                f.write(text)
+            for lazy in (False, True):
+                output = io.StringIO()
+                sys.stdout, old_stdout = output, sys.stdout
+                try:
+                    manager = RecipeManager(lazy=lazy)
+                finally:
+                    sys.stdout = old_stdout
+                self.assertEqual(manager.recipes, [])
+                self.assertIn("Error decoding JSON", output.getvalue())
+
+
+class TestSqliteStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = SqliteStorage(":memory:")
+        self.manager = RecipeManager(storage=self.storage)
+        self.manager.add_recipe(Recipe("Pasta", "", 2, "Italian", "Dinner", rating=8,
+                                       ingredients=[Ingredient("Spaghetti", 200, "g")], steps=["Boil"]))
+        self.manager.add_recipe(Recipe("Pizza", "", 4, "italian", "Lunch", rating=5))
+
+    def tearDown(self):
+        self.storage.close()
+
+    def test_changes_are_written_through(self):
+        self.manager.update_recipe(self.manager.get_recipe_by_title("Pasta"), title="Pasta Bake")
+        self.manager.remove_recipe("Pizza")
+        reloaded = RecipeManager(storage=self.storage)
+        self.assertEqual([r.title for r in reloaded.recipes], ["Pasta Bake"])
+        self.assertEqual(reloaded.recipes[0].ingredients[0].name, "Spaghetti")
+
+    def test_ids_of_deleted_recipes_are_not_reused(self):
+        self.manager.remove_recipe("Pizza")
+        reloaded = RecipeManager(storage=self.storage)
+        reloaded.add_recipe(Recipe("Salad", "", 1, "", ""))
+        self.assertEqual(reloaded.get_recipe_by_title("Salad").recipe_id, 3)
+        self.storage.put_recipe({"title": "Soup"})   #numbered by the database, e.g. written by another program
+        self.assertEqual(self.storage.get_recipe("Soup")["id"], 4)
+
+    def test_meal_of_a_deleted_recipe_keeps_its_title_in_database(self):
+        MealPlanner(self.manager, storage=self.storage).add_meal("2025-05-10", "Pizza")
+        self.manager.remove_recipe("Pizza")
+        meals = MealPlanner(RecipeManager(storage=self.storage), storage=self.storage).get_meals_for_date("2025-05-10")
+        self.assertEqual([MealPlanner._meal_title(m) for m in meals], ["Pizza"])
+
+    def test_scaled_meal_in_database(self):
+        planner = MealPlanner(self.manager, storage=self.storage)
+        planner.add_meal("2025-05-10", self.manager.get_recipe_by_title("Pasta"), servings=5)
+        meal = MealPlanner(self.manager, storage=self.storage).get_meals_for_date("2025-05-10")[0]
+        self.assertEqual((meal.title, meal.servings, meal.ingredients[0].quantity), ("Pasta", 5, 500))
+
+    def test_lazy_load_from_database(self):
+        lazy = RecipeManager(storage=self.storage, lazy=True)
+        pasta = lazy.get_recipe_by_title("pasta")
+        self.assertFalse(pasta.is_loaded())
+        self.assertEqual(pasta.steps, ["Boil"])
+
+    def test_lazy_rename_before_opening(self):
+        lazy = RecipeManager(storage=self.storage, lazy=True)
+        pasta = lazy.get_recipe_by_title("Pasta")
+        self.assertTrue(lazy.update_recipe(pasta, title="Pasta Bake"))
+        self.assertEqual(pasta.ingredients[0].name, "Spaghetti")
+        other = RecipeManager(storage=self.storage, lazy=True).get_recipe_by_title("Pasta Bake")
+        lazy.update_recipe(lazy.get_recipe_by_title("Pizza"), title="Pizza Pie")
+        self.assertEqual((other.steps, self.storage.get_recipe("Pizza Pie")["servings"]), (["Boil"], 4))
+
+    def test_lazy_search_and_cost_open_only_what_they_need(self):
+        self.manager.add_recipe(Recipe("Pasta Night", "", 2, "", "", ingredients=[Ingredient("Pasta", 1, "batch")]))
+        self.manager.reprice_ingredients({"Spaghetti": 0.01})
+        lazy = RecipeManager(storage=self.storage, lazy=True)
+        self.assertEqual([r.title for r in lazy.search_recipes("spag")], ["Pasta"])
+        self.assertEqual([r.title for r in lazy.search_recipes("pasta")], ["Pasta Night", "Pasta"])
+        self.assertFalse(any(r.is_loaded() for r in lazy.recipes))
+        self.assertAlmostEqual(lazy.recipe_cost("Pasta Night"), 2.0)
+        self.assertEqual([r.title for r in lazy.recipes if r.is_loaded()], ["Pasta", "Pasta Night"])
+
+    def test_queries_run_in_database(self):
+        self.assertEqual(self.storage.get_recipe("PASTA")["steps"], ["Boil"])
+        self.assertEqual([r["title"] for r in self.storage.filter_recipes(cuisine="Italian", rating=6)], ["Pasta"])
+
+    def test_meals_between_dates(self):
+        planner = MealPlanner(self.manager, storage=self.storage)
+        planner.add_meal("2025-05-01", self.manager.get_recipe_by_title("Pasta"))
+        planner.add_meal("2025-05-09", self.manager.get_recipe_by_title("Pizza"))
+        pizza_id = self.manager.get_recipe_by_title("Pizza").recipe_id
+        self.assertEqual(self.storage.meals_between("2025-05-02", "2025-05-31"), {"2025-05-09": [{"id": pizza_id, "title": "Pizza"}]})
+        self.assertEqual(MealPlanner(self.manager, storage=self.storage).get_recipes_for_date("2025-05-09")[0].title, "Pizza")
+
+    def test_lookups_and_ranges_are_answered_by_the_database(self):
+        other = RecipeManager(storage=self.storage)   #another program sharing the database
+        other.add_recipe(Recipe("Soup", "", 2, "French", "Dinner", rating=9))
+        MealPlanner(other, storage=self.storage).add_meal("2025-05-12", "Soup")
+        self.assertEqual([r.title for r in self.manager.filter_recipes(rating=6)], ["Pasta", "Soup"])
+        soup = self.manager.get_recipe_by_title("soup")
+        self.assertEqual((soup.title, self.manager.get_recipe_by_id(soup.recipe_id)), ("Soup", soup))
+        planner = MealPlanner(self.manager, storage=self.storage)
+        self.storage.set_day("2025-05-13", [soup.recipe_id])
+        self.assertEqual([(day.isoformat(), meals) for day, meals in planner.meals_between("2025-05-11", "2025-05-31")],
+                         [("2025-05-12", [soup]), ("2025-05-13", [soup])])
+
+    def test_json_import_and_export(self):
+        with tempfile.TemporaryDirectory() as folder:
+            files = [os.path.join(folder, name) for name in ("r.json", "m.json", "s.json")]
+            export_json(self.storage, *files)
+            other = SqliteStorage(":memory:")
+            import_json(other, *files)
+            self.assertEqual(other.load_recipes(), self.storage.load_recipes())
+            other.close()
+
+
+class TestCheapestMeals(unittest.TestCase):
+
+    def setUp(self):
+        self.small = Recipe("Small", "", 2, "", "", total_cost=3.0)
+        self.medium = Recipe("Medium", "", 3, "", "", total_cost=4.0)
+        self.large = Recipe("Large", "", 5, "", "", total_cost=8.0)
+        self.recipes = [self.small, self.medium, self.large]
+
+    def test_cheapest_exact_plan(self):
+        options = cheapest_meals(self.recipes, 5)
+        self.assertEqual(options.best(), [self.small, self.medium])
+        self.assertEqual(options.plans[0][1], 7.0)
+
+    def test_top_k_plans_are_ordered(self):
+        options = cheapest_meals(self.recipes, 5, top_k=3)
+        self.assertEqual([cost for _, cost in options.plans], [7.0, 8.0])
+
+    def test_repeats_allowed(self):
+        options = cheapest_meals(self.recipes, 4, allow_repeats=True)
+        self.assertEqual(options.best(), [self.small, self.small])
+
+    def test_nearest_totals_when_no_exact_match(self):
+        options = cheapest_meals([self.medium, self.large], 4)
+        self.assertFalse(options.found())
+        self.assertEqual(options.nearest_below[0], 3)
+        self.assertEqual(options.nearest_above[0], 5)
+
+
+class TestBulkImport(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_feed_rows_are_validated_and_deduplicated(self):
+        manager = RecipeManager()
+        manager.add_recipe(Recipe("Soup", "", 2, "", ""))
+        feed = [
+            '{"title": "Salad", "servings": 1, "ingredients": [{"name": "Feta", "quantity": 100, "unit": "g"}]}\n',
+            '{"title": "soup"}\n',
+            '\n',
+            '{"title": "SALAD"}\n',
+            '{"title": "Stew", "servings": 0}\n',
+            '{"title": "Pie"\n',
+            '{"title": "Tart", "ingredients": [{"name": "Flour"}]}\n',
+        ]
+        report = manager.add_recipes(read_json_lines(feed))
+        self.assertEqual(report.added, 1)
+        self.assertEqual([row for row, _ in report.rejected], [2, 4, 5, 6, 7])
+        self.assertEqual(report.rejected[0][1], "duplicate title")
+        self.assertEqual([r.title for r in RecipeManager().recipes], ["Soup", "Salad"])   #saved once at the end
+        self.assertEqual([r.title for r in manager.search_recipes("feta")], ["Salad"])
+
+    def test_journal_mode_writes_one_snapshot(self):
+        manager = RecipeManager(journal=True)
+        manager.add_recipes([{"title": f"Recipe {i}"} for i in range(50)])
+        manager.journal.wait()
+        self.assertFalse(os.path.exists("recipes.json.journal"))
+        self.assertEqual(len(RecipeManager(journal=True).recipes), 50)
+
+    def test_journal_batches_wait_for_a_running_compaction(self):
+        original = journal.write_json_atomic
+
+        def slow_write(filename, data):
+            time.sleep(0.2)
+            original(filename, data)
+
+        journal.write_json_atomic = slow_write
+        try:
+            manager = RecipeManager(journal=True)
+            manager.add_recipes([{"title": "A"}])
+            manager.add_recipes([{"title": "B"}])   #the first snapshot is still being written
+            manager.save_to_file()
+            manager.journal.close()
+        finally:
+            journal.write_json_atomic = original
+        self.assertEqual([r.title for r in RecipeManager(journal=True).recipes], ["A", "B"])
+
+    def test_lazy_storage_keeps_only_summaries(self):
+        storage = SqliteStorage(":memory:")
+        manager = RecipeManager(storage=storage, lazy=True)
+        manager.add_recipes([{"title": "Soup", "ingredients": [{"name": "Leek", "quantity": 2, "unit": "pcs"}]}])
+        soup = manager.get_recipe_by_title("soup")
+        self.assertFalse(soup.is_loaded())
+        self.assertEqual(soup.ingredients[0].name, "Leek")
+        storage.close()
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        manager = RecipeManager()
+        manager.add_recipe(Recipe("Soup", "", 2, "French", "Dinner", rating=7,
+                                  ingredients=[Ingredient("Leek", 2, "pcs", 0.5)]))
+        manager.add_recipe(Recipe("Salad", "", 1, "Greek", "Lunch", rating=5,
+                                  ingredients=[Ingredient("Feta", 100, "g", 0.02)]))
+        manager.save_to_file()
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def run_cli(self, *argv):
+        out, err = io.StringIO(), io.StringIO()
+        code = cli_main(["--data-dir", self.tmp.name, *argv], out=out, err=err)
+        return code, [json.loads(line) for line in out.getvalue().splitlines()], err.getvalue()
+
+    def test_consolidate_rejects_bad_dates(self):
+        code, rows, err = self.run_cli("consolidate", "2025-5-1", "2025-05-07")
+        self.assertEqual((code, rows), (1, []))
+        self.assertIn("2025-5-1", err)
+        code, _, err = self.run_cli("consolidate", "2025-05-07", "2025-05-01")
+        self.assertEqual(code, 1)
+        self.assertIn("before start date", err)
+
+    def test_search_prints_json_lines(self):
+        code, rows, _ = self.run_cli("search", "leek")
+        self.assertEqual(code, 0)
+        self.assertEqual([r["title"] for r in rows], ["Soup"])
+
+    def test_batch_saves_once_and_reports_bad_lines(self):
+        with open("commands.txt", "w") as f:
+            f.write("plan 2025-05-01 2025-05-03 Soup Salad\n")
+            f.write("plan 2025-05-04 2025-05-04 Nope\n")
+            f.write("shopping 2025-05-01 2025-05-02\n")
+        code, rows, err = self.run_cli("batch", "commands.txt")
+        self.assertEqual(code, 1)
+        self.assertIn('"line": 2', err)
+        self.assertEqual(rows[-1], {"date": "2025-05-02", "items": [{"name": "Feta", "unit": "g", "quantity": 100, "cost": 2.0}]})
+        planner = MealPlanner(RecipeManager())
+        self.assertEqual([r.title for r in planner.get_meals_for_date("2025-05-03")], ["Soup"])
+
+    def test_data_dir_leaves_other_paths_and_cwd_alone(self):
+        os.mkdir("work")
+        os.chdir("work")
+        code, rows, _ = self.run_cli("export", "out.json")
+        self.assertEqual((code, os.path.basename(os.getcwd())), (0, "work"))
+        with open("out.json") as f:
+            self.assertEqual([r["title"] for r in json.load(f)["recipes"]], ["Soup", "Salad"])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "out.json")))
+
+    def test_sqlite_import_and_filter(self):
+        self.run_cli("export", "feed.json")
+        code, rows, _ = self.run_cli("--db", "recipes.db", "import", "feed.json")
+        self.assertEqual(rows, [{"imported": 2, "skipped": 0, "rejected": []}])
+        code, rows, _ = self.run_cli("--db", "recipes.db", "filter", "--rating", "6")
+        self.assertEqual([r["title"] for r in rows], ["Soup"])
+
+
+class TestRecipeListModel(unittest.TestCase):
+
+    def setUp(self):
+        self.recipes = [Recipe(f"Recipe {i}", "", 1, "", "", recipe_id=i + 1) for i in range(10)]
+        self.model = RecipeListModel(page_size=4)
+        self.model.reset(self.recipes)
+
+    def test_rows_map_to_recipe_ids(self):
+        recipe = self.recipes[5]
+        self.assertEqual(self.model.recipe_id_at(self.model.row_of(recipe.recipe_id)), recipe.recipe_id)
+        self.model.remove(self.recipes[2].recipe_id)
+        self.assertEqual(self.model.titles[self.model.recipe_id_at(4)], "Recipe 5")
+        self.assertEqual(self.model.row_of(recipe.recipe_id), 4)
+
+    def test_edits_only_touch_the_visible_window(self):
+        self.assertEqual(self.model.window(), ["Recipe 0", "Recipe 1", "Recipe 2", "Recipe 3"])
+        self.assertEqual(self.model.insert(Recipe("New", "", 1, "", "", recipe_id=99)), [])   #below the window
+        recipe = self.recipes[1]
+        recipe.title = "Renamed"
+        self.assertEqual(self.model.rename(recipe), [("delete", 1), ("insert", 1, "Renamed")])
+        self.assertEqual(self.model.remove(self.recipes[0].recipe_id), [("delete", 0), ("insert", 3, "Recipe 4")])
+        self.assertEqual(self.model.window(), ["Renamed", "Recipe 2", "Recipe 3", "Recipe 4"])
+
+        self.assertTrue(self.model.scroll_to(100))
+        self.assertEqual(self.model.window(), ["Recipe 7", "Recipe 8", "Recipe 9", "New"])
+        self.model.selected_id = 99
+        self.assertEqual(self.model.selected_position(), 3)
+        self.assertEqual(self.model.remove(self.recipes[9].recipe_id), [("delete", 2), ("insert", 0, "Recipe 6")])
+        self.assertEqual(self.model.window(), ["Recipe 6", "Recipe 7", "Recipe 8", "New"])
+        self.assertEqual(self.model.remove(self.recipes[1].recipe_id), [])   #above the window
+        self.assertEqual(self.model.visible_id(3), 99)
+
+
+class TestTaskRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = TaskRunner()
+        self.results = []
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def poll_until_idle(self):
+        deadline = time.monotonic() + 5
+        while self.runner.poll():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_superseded_results_are_dropped(self):
+        release = threading.Event()
+        self.runner.submit("search", lambda task: release.wait(5) and "old", self.results.append)
+        self.runner.submit("search", lambda task: "new", self.results.append)
+        release.set()
+        self.poll_until_idle()
+        self.runner.poll()
+        self.assertEqual(self.results, ["new"])
+
+    def test_cancel_stops_the_optimiser(self):
+        recipes = [Recipe(f"R{i}", "", 1 + i % 5, "", "", total_cost=i) for i in range(50)]
+        started = threading.Event()
+
+        def work(task):
+            started.set()
+            return cheapest_meals(recipes, 40, progress=lambda done, total: (time.sleep(0.01), task.report(done, total)))
+
+        task = self.runner.submit("optimise", work, self.results.append)
+        started.wait(5)
+        self.runner.cancel("optimise")
+        self.poll_until_idle()
+        self.assertTrue(task.cancelled)
+        self.assertEqual(self.results, [])
+
+        errors = []
+        self.runner.submit("optimise", lambda task: cheapest_meals(recipes, 4, progress=task.report), self.results.append, errors.append)
+        self.runner.submit("broken", lambda task: 1 / 0, self.results.append, errors.append)
+        self.poll_until_idle()
+        self.assertEqual(self.results[0].target, 4)
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+
+    def test_lazy_recipes_open_safely_across_threads(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        filename = os.path.join(tmp.name, "recipes.json")
+        with open(filename, "w") as f:
+            json.dump([{"title": f"R{i}", "ingredients": [{"name": f"I{j}", "quantity": j, "unit": "g"} for j in range(30)]}
+                       for i in range(1000)], f)
+        recipes, _ = lazy_recipes_from_json(filename)
+        errors = []
+
+        def read():
+            try:
+                for recipe in recipes:
+                    self.assertEqual(len(recipe.ingredients), 30)
+            except Exception as e:
+                errors.append(e)
+
+        old_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=read) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(old_interval)
+        self.assertEqual(errors, [])
+
+    def test_prepared_plan_ignores_later_edits(self):
+        manager = RecipeManager(storage=SqliteStorage(":memory:"), lazy=True)
+        manager.add_recipes([{"title": f"R{i}", "servings": 2, "total_cost": i + 1} for i in range(20)])
+        search = manager.prepare_cheapest_meals(4, top_k=2)
+        manager.remove_recipe("R0")
+        manager.update_recipe(manager.get_recipe_by_title("R1"), servings=3)
+        self.runner.submit("optimise", lambda task: search(task.report), self.results.append)
+        self.poll_until_idle()
+        self.assertEqual([[r.title for r in plan] for plan, _ in self.results[0].plans], [["R0", "R1"], ["R0", "R2"]])
+        manager.storage.close()
+
+
+class TestAutosave(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.recipes = RecipeManager()
+        self.lists = ShoppingListManager()
+        self.writer = AutosaveWriter(delay=10)
+        self.writer.track("recipes", self.recipes, "recipes.json")
+        self.writer.track("shoppinglist", self.lists, "shoppinglist.json")
+
+    def tearDown(self):
+        self.writer.close()
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+    def test_bursts_are_written_once_after_a_quiet_period(self):
+        for i in range(3):
+            self.recipes.add_recipe(Recipe(f"Dish {i}", "", 1, "", ""))
+        self.assertEqual(self.writer.dirty(), ["recipes"])
+        self.writer.poll()
+        self.assertFalse(os.path.exists("recipes.json"))   #still inside the quiet period
+        self.writer.poll(now=time.monotonic() + 10)
+        self.writer.flush()
+        with open("recipes.json") as f:
+            self.assertEqual([r["title"] for r in json.load(f)["recipes"]], ["Dish 0", "Dish 1", "Dish 2"])
+        self.assertFalse(os.path.exists("shoppinglist.json"))   #nothing changed, nothing written
+        self.assertFalse(self.recipes.dirty)
+
+    def test_close_flushes_pending_changes(self):
+        self.lists.save_list("2025-05-10", [ShoppingItem("Leek", "g", 200)])
+        self.writer.close()
+        self.assertEqual(ShoppingListManager().get_list("2025-05-10")[0].quantity, 200)
+
+
+class TestTypeahead(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = RecipeManager(storage=SqliteStorage(":memory:"))
+        self.manager.add_recipe(Recipe("Spaghetti Bolognese", "", 4, "", "", ingredients=[Ingredient("Ground Beef", 500, "g")]))
+        self.manager.add_recipe(Recipe("Spaghetti Carbonara", "", 2, "", "", ingredients=[Ingredient("Bacon", 200, "g")]))
+        self.manager.add_recipe(Recipe("Beef Stew", "", 4, "", "", ingredients=[Ingredient("Beef", 500, "g")]))
+        self.search = TypeaheadSearch(self.manager, cache_size=2)
+
+    def tearDown(self):
+        self.manager.storage.close()
+
+    def titles(self, query):
+        return [r.title for r in self.search.search(query)]
+
+    def test_extended_queries_refine_the_last_results(self):
+        self.assertEqual(self.titles("spag"), ["Spaghetti Bolognese", "Spaghetti Carbonara"])
+        for query in ("spaghetti b", "Spaghetti  Be"):
+            self.assertEqual(self.titles(query), [r.title for r in self.manager.search_recipes(query)])
+        self.assertEqual(self.titles("spaghetti be"), ["Spaghetti Bolognese"])
+        self.assertEqual(self.titles("be"), ["Beef Stew", "Spaghetti Bolognese"])
+        self.assertEqual(len(self.search._cache), 2)   #least recently used queries were dropped
+
+    def test_limit_keeps_the_best_matches(self):
+        for i in range(30):
+            self.manager.add_recipe(Recipe(f"Soup {i:02}", "", 2, "", "", ingredients=[Ingredient("Spinach", 1, "kg")]))
+        self.assertEqual(self.manager.search_recipes("sp", limit=3), self.manager.search_recipes("sp")[:3])
+        search = TypeaheadSearch(self.manager, limit=5)
+        self.assertEqual([r.title for r in search.search("sp")],
+                         ["Spaghetti Bolognese", "Spaghetti Carbonara", "Soup 00", "Soup 01", "Soup 02"])
+        self.assertEqual(len(search.search("spi")), 5)   #not narrowed down from the five cut-off results
+        self.assertEqual(len(search.search("spinach soup")), 5)
+
+    def test_changes_invalidate_cached_results(self):
+        self.assertEqual(self.titles("stew"), ["Beef Stew"])
+        self.manager.add_recipe(Recipe("Lamb Stew", "", 4, "", ""))
+        self.assertEqual(self.titles("stew"), ["Beef Stew", "Lamb Stew"])
+        self.manager.update_recipe(self.manager.get_recipe_by_title("Lamb Stew"), title="Lamb Hotpot")
+        self.assertEqual(self.titles("stew"), ["Beef Stew"])
+
+
+class TestFuzzySearch(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = RecipeManager(storage=SqliteStorage(":memory:"))
+        self.manager.add_recipe(Recipe("Spaghetti Bolognese", "", 4, "", "", ingredients=[Ingredient("Ground Beef", 500, "g")]))
+        self.manager.add_recipe(Recipe("Beef Stew", "", 4, "", "", ingredients=[Ingredient("Beef", 500, "g")]))
+
+    def tearDown(self):
+        self.manager.storage.close()
+
+    def test_trigram_index_matches_a_linear_scan(self):
+        words = ["beef", "beet", "bees", "ground", "round", "sound", "spaghetti", "spaghettini", "stew", "slew", "egg", "ox"]
+        index = TrigramIndex(words)
+        index.remove("slew")
+        words.remove("slew")
+        for query in ("beeg", "grond", "spagheti", "sew", "eg", "o", "spagettini"):
+            for limit in (1, 2):
+                expected = sorted((edit_distance(query, w), w) for w in words if edit_distance(query, w) <= limit)
+                self.assertEqual(index.search(query, limit), expected)
+        self.assertEqual(edit_distance("kitten", "sitting"), 3)
+        self.assertEqual(edit_distance("kitten", "sitting", limit=1), 2)
+
+    def test_typos_fall_back_to_fuzzy_matches(self):
+        self.assertEqual([r.title for r in self.manager.search_recipes("spagheti")], ["Spaghetti Bolognese"])
+        self.assertEqual([r.title for r in self.manager.search_recipes("grond beef")], ["Spaghetti Bolognese"])
+        self.assertEqual([r.title for r in self.manager.search_recipes("beeef stew")], ["Beef Stew"])
+        self.assertEqual(self.manager.fuzzy_search_recipes("spagetty", max_distance=1), [])
+        self.manager.remove_recipe("Beef Stew")
+        self.assertEqual(self.manager.search_recipes("stw"), [])   #removed words are not matched
+
+    def test_explicit_distance_is_not_capped_by_word_length(self):
+        self.assertEqual(self.manager.fuzzy_search_recipes("stwe"), [])   #two edits is too many for a short word by default
+        self.assertEqual([r.title for r in self.manager.fuzzy_search_recipes("stwe", max_distance=2)], ["Beef Stew"])
+
+
+class TestPantry(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = RecipeManager(storage=SqliteStorage(":memory:"))
+        self.manager.add_recipe(Recipe("Pesto", "", 4, "", "", ingredients=[
+            Ingredient("Basil", 50, "g", 0.04), Ingredient("Pine Nuts", 30, "g", 0.05)]))
+        self.manager.add_recipe(Recipe("Pesto Pasta", "", 2, "", "", ingredients=[
+            Ingredient("Pasta", 200, "g", 0.01), Ingredient("Pesto", 4, "servings")]))
+        self.manager.add_recipe(Recipe("Buttered Pasta", "", 2, "", "", ingredients=[
+            Ingredient("Pasta", 200, "g", 0.01), Ingredient("Butter", 20, "g", 0.02)]))
+        self.manager.add_recipe(Recipe("Toast", "", 1, "", ""))   #no ingredients, never suggested
+
+    def tearDown(self):
+        self.manager.storage.close()
+
+    def cook(self, pantry, max_missing=0):
+        return [(r.title, missing, round(cost, 2)) for r, missing, cost in self.manager.what_can_i_cook(pantry, max_missing)]
+
+    def test_sub_recipe_ingredients_count(self):
+        self.assertEqual(self.cook(["pasta", "butter"]), [("Buttered Pasta", [], 0)])
+        self.assertEqual(self.cook(["Pasta", "Basil", "Pine nuts"]), [("Pesto", [], 0), ("Pesto Pasta", [], 0)])
+        self.assertEqual(self.cook(["Pasta", "Basil"], max_missing=1),
+                         [("Buttered Pasta", ["Butter"], 0.4), ("Pesto", ["Pine Nuts"], 1.5), ("Pesto Pasta", ["Pine Nuts"], 1.5)])
+
+    def test_bitsets_follow_edits(self):
+        self.assertEqual(self.cook(["basil", "pine nuts"]), [("Pesto", [], 0)])
+        self.manager.update_recipe(self.manager.get_recipe_by_title("Pesto"), ingredients=[Ingredient("Basil", 50, "g")])
+        self.assertEqual(self.cook(["basil", "pasta"]), [("Pesto", [], 0), ("Pesto Pasta", [], 0)])
+        self.manager.remove_recipe("Pesto")
+        self.assertEqual(self.cook(["pesto", "pasta"]), [("Pesto Pasta", [], 0)])   #now a plain ingredient
+
+
+class TestHeadlessImport(unittest.TestCase):
+
+    def test_core_modules_do_not_import_tkinter(self):
+        imported = {name for name, _, _ in import_times(CORE_MODULES)}
+        self.assertFalse(imported & GUI_MODULES)
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,57 @@
+#search-as-you-type over a RecipeManager, the GUI calls search() for each (debounced) keystroke
+#typing usually extends the last query, so its results are narrowed down instead of searching again,
+#and recent queries are kept so deleting characters brings their results straight back
+
+from collections import OrderedDict
+from search_index import tokenize
+
+
+class TypeaheadSearch:
+    def __init__(self, recipe_manager, cache_size=64, limit=None):
+        self.recipe_manager = recipe_manager
+        self.cache_size = cache_size   #recent queries kept, least recently used are dropped first
+        self.limit = limit   #most matches returned for a query, the best ranked first, None for all
+        self._cache = OrderedDict()   #normalized query -> results, oldest first
+        self._generation = None   #recipe_manager.generation the cached results were made at
+        self._last = None   #(normalized query, results) of the latest search
+
+    @staticmethod
+    def normalize(query):
+        #queries with the same words are the same query, "Spag  Bol" == "spag bol"
+        return " ".join(tokenize(query))
+
+    def _complete(self, results):
+        #true if results are every match of their query, not the first limit of them
+        return self.limit is None or len(results) < self.limit
+
+    def clear(self):
+        self._cache.clear()
+        self._last = None
+
+    def search(self, query):
+        # Time Complexity: O(1) for a cached query, O(r * k) to refine r previous results, a full search otherwise
+
+        #recipes matching query, ranked like RecipeManager.search_recipes, at most limit of them
+        #an empty query is not a search, it gives every recipe
+        if self._generation != self.recipe_manager.generation:
+            self.clear()   #a recipe was added, edited or removed since the results were made
+            self._generation = self.recipe_manager.generation
+        key = self.normalize(query)
+        if not key:
+            return list(self.recipe_manager.recipes)
+        results = self._cache.get(key)
+        if results is not None:
+            self._cache.move_to_end(key)
+        elif self._last is not None and key.startswith(self._last[0]) and self._complete(self._last[1]):
+            #a longer query only ever matches fewer recipes, so check only the last results
+            #unless they were cut off at the limit, the rest of the matches are not among them
+            results = self.recipe_manager.refine_search(key, self._last[1])
+            if not results:
+                results = self.recipe_manager.search_recipes(key, self.limit)   #may still match with a typo fixed
+        else:
+            results = self.recipe_manager.search_recipes(key, self.limit)
+        self._cache[key] = results
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        self._last = (key, results)
+        return list(results)
@@ -0,0 +1,56 @@
+from functools import lru_cache
+
+
+#every unit name we know -> (dimension, how many base units one of it is)
+#the base units are g for mass, ml for volume and pcs for counted things
+UNITS = {
+    "mass": ("g", {
+        "g": 1, "gram": 1, "grams": 1, "gr": 1,
+        "kg": 1000, "kilo": 1000, "kilos": 1000, "kilogram": 1000, "kilograms": 1000,
+        "mg": 0.001, "milligram": 0.001, "milligrams": 0.001,
+        "oz": 28.349523125, "ounce": 28.349523125, "ounces": 28.349523125,
+        "lb": 453.59237, "lbs": 453.59237, "pound": 453.59237, "pounds": 453.59237,
+    }),
+    "volume": ("ml", {
+        "ml": 1, "millilitre": 1, "millilitres": 1, "milliliter": 1, "milliliters": 1,
+        "cl": 10, "dl": 100,
+        "l": 1000, "litre": 1000, "litres": 1000, "liter": 1000, "liters": 1000,
+        "tsp": 5, "teaspoon": 5, "teaspoons": 5,
+        "tbsp": 15, "tablespoon": 15, "tablespoons": 15,
+        "cup": 240, "cups": 240,
+        "fl oz": 29.5735, "pint": 473.176, "pints": 473.176,
+    }),
+    "count": ("pcs", {
+        "": 1, "pc": 1, "pcs": 1, "piece": 1, "pieces": 1, "x": 1, "each": 1, "whole": 1,
+    }),
+}
+
+#larger units to show a total in once it reaches one of them
+DISPLAY_UNITS = {"g": ("kg", 1000), "ml": ("l", 1000)}
+
+
+@lru_cache(maxsize=None)
+def canonical_unit(unit):
+    # Time Complexity: O(1), each distinct unit text is only worked out once
+
+    #return (base unit, factor) for a unit as written in a recipe, e.g. "Kg" -> ("g", 1000)
+    #an empty or missing unit counts pieces, a unit we do not know is kept as its own base
+    name = " ".join((unit or "").lower().replace(".", "").split())
+    for base, factors in UNITS.values():
+        if name in factors:
+            return base, factors[name]
+    return name, 1
+
+
+def to_base(quantity, unit):
+    #the same amount in the base unit of its dimension, e.g. (1.5, "kg") -> (1500.0, "g")
+    base, factor = canonical_unit(unit)
+    return (quantity or 0) * factor, base
+
+
+def for_display(quantity, unit):
+    #a base amount in the unit that reads best, e.g. (1500, "g") -> (1.5, "kg")
+    larger = DISPLAY_UNITS.get(unit)
+    if larger is not None and abs(quantity) >= larger[1]:
+        return quantity / larger[1], larger[0]
+    return quantity, unit